@@ -1,23 +1,42 @@
 import os
+import sys
+import base64
+import secrets
+import tempfile
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, make_response
-from flask_socketio import SocketIO
-import azure.cognitiveservices.speech as speechsdk
+from flask import Flask, Blueprint, render_template, jsonify, request, make_response, Response, current_app
+from flask_socketio import join_room, leave_room, rooms
 import requests
-from dotenv import load_dotenv
-import sys
 import traceback
 import time
 import json
 import sqlite3
 from pathlib import Path
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from config import validate_config
-from database import init_db, get_all_meetings, update_meeting_participants, save_meeting
+from config import Settings
+from database import (
+    init_db, update_meeting_participants,
+    get_meetings_page, get_meeting, search_meetings,
+    finish_meeting, get_live_transcript, abandon_live_meeting, claim_orphaned_meetings
+)
+from segment_writer import SegmentWriter, PROCESS_OWNER, is_owner_alive
+from transcript_emitter import TranscriptEmitter
+from summary_cache import SummaryCache
+from audio_stream import AudioStream, AudioFormatError, negotiate_audio_format
+from batch import transcribe_file, SUPPORTED_EXTENSIONS
+from replay import RecognitionRecorder, capture_path
+import metrics
 from transcriber import MeetingTranscriber
-from email_service import send_meeting_summary
+from meeting_registry import MeetingRegistry, MeetingLimitReached
+from jobs import JobQueue, SUCCEEDED
+from email_service import summary_subject
+from outbox import OutboxSender
+from shared_state import SharedState, CommandTimeout, connect
+from rooms import (
+    meeting_room, metadata_room, status_rooms, subscription_room, meeting_token, valid_token,
+    session_token, valid_session_token
+)
+from recognizer_pool import RecognizerPool
+from concurrency import LoopSocketIO, configure_async_mode, run_blocking
 import logging
 from werkzeug.exceptions import HTTPException
 
@@ -25,161 +44,392 @@ from werkzeug.exceptions import HTTPException
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Print current working directory
-print(f"Current working directory: {os.getcwd()}")
-
-# Try to load .env file
-env_path = os.path.join(os.getcwd(), '.env')
-print(f"Looking for .env file at: {env_path}")
-print(f".env file exists: {os.path.exists(env_path)}")
-
-# Load environment variables
-load_dotenv(env_path)
-
-# Debug: Print all environment variables
-print("\nAll environment variables:")
-for key in os.environ:
-    if any(azure_key in key.lower() for azure_key in ['azure', 'cosmos', 'email']):
-        value = os.environ[key]
-        masked_value = '*' * len(value) if value else 'Not set'
-        print(f"{key}: {masked_value}")
-
-# Validate required environment variables
-required_vars = [
-    'AZURE_SPEECH_KEY',
-    'AZURE_SPEECH_REGION',
-    'AZURE_OPENAI_API_KEY',
-    'AZURE_OPENAI_ENDPOINT',
-    'EMAIL_USER',
-    'EMAIL_PASSWORD',
-    'EMAIL_SMTP_SERVER',
-    'EMAIL_SMTP_PORT'
-]
-
-missing_vars = [var for var in required_vars if not os.getenv(var)]
-if missing_vars:
-    print("\nMissing environment variables:")
-    for var in missing_vars:
-        print(f"- {var}")
-    print("\nPlease create a .env file with these variables.")
-    sys.exit(1)
-
-# Validate configuration
-validate_config()
-
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key'
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-# Initialize database
-init_db()
-
-# Global transcriber instance
-transcriber = None
-
-# Email configuration
-EMAIL_USER = os.getenv('EMAIL_USER')
-EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
-EMAIL_SMTP_SERVER = os.getenv('EMAIL_SMTP_SERVER')
-EMAIL_SMTP_PORT = int(os.getenv('EMAIL_SMTP_PORT'))
-
-def send_email(to_emails, subject, body):
+# Bound to an app by create_app(); routes live on the blueprint
+socketio = LoopSocketIO()
+bp = Blueprint('meeting_assistant', __name__)
+
+# Settings and the services built from them; assigned by create_app()
+settings = None
+jobs = None
+batch_jobs = None
+meetings = None
+segment_writer = None
+transcript_emitter = None
+summary_cache = None
+outbox = None
+state = None
+recognizer_pool = None
+
+def save_unsummarized_meeting(meeting_id, transcript):
+    """Keep the transcript of a meeting whose summary failed, with an empty summary."""
     try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_USER
-        msg['To'] = ', '.join(to_emails)
-        msg['Subject'] = subject
-
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP(EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        return True, "Email sent successfully"
+        finish_meeting(meeting_id, transcript, '', status='summary_failed', db_path=settings.database_path)
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
-        return False, str(e)
-
-# Azure Speech Services configuration
-print("\nInitializing Speech Services...")
-speech_key = os.getenv('AZURE_SPEECH_KEY')
-speech_region = os.getenv('AZURE_SPEECH_REGION')
-print(f"Speech Region: {speech_region}")
-
-speech_config = speechsdk.SpeechConfig(
-    subscription=speech_key,
-    region=speech_region
-)
-
-# Configure speech recognition settings
-speech_config.speech_recognition_language = "en-US"
-speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, "5000")
-speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, "1000")
+        logger.error(f"Error saving transcript of meeting {meeting_id}: {str(e)}")
 
-# Azure OpenAI configuration
-API_KEY = os.getenv('AZURE_OPENAI_API_KEY')
-API_ENDPOINT = os.getenv('AZURE_OPENAI_ENDPOINT')
-API_VERSION = "2023-05-15"  # Using stable version
-DEPLOYMENT_NAME = "gpt-35-turbo"
+def finalize_meeting(job, transcriber):
+    """End-of-meeting pipeline: stop recording, summarize, persist."""
+    job.set_stage('stopping')
+    transcript = transcriber.stop_recording()
+    job.set_stage('summarizing')
+    try:
+        summary = transcriber.generate_summary(transcript)
+    except Exception:
+        save_unsummarized_meeting(transcriber.meeting_id, transcript)
+        raise
+    job.set_stage('saving')
+    db_meeting_id = finish_meeting(
+        transcriber.meeting_id, transcript, summary, db_path=settings.database_path
+    )
+    result = {'summary': summary, 'db_meeting_id': db_meeting_id}
+    if transcriber.compaction:
+        result['compaction'] = transcriber.compaction.to_dict()
+    return result
+
+def recover_meeting(job, meeting_id):
+    """Summarize and save a meeting whose recording process went away."""
+    db_path = settings.database_path
+    job.set_stage('loading')
+    transcript = get_live_transcript(meeting_id, db_path)
+    if not transcript:
+        abandon_live_meeting(meeting_id, db_path)
+        return {'summary': None, 'db_meeting_id': None}
+    job.set_stage('summarizing')
+    try:
+        summary = MeetingTranscriber(
+            socketio, meeting_id=meeting_id, summary_cache=summary_cache, settings=settings
+        ).generate_summary(transcript)
+    except Exception:
+        save_unsummarized_meeting(meeting_id, transcript)
+        raise
+    job.set_stage('saving')
+    db_meeting_id = finish_meeting(meeting_id, transcript, summary, status='recovered', db_path=db_path)
+    return {'summary': summary, 'db_meeting_id': db_meeting_id}
+
+def recover_orphaned_meetings():
+    """Queue recovery jobs for meetings left recording by a dead process; returns the jobs."""
+    meeting_ids = claim_orphaned_meetings(
+        PROCESS_OWNER, is_owner_alive, settings.meeting_recovery_grace_seconds, settings.database_path
+    )
+    recovery_jobs = []
+    for meeting_id in meeting_ids:
+        logger.info(f"Recovering orphaned meeting {meeting_id}")
+        recovery_jobs.append(submit_job(jobs, 'recover_meeting', recover_meeting, meeting_id, meeting_id=meeting_id))
+    return recovery_jobs
+
+def share_job(job):
+    """Publish a job's status so /jobs answers for it on every worker."""
+    try:
+        state.save_job(job.to_dict())
+    except Exception as e:
+        logger.error(f"Error sharing status of job {job.id}: {str(e)}")
+
+def submit_job(queue, kind, fn, *args, **kwargs):
+    """Submit a job to queue and share its status."""
+    job = queue.submit(kind, fn, *args, **kwargs)
+    share_job(job)
+    return job
+
+def notify_job_complete(job):
+    """Tell clients that a background job has finished."""
+    share_job(job)
+    payload = {
+        'job_id': job.id,
+        'kind': job.kind,
+        'meeting_id': job.meeting_id,
+        'status': job.status
+    }
+    if job.status == SUCCEEDED:
+        payload['result'] = job.result
+    else:
+        payload['error'] = job.error
+    if not job.meeting_id:
+        # Batch results only go to the client that uploaded the recording
+        if job.requested_by:
+            socketio.emit('job_complete', payload, to=job.requested_by)
+        return
+    socketio.emit('job_complete', payload, to=meeting_room(job.meeting_id))
+    if job.kind == 'end_meeting':
+        status = 'ended' if job.status == SUCCEEDED else 'failed'
+        notify_meeting_status(job.meeting_id, status)
+
+def notify_meeting_status(meeting_id, status):
+    """Tell a meeting's full and metadata-only subscribers that it changed state.
+
+    Metadata-only subscribers need no token, so the event carries nothing
+    that leads to the meeting's content, such as its job id.
+    """
+    socketio.emit('meeting_status', {'meeting_id': meeting_id, 'status': status}, to=status_rooms(meeting_id))
+
+def reap_meeting(meeting_id, transcriber):
+    """Finalize a meeting that the registry dropped for inactivity."""
+    logger.info(f"Ending idle meeting {meeting_id}")
+    queue_end_meeting(meeting_id, transcriber)
+
+# Gauges computed when /metrics is scraped, so the recognition path pays nothing for them
+metrics.registry.gauge('active_meetings', 'Meetings currently recording', function=lambda: len(meetings or ()))
+metrics.registry.gauge(
+    'recognizer_pool_idle',
+    'Pre-connected recognizers waiting for a meeting',
+    function=lambda: len(recognizer_pool or ())
+)
+metrics.registry.gauge(
+    'transcript_buffer_entries',
+    'Transcript entries held in memory across active meetings',
+    function=lambda: sum(len(t.segments) for t in meetings.transcribers()) if meetings else 0
+)
 
-# Clean up the API endpoint
-API_ENDPOINT = API_ENDPOINT.rstrip('/')
-if API_ENDPOINT.endswith('/openai'):
-    API_ENDPOINT = API_ENDPOINT[:-7]  # Remove /openai if it exists
+def notify_email_status(message_id, status, error, meeting_id=None):
+    """Tell the clients following an email's meeting how its delivery went.
 
-print("\nOpenAI Configuration:")
-print(f"API Endpoint: {API_ENDPOINT}")
-print(f"API Version: {API_VERSION}")
-print(f"Deployment Name: {DEPLOYMENT_NAME}")
+    Emails sent without a meeting have no one to tell; their status is
+    available from /outbox.
+    """
+    if not meeting_id:
+        return
+    socketio.emit('email_status', {
+        'message_id': message_id, 'meeting_id': meeting_id, 'status': status, 'error': error
+    }, to=meeting_room(meeting_id))
 
-@app.route('/')
+@bp.route('/')
 def index():
     return make_response(render_template('index.html'))
 
-@app.route('/meetings')
+@bp.route('/meetings')
 def list_meetings():
-    meetings = get_all_meetings()
-    return make_response(jsonify(meetings))
-
-@app.route('/start_meeting', methods=['POST'])
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        meetings, next_cursor = run_blocking(
+            get_meetings_page,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            db_path=settings.database_path
+        )
+    except ValueError as e:
+        return make_response(jsonify({'status': 'error', 'message': str(e)}), 400)
+    return make_response(jsonify({'meetings': meetings, 'next_cursor': next_cursor}))
+
+@bp.route('/meetings/search')
+def search_meeting_history():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return make_response(jsonify({'status': 'error', 'message': 'Query parameter q is required'}), 400)
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return make_response(jsonify({'status': 'error', 'message': 'limit and offset must be integers'}), 400)
+    results, next_offset = run_blocking(
+        search_meetings, query, limit=limit, offset=offset, db_path=settings.database_path
+    )
+    return make_response(jsonify({'results': results, 'next_offset': next_offset}))
+
+@bp.route('/meetings/<int:meeting_id>')
+def get_meeting_detail(meeting_id):
+    meeting = run_blocking(get_meeting, meeting_id, settings.database_path)
+    if not meeting:
+        return make_response(jsonify({'status': 'error', 'message': 'Meeting not found'}), 404)
+    return make_response(jsonify(meeting))
+
+def notify_audio_backpressure(meeting_id, paused, buffered_frames):
+    """Ask the client streaming a meeting's audio to pause or resume sending frames."""
+    socketio.emit('audio_backpressure', {
+        'meeting_id': meeting_id,
+        'paused': paused,
+        'buffered_frames': buffered_frames
+    }, to=meeting_room(meeting_id))
+
+def create_transcriber(meeting_id, audio_format=None):
+    """Build a transcriber for a new meeting, fed from the browser when audio_format is given."""
+    audio_stream = None
+    warm = None
+    if audio_format:
+        warm = recognizer_pool.acquire(audio_format) if recognizer_pool is not None else None
+        audio_stream = AudioStream(
+            audio_format,
+            on_backpressure=lambda paused, depth: notify_audio_backpressure(meeting_id, paused, depth),
+            push_stream=warm.push_stream if warm else None
+        )
+    recorder = None
+    if settings.recognition_capture_dir:
+        recorder = RecognitionRecorder(capture_path(settings.recognition_capture_dir, meeting_id), meeting_id)
+    return MeetingTranscriber(
+        socketio,
+        meeting_id=meeting_id,
+        segment_writer=segment_writer,
+        emitter=transcript_emitter,
+        summary_cache=summary_cache,
+        audio_stream=audio_stream,
+        recorder=recorder,
+        warm_recognizer=warm,
+        settings=settings
+    )
+
+@bp.route('/start_meeting', methods=['POST'])
 def start_meeting():
-    global transcriber
     try:
         logger.info("Starting new meeting...")
-        transcriber = MeetingTranscriber(socketio)
-        transcriber.start_recording()
-        logger.info("Meeting started successfully")
-        return make_response(jsonify({'status': 'success', 'message': 'Meeting started'}))
+        data = request.get_json(silent=True) or {}
+        audio_format = None
+        if settings.audio_source == 'browser':
+            try:
+                audio_format = negotiate_audio_format(data.get('audio'), settings)
+            except AudioFormatError as e:
+                return make_response(jsonify({'status': 'error', 'message': str(e)}), 400)
+        # Connecting the recognizer blocks until the Speech service answers
+        meeting_id, _ = run_blocking(
+            meetings.start_meeting,
+            lambda meeting_id: create_transcriber(meeting_id, audio_format)
+        )
+        state.claim_meeting(meeting_id)
+        notify_meeting_status(meeting_id, 'recording')
+        logger.info(f"Meeting {meeting_id} started successfully")
+        return make_response(jsonify({
+            'status': 'success',
+            'message': 'Meeting started',
+            'meeting_id': meeting_id,
+            # Needed to join the meeting's room; only this client learns it
+            'token': meeting_token(meeting_id, current_app.config['SECRET_KEY']),
+            'audio': audio_format
+        }))
+    except MeetingLimitReached as e:
+        logger.warning(str(e))
+        return make_response(jsonify({'status': 'error', 'message': str(e)}), 503)
     except Exception as e:
         logger.error(f"Error starting meeting: {str(e)}")
         return make_response(jsonify({'status': 'error', 'message': str(e)}), 500)
 
-@app.route('/end_meeting', methods=['POST'])
+def queue_end_meeting(meeting_id, transcriber):
+    """Hand a meeting taken out of the registry to the end-of-meeting pipeline; returns (body, status)."""
+    state.release_meeting(meeting_id)
+    job = submit_job(jobs, 'end_meeting', finalize_meeting, transcriber, meeting_id=meeting_id)
+    logger.info(f"Meeting {meeting_id} queued for post-processing as job {job.id}")
+    notify_meeting_status(meeting_id, 'ending')
+    return {
+        'status': 'accepted',
+        'message': 'Meeting ending',
+        'meeting_id': meeting_id,
+        'job_id': job.id
+    }, 202
+
+def end_local_meeting(meeting_id):
+    """End a meeting recorded by this worker; returns (body, status)."""
+    transcriber = meetings.pop(meeting_id)
+    if not transcriber:
+        return {'status': 'error', 'message': f'No active meeting with id {meeting_id}'}, 404
+    return queue_end_meeting(meeting_id, transcriber)
+
+def forward_command(owner, command, payload):
+    """Run a request on the worker that owns the meeting; returns (body, status)."""
+    try:
+        reply = run_blocking(
+            state.send, owner, command, payload, reply_timeout=settings.worker_command_timeout_seconds
+        )
+    except CommandTimeout as e:
+        logger.error(str(e))
+        return {'status': 'error', 'message': 'The worker recording this meeting did not respond'}, 504
+    return reply['body'], reply['status_code']
+
+@bp.route('/end_meeting', methods=['POST'])
 def end_meeting():
-    global transcriber
     try:
         logger.info("Ending meeting...")
-        if transcriber:
-            transcript = transcriber.stop_recording()
-            summary = transcriber.generate_summary(transcript)
-            save_meeting(transcript, summary)
-            logger.info("Meeting ended successfully")
-            return make_response(jsonify({
-                'status': 'success',
-                'message': 'Meeting ended',
-                'summary': summary
-            }))
-        else:
+        data = request.get_json(silent=True) or {}
+        meeting_id = data.get('meeting_id') or request.args.get('meeting_id')
+        if meeting_id:
+            body, status = end_local_meeting(meeting_id)
+            if status == 404:
+                # The meeting may be recording on another worker
+                owner = state.meeting_owner(meeting_id)
+                if owner and owner != state.worker_id:
+                    body, status = forward_command(owner, 'end_meeting', {'meeting_id': meeting_id})
+            return make_response(jsonify(body), status)
+
+        # Clients that predate meeting ids can still end the only running meeting
+        meeting_id, transcriber = meetings.pop_only()
+        if not transcriber:
+            if len(meetings):
+                return make_response(jsonify({'status': 'error', 'message': 'meeting_id is required'}), 400)
             logger.error("No active meeting to end")
             return make_response(jsonify({'status': 'error', 'message': 'No active meeting'}), 400)
+        body, status = queue_end_meeting(meeting_id, transcriber)
+        return make_response(jsonify(body), status)
     except Exception as e:
         logger.error(f"Error ending meeting: {str(e)}")
         return make_response(jsonify({'status': 'error', 'message': str(e)}), 500)
 
-@app.route('/send_email', methods=['POST'])
+def notify_batch_progress(job, filename):
+    """Tell the uploading client how far transcription of its recording has got."""
+    if not job.requested_by:
+        return
+    socketio.emit('batch_progress', {
+        'job_id': job.id,
+        'filename': filename,
+        'stage': job.stage,
+        'progress': job.progress
+    }, to=job.requested_by)
+
+@bp.route('/batch/transcribe', methods=['POST'])
+def batch_transcribe():
+    """Queue uploaded WAV or FLAC recordings for transcription and summarization.
+
+    Progress and results are sent only to the Socket.IO client whose session
+    id is given as the sid form field, with the token its 'batch_token' event
+    returned; without them, poll /jobs.
+    """
+    try:
+        sid = request.form.get('sid')
+        if sid and not valid_session_token(sid, request.form.get('token'), current_app.config['SECRET_KEY']):
+            return make_response(jsonify({
+                'status': 'error', 'message': "A valid token from the 'batch_token' event is required for this sid"
+            }), 403)
+        files = request.files.getlist('files')
+        if not files:
+            return make_response(jsonify({'status': 'error', 'message': 'No files uploaded'}), 400)
+        for upload in files:
+            if os.path.splitext(upload.filename or '')[1].lower() not in SUPPORTED_EXTENSIONS:
+                return make_response(jsonify({
+                    'status': 'error',
+                    'message': f"Unsupported file {upload.filename}; expected WAV or FLAC"
+                }), 400)
+
+        os.makedirs(settings.batch_upload_dir, exist_ok=True)
+        queued = []
+        for upload in files:
+            extension = os.path.splitext(upload.filename)[1].lower()
+            fd, path = tempfile.mkstemp(suffix=extension, dir=settings.batch_upload_dir)
+            with os.fdopen(fd, 'wb') as destination:
+                upload.save(destination)
+            job = submit_job(
+                batch_jobs, 'batch_transcription', transcribe_file, path,
+                filename=upload.filename,
+                db_path=settings.database_path,
+                summary_cache=summary_cache,
+                on_progress=notify_batch_progress,
+                delete_after=True,
+                settings=settings,
+                requested_by=sid
+            )
+            queued.append({'job_id': job.id, 'filename': upload.filename})
+        return make_response(jsonify({'status': 'accepted', 'jobs': queued}), 202)
+    except Exception as e:
+        logger.error(f"Error queueing batch transcription: {str(e)}")
+        return make_response(jsonify({'status': 'error', 'message': str(e)}), 500)
+
+@bp.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Return a job's status; a meeting's job needs the meeting's token as the token parameter."""
+    job = jobs.get(job_id) or batch_jobs.get(job_id)
+    # Jobs run by other workers are only known through the shared state
+    job = job.to_dict() if job else state.load_job(job_id)
+    if not job:
+        return make_response(jsonify({'status': 'error', 'message': 'Job not found'}), 404)
+    if job.get('meeting_id') and not valid_token(
+            job['meeting_id'], request.args.get('token'), current_app.config['SECRET_KEY']):
+        return make_response(jsonify({'status': 'error', 'message': 'A valid token is required to read this job'}), 403)
+    return make_response(jsonify(job))
+
+@bp.route('/send_email', methods=['POST'])
 def send_email():
     try:
         data = request.get_json()
@@ -192,21 +442,116 @@ def send_email():
         if not participants or not summary:
             return make_response(jsonify({'status': 'error', 'message': 'Participants and summary are required'}), 400)
         
-        result = send_meeting_summary(participants, summary)
-        return make_response(jsonify(result))
+        # Delivery status goes to the meeting's followers, so tying an email to a meeting needs its token
+        meeting_id = data.get('meeting_id')
+        if meeting_id and not valid_token(meeting_id, data.get('token'), current_app.config['SECRET_KEY']):
+            return make_response(jsonify({'status': 'error', 'message': 'A valid token is required for this meeting'}), 403)
+        
+        message_id = run_blocking(outbox.enqueue, participants, summary_subject(), summary, meeting_id=meeting_id)
+        return make_response(jsonify({
+            'status': 'accepted',
+            'message': 'Email queued',
+            'message_id': message_id,
+            'status_url': f'/outbox/{message_id}'
+        }), 202)
     except Exception as e:
-        logger.error(f"Error sending email: {str(e)}")
+        logger.error(f"Error queueing email: {str(e)}")
         return make_response(jsonify({'status': 'error', 'message': str(e)}), 500)
 
+@bp.route('/outbox/<int:message_id>')
+def get_outbox_status(message_id):
+    message = run_blocking(outbox.status, message_id)
+    if not message:
+        return make_response(jsonify({'status': 'error', 'message': 'Message not found'}), 404)
+    return make_response(jsonify(message))
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@socketio.on('audio_frame')
+def handle_audio_frame(meeting_id, frame):
+    """Receive one binary audio frame for a meeting recording from the browser.
+
+    Only a client that joined the meeting's room, which needs its token, can
+    send audio; meeting ids alone are public in the status rooms.
+    """
+    if not isinstance(meeting_id, str) or meeting_room(meeting_id) not in rooms():
+        return {'status': 'error', 'message': 'Join the meeting with its token before sending audio'}
+    transcriber = meetings.get(meeting_id)
+    if not transcriber:
+        owner = state.meeting_owner(meeting_id)
+        if owner and owner != state.worker_id:
+            # The socket is connected to a different worker than the recognizer
+            state.send(owner, 'audio_frame', {
+                'meeting_id': meeting_id, 'frame': base64.b64encode(frame).decode('ascii')
+            })
+            return None
+    if not transcriber or not transcriber.audio_stream:
+        return {'status': 'error', 'message': 'Meeting not found'}
+    try:
+        transcriber.audio_stream.write(frame)
+    except AudioFormatError as e:
+        return {'status': 'error', 'message': str(e)}
+
+def handle_end_meeting_command(payload):
+    body, status = end_local_meeting(payload['meeting_id'])
+    return {'status_code': status, 'body': body}
+
+def handle_audio_frame_command(payload):
+    transcriber = meetings.get(payload['meeting_id'])
+    if transcriber and transcriber.audio_stream:
+        transcriber.audio_stream.write(base64.b64decode(payload['frame']))
+
+def subscribe(data):
+    """Join the room a subscription request asks for; returns the ack for the client."""
+    data = data if isinstance(data, dict) else {}
+    try:
+        room = subscription_room(
+            data.get('meeting_id'), bool(data.get('metadata_only')),
+            token=data.get('token'), secret=current_app.config['SECRET_KEY']
+        )
+    except ValueError as e:
+        return {'status': 'error', 'message': str(e)}
+    join_room(room)
+    return {'status': 'ok', 'room': room}
+
+@socketio.on('batch_token')
+def handle_batch_token(data=None):
+    """Return this client's session id and a token binding an upload to it.
+
+    The pair is sent with /batch/transcribe so that batch events reach this
+    session, and a client cannot have another session's id notified.
+    """
+    return {'sid': request.sid, 'token': session_token(request.sid, current_app.config['SECRET_KEY'])}
+
+@socketio.on('join_meeting')
+def handle_join_meeting(data=None):
+    """Follow a meeting's live events, or with metadata_only just its status."""
+    return subscribe(data)
+
+@socketio.on('leave_meeting')
+def handle_leave_meeting(data=None):
+    """Stop following a meeting."""
+    meeting_id = data.get('meeting_id') if isinstance(data, dict) else None
+    if not meeting_id:
+        return {'status': 'error', 'message': 'meeting_id is required'}
+    leave_room(meeting_room(meeting_id))
+    leave_room(metadata_room(meeting_id))
+    return {'status': 'ok'}
+
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     logger.info('Client connected')
+    # Clients can subscribe as they connect, so a reconnect restores the subscription
+    if isinstance(auth, dict) and (auth.get('meeting_id') or auth.get('metadata_only')):
+        subscribe(auth)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     logger.info('Client disconnected')
 
-@app.errorhandler(Exception)
+@bp.app_errorhandler(Exception)
 def handle_error(e):
     logger.error(f"Unhandled error: {str(e)}")
     if isinstance(e, HTTPException):
@@ -219,38 +564,105 @@ def handle_error(e):
         'message': 'Internal server error'
     }), 500
 
+def create_app(app_settings=None, start_background=True):
+    """Create the Flask app and the services behind it.
+
+    app_settings defaults to Settings() read from the environment. Missing
+    credentials are logged rather than fatal; features that need them fail
+    when first used. With start_background, the idle-meeting reaper and the
+    email outbox start and meetings orphaned by an earlier process are queued
+    for recovery. Raises ValueError or RuntimeError when the process cannot
+    serve settings.async_mode.
+    """
+    global settings, jobs, batch_jobs, meetings, segment_writer, transcript_emitter, summary_cache, outbox, state
+    global recognizer_pool
+    settings = app_settings or Settings()
+    # An unsupported mode, or gevent without the patched worker, stops startup here
+    configure_async_mode(settings.async_mode, settings.blocking_threads)
+    missing = settings.missing()
+    if missing:
+        logger.warning(f"Missing required environment variables: {', '.join(missing)}")
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = settings.secret_key or secrets.token_hex(32)
+    app.config['DATABASE_PATH'] = settings.database_path
+    app.config['MAX_CONTENT_LENGTH'] = settings.batch_max_upload_bytes
+    app.register_blueprint(bp)
+    # With a message queue, emits from any worker reach clients connected to every worker
+    socketio.init_app(
+        app, cors_allowed_origins="*", message_queue=settings.redis_url, async_mode=settings.async_mode
+    )
+    if settings.web_workers > 1 and not settings.redis_url:
+        logger.warning("WEB_WORKERS is above 1 without REDIS_URL; each worker only sees its own meetings and clients")
+    if settings.web_workers > 1 and not settings.secret_key:
+        logger.warning("WEB_WORKERS is above 1 without SECRET_KEY; meeting tokens only work on the worker that issued them")
+    # Meeting ownership and job status, shared between workers through Redis when configured
+    state = SharedState(
+        connect(settings.redis_url), PROCESS_OWNER,
+        job_ttl=settings.job_retention_seconds, owner_ttl=settings.meeting_owner_ttl_seconds
+    )
+
+    init_db(settings.database_path, settings)
+
+    # Background end-of-meeting processing
+    jobs = JobQueue(
+        max_workers=settings.job_max_workers,
+        retention_seconds=settings.job_retention_seconds,
+        on_complete=notify_job_complete
+    )
+    # Transcription of uploaded recordings, on its own pool so it cannot delay live meetings
+    batch_jobs = JobQueue(
+        max_workers=settings.batch_max_workers,
+        retention_seconds=settings.job_retention_seconds,
+        on_complete=notify_job_complete
+    )
+    # Active meetings, keyed by meeting id
+    meetings = MeetingRegistry(on_reap=reap_meeting, settings=settings)
+    # Live transcript persistence, shared by all meetings in this process
+    segment_writer = SegmentWriter(settings=settings) if settings.segment_persistence_enabled else None
+    transcript_emitter = TranscriptEmitter(
+        socketio,
+        window=settings.transcript_emit_window_seconds,
+        partial_interval=settings.transcript_partial_interval_seconds
+    )
+    # Generated summaries keyed by transcript content, so retries and recoveries skip the model
+    summary_cache = SummaryCache(
+        db_path=settings.database_path,
+        max_memory_entries=settings.summary_cache_memory_entries,
+        max_db_entries=settings.summary_cache_db_entries
+    ) if settings.summary_cache_enabled else None
+    # Summary emails are queued in the database and delivered in the background
+    outbox = OutboxSender(
+        db_path=settings.database_path,
+        batch_size=settings.outbox_batch_size,
+        poll_interval=settings.outbox_poll_seconds,
+        max_attempts=settings.outbox_max_attempts,
+        on_status=notify_email_status,
+        claim_timeout=settings.outbox_claim_timeout_seconds,
+        settings=settings
+    )
+
+    if start_background:
+        meetings.start_reaper()
+        outbox.start()
+        state.serve({
+            'end_meeting': handle_end_meeting_command,
+            'audio_frame': handle_audio_frame_command
+        })
+        recover_orphaned_meetings()
+        if recognizer_pool is not None:
+            recognizer_pool.stop()
+            recognizer_pool = None
+        # Browser meetings in the default format start on an already-connected recognizer
+        if settings.audio_source == 'browser' and settings.recognizer_pool_size > 0 and settings.azure_speech_key:
+            recognizer_pool = RecognizerPool(negotiate_audio_format(settings=settings), settings=settings)
+            recognizer_pool.start()
+    return app
+
 if __name__ == '__main__':
-    try:
-        init_db()
-        # Get port from environment variable (Azure App Service sets this)
-        port = int(os.getenv('PORT', 5000))
-        
-        # Always use Gunicorn in production
-        from gunicorn.app.base import BaseApplication
-
-        class SocketIOApplication(BaseApplication):
-            def __init__(self, app, options=None):
-                self.options = options or {}
-                self.application = app
-                super().__init__()
-
-            def load_config(self):
-                for key, value in self.options.items():
-                    self.cfg.set(key, value)
-
-            def load(self):
-                return self.application
-
-        options = {
-            'bind': f'0.0.0.0:{port}',
-            'workers': 1,
-            'threads': 8,
-            'timeout': 120,
-            'accesslog': '-',
-            'errorlog': '-',
-            'loglevel': 'info'
-        }
-        SocketIOApplication(app, options).run()
-    except Exception as e:
-        logger.error(f"Failed to start server: {str(e)}")
-        raise 
\ No newline at end of file
+    # Serve exactly as startup.sh does; exec'd so workers do not inherit modules imported before gevent patching
+    root = os.path.dirname(os.path.abspath(__file__))
+    os.execvp(sys.executable, [
+        sys.executable, '-m', 'gunicorn', '--chdir', root,
+        '--config', os.path.join(root, 'gunicorn.conf.py'), 'wsgi:app'
+    ])
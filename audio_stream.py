@@ -0,0 +1,239 @@
+import queue
+import threading
+import time
+import logging
+import azure.cognitiveservices.speech as speechsdk
+import config
+from metrics import AUDIO_FRAMES
+
+logger = logging.getLogger(__name__)
+
+PCM = 'pcm'
+OPUS = 'opus'
+
+BITS_PER_SAMPLE = 16
+CHANNELS = 1
+
+# Pause the client at this buffer fill and resume it once drained below RESUME_FILL
+PAUSE_FILL = 0.75
+RESUME_FILL = 0.25
+# How often the pump checks, while no frames arrive, whether the client can resume
+CHECK_INTERVAL = 0.5
+
+
+class AudioFormatError(ValueError):
+    """Raised for an audio format or frame the server cannot accept."""
+
+
+def negotiate_audio_format(requested=None, settings=None):
+    """Return the audio format the server will accept, closest to what the client requested.
+
+    requested may hold 'format' ('pcm' or 'opus'), 'sample_rate' and
+    'frame_ms'. PCM is 16-bit mono little-endian at one of the sample rates
+    in settings (config.settings by default); an unsupported rate falls back
+    to the first configured rate and frame_ms is clamped to the configured
+    range. Opus must be sent in an Ogg container. Raises AudioFormatError for
+    an unknown or disabled format.
+    """
+    settings = settings or config.settings
+    requested = requested or {}
+    audio_format = requested.get('format', PCM)
+    if audio_format not in (PCM, OPUS):
+        raise AudioFormatError(f"Unsupported audio format: {audio_format}")
+    if audio_format == OPUS and not settings.audio_opus_enabled:
+        raise AudioFormatError("Opus audio is not enabled on this server")
+
+    sample_rates = settings.audio_sample_rates
+    try:
+        frame_ms = int(requested.get('frame_ms', settings.audio_frame_ms))
+        sample_rate = int(requested.get('sample_rate', sample_rates[0]))
+    except (TypeError, ValueError):
+        raise AudioFormatError("frame_ms and sample_rate must be integers")
+    frame_ms = min(max(frame_ms, settings.audio_min_frame_ms), settings.audio_max_frame_ms)
+    if sample_rate not in sample_rates:
+        sample_rate = sample_rates[0]
+
+    if audio_format == PCM:
+        frame_bytes = sample_rate * frame_ms // 1000 * CHANNELS * BITS_PER_SAMPLE // 8
+    else:
+        frame_bytes = settings.audio_max_compressed_frame_bytes
+    return {
+        'format': audio_format,
+        'sample_rate': sample_rate,
+        'channels': CHANNELS,
+        'bits_per_sample': BITS_PER_SAMPLE,
+        'frame_ms': frame_ms,
+        'frame_bytes': frame_bytes,
+        'max_buffered_frames': max(settings.audio_buffer_ms // frame_ms, 1),
+        'max_unrecognized_ms': settings.audio_max_unrecognized_ms
+    }
+
+
+def stream_format(audio_format):
+    """Return the Speech SDK AudioStreamFormat for a negotiated audio format."""
+    if audio_format['format'] == OPUS:
+        return speechsdk.audio.AudioStreamFormat(
+            compressed_stream_format=speechsdk.AudioStreamContainerFormat.OGG_OPUS
+        )
+    return speechsdk.audio.AudioStreamFormat(
+        samples_per_second=audio_format['sample_rate'],
+        bits_per_sample=audio_format['bits_per_sample'],
+        channels=audio_format['channels']
+    )
+
+
+def stream_key(audio_format):
+    """Return what identifies the push stream format of a negotiated audio format."""
+    return (audio_format['format'], audio_format['sample_rate'], audio_format['channels'],
+            audio_format['bits_per_sample'])
+
+
+class AudioStream:
+    """Feeds client audio frames into a Speech SDK PushAudioInputStream.
+
+    Socket handlers call write(), which only enqueues into a buffer of
+    max_buffered_frames; a pump thread writes frames into the push stream.
+    The push stream buffers whatever it is given, so the recognizer reports
+    how far it got with recognized_until(), and the audio pushed beyond that
+    is what it has yet to recognize. When the buffer passes PAUSE_FILL, or
+    the recognizer falls max_unrecognized_ms behind, on_backpressure(True,
+    depth) asks the client to pause; on_backpressure(False, depth) lets it
+    resume once both drain below RESUME_FILL. A recognizer that has reported
+    nothing for max_unrecognized_ms is taken to be hearing silence rather than
+    falling behind, so it never keeps the client paused. Frames arriving at a
+    full buffer are dropped. push_stream, e.g. one a pooled recognizer already
+    reads from, must match audio_format; by default a new one is created.
+    """
+
+    def __init__(self, audio_format, on_backpressure=None, push_stream=None, clock=time.monotonic):
+        self.format = audio_format
+        self.on_backpressure = on_backpressure
+        self.push_stream = push_stream or speechsdk.audio.PushAudioInputStream(
+            stream_format=stream_format(audio_format)
+        )
+        self.max_buffered_frames = audio_format['max_buffered_frames']
+        self.max_unrecognized_ms = audio_format['max_unrecognized_ms']
+        self.clock = clock
+        self._queue = queue.Queue(maxsize=self.max_buffered_frames)
+        self._paused = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self.frames_dropped = 0
+        self.pushed_ms = 0
+        self.recognized_ms = 0
+        self._progress_at = None
+
+    def audio_config(self):
+        """Return an AudioConfig that reads from this stream."""
+        return speechsdk.audio.AudioConfig(stream=self.push_stream)
+
+    def start(self):
+        """Start the pump thread."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='audio-pump', daemon=True)
+            self._thread.start()
+
+    def write(self, frame):
+        """Queue one audio frame; returns False if it was dropped. Never blocks.
+
+        Raises AudioFormatError for a frame that does not fit the negotiated format.
+        """
+        if not isinstance(frame, (bytes, bytearray)):
+            raise AudioFormatError("Audio frames must be binary")
+        if len(frame) > self.format['frame_bytes']:
+            raise AudioFormatError(f"Audio frame of {len(frame)} bytes exceeds {self.format['frame_bytes']}")
+        if self.format['format'] == PCM and len(frame) % (self.format['bits_per_sample'] // 8):
+            raise AudioFormatError("PCM frames must hold whole samples")
+        if self._closed:
+            return False
+
+        try:
+            self._queue.put_nowait(bytes(frame))
+        except queue.Full:
+            self.frames_dropped += 1
+            AUDIO_FRAMES.inc(result='dropped')
+            self._signal(True)
+            return False
+        AUDIO_FRAMES.inc(result='accepted')
+        self._update()
+        return True
+
+    def recognized_until(self, offset):
+        """Record that the recognizer has reported on the audio up to offset, in 100 ns ticks."""
+        recognized_ms = int(offset) // 10000
+        with self._lock:
+            if recognized_ms <= self.recognized_ms:
+                return
+            self.recognized_ms = recognized_ms
+            self._progress_at = self.clock()
+        self._update()
+
+    def unrecognized_ms(self):
+        """Milliseconds of audio pushed that the recognizer has not reported on yet."""
+        return max(self.pushed_ms - self.recognized_ms, 0)
+
+    def close(self, timeout=5):
+        """Write out buffered frames and close the push stream, ending recognition input."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread:
+            self._queue.put(None)
+            thread.join(timeout)
+        self.push_stream.close()
+
+    def buffered_frames(self):
+        return self._queue.qsize()
+
+    def _frame_ms(self, frame):
+        if self.format['format'] == PCM:
+            return len(frame) * 1000 / (self.format['sample_rate'] * self.format['channels']
+                                        * self.format['bits_per_sample'] // 8)
+        return self.format['frame_ms']
+
+    def _recognizer_active(self):
+        return self._progress_at is not None and \
+            self.clock() - self._progress_at < self.max_unrecognized_ms / 1000
+
+    def _update(self):
+        depth = self._queue.qsize()
+        unrecognized = self.unrecognized_ms()
+        active = self._recognizer_active()
+        if depth >= self.max_buffered_frames * PAUSE_FILL or \
+                (active and unrecognized >= self.max_unrecognized_ms):
+            self._signal(True)
+        elif self._paused and depth <= self.max_buffered_frames * RESUME_FILL and \
+                (not active or unrecognized <= self.max_unrecognized_ms * RESUME_FILL):
+            self._signal(False)
+
+    def _signal(self, paused):
+        with self._lock:
+            if paused == self._paused:
+                return
+            self._paused = paused
+        if self.on_backpressure:
+            try:
+                self.on_backpressure(paused, self._queue.qsize())
+            except Exception as e:
+                logger.error(f"Error signalling audio backpressure: {str(e)}")
+
+    def _run(self):
+        while True:
+            try:
+                frame = self._queue.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                self._update()
+                continue
+            if frame is None:
+                return
+            try:
+                self.push_stream.write(frame)
+                self.pushed_ms += self._frame_ms(frame)
+            except Exception as e:
+                logger.error(f"Error writing audio frame: {str(e)}")
+            self._update()
@@ -0,0 +1,321 @@
+import os
+import sys
+import abc
+import time
+import wave
+import array
+import argparse
+import threading
+import logging
+import azure.cognitiveservices.speech as speechsdk
+import config
+from database import init_db, save_meeting
+from jobs import JobQueue, SUCCEEDED
+from transcriber import MeetingTranscriber, get_speech_config
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.wav', '.flac')
+
+# Speech SDK offsets and durations are in 100-nanosecond ticks
+TICKS_PER_SECOND = 10 ** 7
+
+
+class UnsupportedAudioFile(ValueError):
+    """Raised for an audio file batch transcription cannot read."""
+
+
+class AudioFileReader(speechsdk.audio.PullAudioInputStreamCallback, metaclass=abc.ABCMeta):
+    """Pull-stream callback that hands the recognizer an audio file one chunk at a time.
+
+    The recognizer asks for the next chunk only when it is ready for it, so a
+    file is never held in memory in full. on_progress(fraction) is called as
+    the file is consumed, at most every progress_interval seconds
+    (batch_progress_interval_seconds of config.settings by default).
+    """
+
+    def __init__(self, path, on_progress=None, progress_interval=None):
+        super().__init__()
+        self.path = path
+        self.on_progress = on_progress
+        if progress_interval is None:
+            progress_interval = config.settings.batch_progress_interval_seconds
+        self.progress_interval = progress_interval
+        self._last_progress = 0.0
+
+    @abc.abstractmethod
+    def stream_format(self):
+        """Return the AudioStreamFormat of the data read()."""
+
+    @abc.abstractmethod
+    def duration_seconds(self):
+        """Return the length of the recording in seconds, or None when it is not known up front."""
+
+    @abc.abstractmethod
+    def progress(self):
+        """Return the fraction of the file read so far."""
+
+    @abc.abstractmethod
+    def _read_chunk(self, size):
+        """Return up to size bytes of audio; empty at the end of the file."""
+
+    @abc.abstractmethod
+    def close(self):
+        pass
+
+    def read(self, buffer):
+        data = self._read_chunk(len(buffer))
+        buffer[:len(data)] = data
+        now = time.monotonic()
+        if self.on_progress and (not data or now - self._last_progress >= self.progress_interval):
+            self._last_progress = now
+            try:
+                self.on_progress(self.progress())
+            except Exception as e:
+                logger.error(f"Error reporting progress for {self.path}: {str(e)}")
+        return len(data)
+
+
+class WavFileReader(AudioFileReader):
+    """Reads 16-bit PCM WAV files; only the first channel of multi-channel audio is used."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        try:
+            self._wav = wave.open(path, 'rb')
+        except (wave.Error, EOFError) as e:
+            raise UnsupportedAudioFile(f"Cannot read WAV file {path}: {str(e)}")
+        if self._wav.getsampwidth() != 2:
+            self._wav.close()
+            raise UnsupportedAudioFile(f"{path} is not 16-bit PCM")
+        self.channels = self._wav.getnchannels()
+        self.sample_rate = self._wav.getframerate()
+        self.total_frames = self._wav.getnframes()
+
+    def stream_format(self):
+        return speechsdk.audio.AudioStreamFormat(
+            samples_per_second=self.sample_rate, bits_per_sample=16, channels=1
+        )
+
+    def duration_seconds(self):
+        return self.total_frames / self.sample_rate
+
+    def progress(self):
+        return self._wav.tell() / self.total_frames if self.total_frames else 1.0
+
+    def _read_chunk(self, size):
+        data = self._wav.readframes(size // 2)
+        if self.channels > 1:
+            data = array.array('h', data)[::self.channels].tobytes()
+        return data
+
+    def close(self):
+        self._wav.close()
+
+
+class FlacFileReader(AudioFileReader):
+    """Passes FLAC files through to the SDK, which decodes them with GStreamer."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+
+    def stream_format(self):
+        return speechsdk.audio.AudioStreamFormat(
+            compressed_stream_format=speechsdk.AudioStreamContainerFormat.FLAC
+        )
+
+    def duration_seconds(self):
+        return None
+
+    def progress(self):
+        return self._file.tell() / self.size if self.size else 1.0
+
+    def _read_chunk(self, size):
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+def open_audio_file(path, **kwargs):
+    """Return a reader for a WAV or FLAC file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.wav':
+        return WavFileReader(path, **kwargs)
+    if extension == '.flac':
+        return FlacFileReader(path, **kwargs)
+    raise UnsupportedAudioFile(f"Unsupported audio file type: {extension or path}")
+
+
+def format_offset(ticks):
+    """Format an SDK offset as HH:MM:SS from the start of the recording."""
+    seconds = int(ticks // TICKS_PER_SECOND)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def format_segments(segments):
+    """Format (offset, duration, text) results as transcript lines with speakers.
+
+    Uses the same heuristic as live meetings: a pause of more than two seconds
+    moves on to the next of four speakers.
+    """
+    lines = []
+    speaker_count = 0
+    previous_end = None
+    for offset, duration, text in segments:
+        if previous_end is not None and offset - previous_end > 2 * TICKS_PER_SECOND:
+            speaker_count = (speaker_count + 1) % 4
+        previous_end = offset + duration
+        lines.append(f"[{format_offset(offset)}] Speaker {speaker_count + 1}: {text}")
+    return "\n".join(lines)
+
+
+def recognition_timeout(reader, settings=None):
+    """Return how long recognition of reader's file may take before it is given up."""
+    settings = settings or config.settings
+    duration = reader.duration_seconds()
+    if duration is None:
+        return settings.batch_recognition_timeout_seconds
+    return duration + settings.batch_recognition_slack_seconds
+
+
+def recognize_file(reader, timeout=None, settings=None):
+    """Run continuous recognition over a reader until the file ends; returns the transcript.
+
+    The speech config is built from settings (config.settings by default).
+    Raises TimeoutError when the recognizer has not finished within timeout
+    seconds, recognition_timeout(reader) by default, so a stuck session
+    cannot hold a batch worker forever.
+    """
+    if timeout is None:
+        timeout = recognition_timeout(reader, settings)
+    stream = speechsdk.audio.PullAudioInputStream(reader, reader.stream_format())
+    recognizer = speechsdk.SpeechRecognizer(
+        speech_config=get_speech_config(settings),
+        audio_config=speechsdk.audio.AudioConfig(stream=stream)
+    )
+    segments = []
+    errors = []
+    done = threading.Event()
+
+    def handle_recognized(evt):
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+            segments.append((evt.result.offset, evt.result.duration, evt.result.text))
+
+    def handle_canceled(evt):
+        if evt.cancellation_details.reason == speechsdk.CancellationReason.Error:
+            errors.append(evt.cancellation_details.error_details)
+        done.set()
+
+    recognizer.recognized.connect(handle_recognized)
+    recognizer.canceled.connect(handle_canceled)
+    recognizer.session_stopped.connect(lambda evt: done.set())
+
+    recognizer.start_continuous_recognition()
+    try:
+        finished = done.wait(timeout)
+    finally:
+        recognizer.stop_continuous_recognition()
+    if not finished:
+        raise TimeoutError(f"Recognition of {reader.path} did not finish within {timeout:.0f}s")
+    if errors:
+        raise RuntimeError(f"Recognition failed: {errors[0]}")
+    segments.sort()
+    return format_segments(segments)
+
+
+def transcribe_file(job, path, filename=None, db_path=None, summary_cache=None,
+                    on_progress=None, delete_after=False, settings=None):
+    """Job function: transcribe an audio file, summarize it and save it as a meeting.
+
+    on_progress(job, filename) is called as the job's stage and progress
+    change. Recognition and the summary use settings (config.settings by
+    default), and the meeting is saved to db_path, the settings' database_path
+    by default. Returns the saved meeting id, summary and transcript length.
+    """
+    settings = settings or config.settings
+    db_path = db_path or settings.database_path
+    filename = filename or os.path.basename(path)
+
+    def report(progress=None):
+        job.set_progress(progress)
+        if on_progress:
+            on_progress(job, filename)
+
+    try:
+        job.set_stage('transcribing')
+        report(0.0)
+        reader = open_audio_file(path, on_progress=report, progress_interval=settings.batch_progress_interval_seconds)
+        try:
+            transcript = recognize_file(reader, settings=settings)
+            duration = reader.duration_seconds()
+        finally:
+            reader.close()
+        if not transcript:
+            raise RuntimeError(f"No speech recognized in {filename}")
+
+        job.set_stage('summarizing')
+        report()
+        try:
+            summary = MeetingTranscriber(summary_cache=summary_cache, settings=settings).generate_summary(transcript)
+        except Exception:
+            # Keep the transcript; the upload is gone once this job ends
+            save_meeting(transcript, '', db_path)
+            raise
+
+        job.set_stage('saving')
+        report()
+        db_meeting_id = save_meeting(transcript, summary, db_path)
+        return {
+            'filename': filename,
+            'db_meeting_id': db_meeting_id,
+            'summary': summary,
+            'duration_seconds': duration,
+            'transcript_characters': len(transcript)
+        }
+    finally:
+        if delete_after:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove {path}: {str(e)}")
+
+
+def main(argv=None):
+    settings = config.settings
+    parser = argparse.ArgumentParser(description="Transcribe and summarize recorded meetings.")
+    parser.add_argument('files', nargs='+', help="WAV or FLAC files to transcribe")
+    parser.add_argument('--workers', type=int, default=settings.batch_max_workers,
+                        help=f"number of files transcribed in parallel (default {settings.batch_max_workers})")
+    parser.add_argument('--db', default=settings.database_path, help=f"database path (default {settings.database_path})")
+    args = parser.parse_args(argv)
+
+    def print_progress(job, filename):
+        progress = f" {job.progress:.0%}" if job.progress is not None else ""
+        print(f"{filename}: {job.stage}{progress}")
+
+    init_db(args.db, settings)
+    queue = JobQueue(max_workers=args.workers, retention_seconds=settings.job_retention_seconds)
+    start = time.perf_counter()
+    submitted = [
+        queue.submit('batch_transcription', transcribe_file, path, db_path=args.db,
+                     on_progress=print_progress, settings=settings)
+        for path in args.files
+    ]
+    failed = 0
+    for path, job in zip(args.files, submitted):
+        queue.wait(job.id)
+        if job.status == SUCCEEDED:
+            print(f"{path}: saved as meeting {job.result['db_meeting_id']}")
+        else:
+            failed += 1
+            print(f"{path}: failed: {job.error}", file=sys.stderr)
+    queue.shutdown()
+    print(f"Transcribed {len(submitted) - failed} of {len(submitted)} files in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Compare two benchmark reports, e.g. from the commits before and after a change.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(report, prefix=''):
+    """Return the numeric values of a report keyed by dotted path."""
+    values = {}
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = value
+    return values
+
+
+def compare(before, after):
+    """Return (metric, before, after, relative change) rows for the metrics both reports measured."""
+    rows = []
+    old, new = flatten(before), flatten(after)
+    for path in old:
+        if path in new and not path.startswith(('parameters.', 'version')):
+            change = (new[path] - old[path]) / old[path] if old[path] else None
+            rows.append((path, old[path], new[path], change))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports.")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    if before.get('parameters') != after.get('parameters'):
+        print("Warning: the reports were run with different parameters", file=sys.stderr)
+
+    print(f"{'metric':48} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12} {'change':>8}")
+    for path, old, new, change in compare(before, after):
+        change = f"{change:+.1%}" if change is not None else ''
+        print(f"{path:48} {old:>12} {new:>12} {change:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
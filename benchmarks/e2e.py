@@ -0,0 +1,279 @@
+"""End-to-end load test of the meeting assistant against local stand-ins.
+
+Runs the app in-process with a fake speech recognizer, a local OpenAI stub and
+an SMTP sink, then drives N concurrent meetings through /start_meeting, the
+live transcript stream, /end_meeting and /send_email while M Socket.IO clients
+listen. Prints a JSON report; save reports from two commits and compare them
+with benchmarks.compare.
+
+    python -m benchmarks.e2e --meetings 10 --clients 5 --duration 30 --output before.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from unittest.mock import patch
+import requests
+import socketio as socketio_client
+from benchmarks.stubs import FakeConnection, FakeRecognizerFactory, OpenAIStub, SMTPSink
+from metrics import percentiles
+
+REPORT_VERSION = 1
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Collector:
+    """Event bookkeeping shared by the Socket.IO clients."""
+
+    def __init__(self, sent):
+        self.sent = sent
+        self.transcript_latency = []
+        self.partials = 0
+        self.job_events = {}
+        self.email_events = {}
+        self._lock = threading.Lock()
+
+    def waiter(self, events, key):
+        with self._lock:
+            return events.setdefault(key, {'event': threading.Event()})
+
+    def on_transcript_batch(self, data):
+        now = time.perf_counter()
+        latencies = [now - self.sent[entry['text']] for entry in data['entries'] if entry['text'] in self.sent]
+        with self._lock:
+            self.transcript_latency.extend(latencies)
+
+    def on_partial(self, data):
+        with self._lock:
+            self.partials += 1
+
+    def on_job_complete(self, data):
+        waiter = self.waiter(self.job_events, data['job_id'])
+        waiter.update(data=data, received=time.perf_counter())
+        waiter['event'].set()
+
+    def on_email_status(self, data):
+        if data['status'] == 'queued':
+            return
+        waiter = self.waiter(self.email_events, data['message_id'])
+        waiter.update(data=data, received=time.perf_counter())
+        waiter['event'].set()
+
+
+def connect_clients(url, count, collector):
+    clients = []
+    for i in range(count):
+        client = socketio_client.Client(reconnection=False)
+        client.on('transcript_batch', collector.on_transcript_batch)
+        client.on('transcript_partial', collector.on_partial)
+        if i == 0:
+            # One listener is enough to time job and email completion
+            client.on('job_complete', collector.on_job_complete)
+            client.on('email_status', collector.on_email_status)
+        client.connect(url, wait_timeout=10)
+        clients.append(client)
+    return clients
+
+
+def run_meeting(url, args, clients, collector, timings, errors):
+    session = requests.Session()
+
+    def post(name, path, payload):
+        start = time.perf_counter()
+        response = session.post(url + path, json=payload, timeout=args.timeout)
+        timings[name].append(time.perf_counter() - start)
+        data = response.json()
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path} returned {response.status_code}: {data.get('message')}")
+        return data, start
+
+    try:
+        data, _ = post('start_meeting', '/start_meeting', {'audio': {'format': 'pcm'}})
+        meeting_id = data['meeting_id']
+        # Every client follows every meeting, so fan-out matches a global broadcast
+        for client in clients:
+            client.call('join_meeting', {'meeting_id': meeting_id, 'token': data['token']}, timeout=args.timeout)
+        time.sleep(args.duration)
+
+        token = data['token']
+        data, ended_at = post('end_meeting', '/end_meeting', {'meeting_id': meeting_id})
+        waiter = collector.waiter(collector.job_events, data['job_id'])
+        if not waiter['event'].wait(args.timeout):
+            raise RuntimeError(f"Meeting {meeting_id} was not summarized within {args.timeout}s")
+        timings['end_to_summary'].append(waiter['received'] - ended_at)
+        if waiter['data']['status'] != 'succeeded':
+            raise RuntimeError(f"Meeting {meeting_id} failed: {waiter['data'].get('error')}")
+
+        summary = waiter['data']['result']['summary']
+        data, queued_at = post('send_email', '/send_email', {
+            'participants': ['bench@example.com'], 'summary': summary, 'meeting_id': meeting_id, 'token': token
+        })
+        waiter = collector.waiter(collector.email_events, data['message_id'])
+        if not waiter['event'].wait(args.timeout):
+            raise RuntimeError(f"Email {data['message_id']} was not delivered within {args.timeout}s")
+        timings['email_delivery'].append(waiter['received'] - queued_at)
+        if waiter['data']['status'] != 'sent':
+            raise RuntimeError(f"Email {data['message_id']} failed: {waiter['data'].get('error')}")
+    except Exception as e:
+        errors.append(str(e))
+
+
+def run(args):
+    openai_stub = OpenAIStub(latency=args.openai_latency, chunk_delay=args.openai_chunk_delay)
+    smtp_sink = SMTPSink()
+    openai_stub.start()
+    smtp_sink.start()
+    work_dir = tempfile.mkdtemp(prefix='meeting-bench-')
+
+    # Must be set before the app and its config are imported
+    os.environ.update({
+        'AZURE_SPEECH_KEY': 'benchmark',
+        'AZURE_SPEECH_REGION': 'local',
+        'AZURE_OPENAI_API_KEY': 'benchmark',
+        'AZURE_OPENAI_ENDPOINT': openai_stub.endpoint,
+        'EMAIL_USER': 'bench@example.com',
+        'EMAIL_PASSWORD': 'benchmark',
+        'EMAIL_SMTP_SERVER': smtp_sink.host,
+        'EMAIL_SMTP_PORT': str(smtp_sink.port),
+        'SMTP_STARTTLS': 'false',
+        'DATABASE_PATH': os.path.join(work_dir, 'benchmark.db'),
+        'MAX_CONCURRENT_MEETINGS': str(args.meetings),
+        'AUDIO_SOURCE': 'browser'
+    })
+    import azure.cognitiveservices.speech as speechsdk
+    from app import create_app, socketio
+    logging.disable(logging.WARNING)
+
+    recognizers = FakeRecognizerFactory(args.segment_rate, args.partials, args.seed)
+    collector = Collector(recognizers.sent)
+    timings = {name: [] for name in ('start_meeting', 'end_meeting', 'end_to_summary', 'send_email', 'email_delivery')}
+    errors = []
+
+    tracemalloc.start()
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    with patch.object(speechsdk, 'SpeechRecognizer', recognizers), \
+            patch.object(speechsdk, 'Connection', FakeConnection), \
+            open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        app = create_app()
+        threading.Thread(
+            target=socketio.run, args=(app,),
+            kwargs={'host': '127.0.0.1', 'port': port, 'allow_unsafe_werkzeug': True, 'log_output': False},
+            name='benchmark-server', daemon=True
+        ).start()
+        for _ in range(100):
+            with contextlib.suppress(requests.ConnectionError):
+                requests.get(url + '/metrics', timeout=1)
+                break
+            time.sleep(0.05)
+
+        clients = connect_clients(url, args.clients, collector)
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=run_meeting, args=(url, args, clients, collector, timings, errors))
+            for _ in range(args.meetings)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            client.disconnect()
+
+    heap_current, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    openai_stub.stop()
+    smtp_sink.stop()
+
+    completed = len(timings['email_delivery'])
+    return {
+        'version': REPORT_VERSION,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'parameters': {
+            'meetings': args.meetings,
+            'clients': args.clients,
+            'duration': args.duration,
+            'segment_rate': args.segment_rate,
+            'partials': args.partials,
+            'openai_latency': args.openai_latency,
+            'openai_chunk_delay': args.openai_chunk_delay,
+            'seed': args.seed
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput': {
+            'meetings_per_second': round(completed / elapsed, 3),
+            'segments_recognized': len(recognizers.sent),
+            'transcript_deliveries_per_second': round(len(collector.transcript_latency) / elapsed, 3),
+            'partials_delivered': collector.partials,
+            'openai_requests': openai_stub.requests,
+            'emails_delivered': smtp_sink.messages
+        },
+        'latency_ms': dict(
+            {name: percentiles(samples) for name, samples in timings.items()},
+            transcript_delivery=percentiles(collector.transcript_latency)
+        ),
+        'memory': {
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1),
+            'python_heap_peak_mb': round(heap_peak / 2 ** 20, 1),
+            'python_heap_end_mb': round(heap_current / 2 ** 20, 1)
+        },
+        'errors': errors
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end load test with local Azure and SMTP stand-ins.")
+    parser.add_argument('--meetings', type=int, default=10, help="concurrent meetings (default 10)")
+    parser.add_argument('--clients', type=int, default=5, help="listening Socket.IO clients (default 5)")
+    parser.add_argument('--duration', type=float, default=10, help="seconds each meeting records (default 10)")
+    parser.add_argument('--segment-rate', type=float, default=2,
+                        help="recognized segments per second per meeting (default 2)")
+    parser.add_argument('--partials', type=int, default=2, help="interim results before each segment (default 2)")
+    parser.add_argument('--openai-latency', type=float, default=0.5,
+                        help="seconds before the OpenAI stub answers (default 0.5)")
+    parser.add_argument('--openai-chunk-delay', type=float, default=0.01,
+                        help="seconds between streamed OpenAI chunks (default 0.01)")
+    parser.add_argument('--timeout', type=float, default=120, help="per-step timeout in seconds (default 120)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the scripted transcript (default 0)")
+    parser.add_argument('--output', help="write the JSON report to this file as well as stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""Local stand-ins for Azure Speech, Azure OpenAI, SMTP and Redis used by the benchmarks and tests."""
+import itertools
+import json
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import azure.cognitiveservices.speech as speechsdk
+
+PHRASES = (
+    "Let's go over the numbers from last week.",
+    "I can take the follow-up with the vendor.",
+    "The release is blocked on the database migration.",
+    "Can we move the review to Thursday afternoon?",
+    "We should add monitoring before the launch.",
+    "I'll send the updated design document tonight.",
+    "The customer asked for a demo next month.",
+    "Let's keep the scope small for the first version."
+)
+
+SUMMARY_TEXT = (
+    "Summary: the team reviewed progress, agreed on the release plan and discussed open risks.\n"
+    "Speaker 1's Action Items:\n- Follow up with the vendor\n"
+    "General Action Items:\n- Add monitoring before launch"
+)
+
+_segment_ids = itertools.count()
+
+
+class _Signal:
+    """Minimal stand-in for the SDK's EventSignal."""
+
+    def __init__(self):
+        self._handlers = []
+
+    def connect(self, handler):
+        self._handlers.append(handler)
+
+    def fire(self, evt):
+        for handler in self._handlers:
+            handler(evt)
+
+
+class FakeRecognizerFactory:
+    """Builds fake SpeechRecognizers that emit scripted results at a fixed rate.
+
+    Use an instance in place of speechsdk.SpeechRecognizer. Every recognizer
+    emits segments_per_second 'recognized' results, each preceded by
+    partials 'recognizing' results. Result texts are unique, and the time each
+    was emitted is kept in sent so clients can measure delivery latency.
+    """
+
+    def __init__(self, segments_per_second=2.0, partials=2, seed=0):
+        self.segments_per_second = segments_per_second
+        self.partials = partials
+        self.random = random.Random(seed)
+        self.sent = {}
+
+    def __call__(self, speech_config=None, audio_config=None):
+        return FakeRecognizer(self)
+
+    def next_text(self):
+        return f"{self.random.choice(PHRASES)} ({next(_segment_ids)})"
+
+
+class FakeRecognizer:
+    def __init__(self, factory):
+        self.factory = factory
+        self.recognized = _Signal()
+        self.recognizing = _Signal()
+        self.canceled = _Signal()
+        self.session_started = _Signal()
+        self.session_stopped = _Signal()
+        self.session_id = f"bench-{next(_segment_ids)}"
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start_continuous_recognition(self):
+        self.session_started.fire(SimpleNamespace(session_id=self.session_id))
+        self._thread = threading.Thread(target=self._run, name='fake-recognizer', daemon=True)
+        self._thread.start()
+
+    def stop_continuous_recognition(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self.session_stopped.fire(SimpleNamespace(session_id=self.session_id))
+
+    def _run(self):
+        # Partials are spread over the segment, as if the speaker were still talking
+        interval = 1.0 / self.factory.segments_per_second
+        step = interval / (self.factory.partials + 1)
+        offset = 0
+        while True:
+            text = self.factory.next_text()
+            words = text.split()
+            for i in range(1, self.factory.partials + 1):
+                if self._stop_event.wait(step):
+                    return
+                partial = " ".join(words[:max(1, len(words) * i // (self.factory.partials + 1))])
+                self.recognizing.fire(self._event(speechsdk.ResultReason.RecognizingSpeech, partial, offset))
+            if self._stop_event.wait(step):
+                return
+            self.factory.sent[text] = time.perf_counter()
+            self.recognized.fire(self._event(speechsdk.ResultReason.RecognizedSpeech, text, offset))
+            offset += int(interval * 10 ** 7)
+
+    def _event(self, reason, text, offset):
+        result = SimpleNamespace(reason=reason, text=text, offset=offset, duration=10 ** 7)
+        return SimpleNamespace(result=result, session_id=self.session_id)
+
+
+class FakeConnection:
+    """Stand-in for speechsdk.Connection that connects as soon as it is opened."""
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.connected = _Signal()
+        self.disconnected = _Signal()
+
+    @classmethod
+    def from_recognizer(cls, recognizer):
+        return cls(recognizer)
+
+    def open(self, for_continuous_recognition):
+        self.connected.fire(SimpleNamespace(session_id=self.recognizer.session_id))
+
+    def close(self):
+        self.disconnected.fire(SimpleNamespace(session_id=self.recognizer.session_id))
+
+
+class OpenAIStub:
+    """OpenAI-compatible chat completions endpoint served from a local thread.
+
+    Answers every request after latency seconds, streaming the reply in
+    chunks chunk_delay seconds apart when the request asks for a stream.
+    """
+
+    def __init__(self, latency=0.5, chunk_delay=0.01, host='127.0.0.1'):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections open between requests, as the service does
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                stub.requests += 1
+                time.sleep(stub.latency)
+                if body.get('stream'):
+                    self._stream()
+                else:
+                    self._complete(body)
+
+            def _complete(self, body):
+                prompt_tokens = sum(len(m.get('content', '')) // 4 for m in body.get('messages', []))
+                payload = json.dumps({
+                    'id': 'chatcmpl-bench',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': 'benchmark',
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': SUMMARY_TEXT},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': len(SUMMARY_TEXT) // 4,
+                        'total_tokens': prompt_tokens + len(SUMMARY_TEXT) // 4
+                    }
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                # The stream has no length, so it ends with the connection
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                for word in SUMMARY_TEXT.split(' '):
+                    chunk = {
+                        'id': 'chatcmpl-bench',
+                        'object': 'chat.completion.chunk',
+                        'created': int(time.time()),
+                        'model': 'benchmark',
+                        'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(stub.chunk_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, 0), Handler)
+        self.server.daemon_threads = True
+        self.endpoint = f"http://{host}:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='openai-stub', daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SMTPSink:
+    """Plaintext SMTP server that accepts any login and discards every message.
+
+    It offers no STARTTLS, so run the app with SMTP_STARTTLS=false.
+    """
+
+    def __init__(self, host='127.0.0.1'):
+        self.messages = 0
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                self.reply("220 localhost benchmark SMTP sink")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode(errors='replace').strip().upper()
+                    if command.startswith(('EHLO', 'HELO')):
+                        self.reply("250-localhost")
+                        self.reply("250 AUTH PLAIN LOGIN")
+                    elif command.startswith('AUTH'):
+                        self.reply("235 Authentication successful")
+                    elif command == 'DATA':
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                            pass
+                        sink.messages += 1
+                        self.reply("250 OK")
+                    elif command == 'QUIT':
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        # MAIL, RCPT, RSET and NOOP
+                        self.reply("250 OK")
+
+        self.server = socketserver.ThreadingTCPServer((host, 0), Handler)
+        self.server.daemon_threads = True
+        self.host = host
+        self.port = self.server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='smtp-sink', daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RedisStub:
+    """Redis server speaking RESP2 or RESP3 for the commands SharedState uses, backed by a LocalRedis.
+
+    Commands it does not know, such as CLIENT SETINFO, get an error reply,
+    which redis-py ignores.
+    """
+
+    def __init__(self, host='127.0.0.1'):
+        # Imported here, since the benchmark sets the environment config reads after importing this module
+        from shared_state import LocalRedis
+        self.store = LocalRedis()
+        self.commands = 0
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def read_command(self):
+                line = self.rfile.readline()
+                if not line.startswith(b'*'):
+                    return None
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2].decode())
+                return args
+
+            def encode(self, value):
+                if value is None:
+                    return b"_\r\n" if self.protocol == 3 else b"$-1\r\n"
+                if value is True:
+                    return b"+OK\r\n"
+                if isinstance(value, int):
+                    return f":{value}\r\n".encode()
+                if isinstance(value, tuple):
+                    return f"*{len(value)}\r\n".encode() + b"".join(self.encode(item) for item in value)
+                data = str(value).encode()
+                return f"${len(data)}\r\n".encode() + data + b"\r\n"
+
+            def handle(self):
+                self.protocol = 2
+                while True:
+                    args = self.read_command()
+                    if not args:
+                        return
+                    stub.commands += 1
+                    name, args = args[0].upper(), args[1:]
+                    if name == 'PING':
+                        reply = b"+PONG\r\n"
+                    elif name == 'HELLO':
+                        # Only nulls differ between RESP2 and RESP3 in the replies sent here
+                        self.protocol = int(args[0]) if args else 2
+                        reply = f"%1\r\n+proto\r\n:{self.protocol}\r\n".encode() if self.protocol == 3 \
+                            else f"*2\r\n+proto\r\n:{self.protocol}\r\n".encode()
+                    elif name == 'SET':
+                        options = [arg.upper() for arg in args[2:]]
+                        ex = int(args[2 + options.index('EX') + 1]) if 'EX' in options else None
+                        reply = self.encode(stub.store.set(args[0], args[1], ex=ex, nx='NX' in options))
+                    elif name == 'GET':
+                        reply = self.encode(stub.store.get(args[0]))
+                    elif name == 'DEL':
+                        reply = self.encode(stub.store.delete(*args))
+                    elif name == 'EXPIRE':
+                        reply = self.encode(int(stub.store.expire(args[0], int(args[1]))))
+                    elif name == 'RPUSH':
+                        reply = self.encode(stub.store.rpush(args[0], *args[1:]))
+                    elif name == 'BLPOP':
+                        reply = self.encode(stub.store.blpop(args[:-1], float(args[-1])))
+                    else:
+                        reply = f"-ERR unknown command '{name}'\r\n".encode()
+                    self.wfile.write(reply)
+
+        self.server = socketserver.ThreadingTCPServer((host, 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"redis://{host}:{self.server.server_address[1]}/0"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='redis-stub', daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
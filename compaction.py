@@ -0,0 +1,202 @@
+import re
+import logging
+import threading
+from dataclasses import dataclass
+import config
+from metrics import SUMMARY_PROMPT_TOKENS
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# "[HH:MM:SS] Speaker N: text", as written by live and batch transcription
+TURN_PATTERN = re.compile(r'^\[(?P<time>[^\]]*)\]\s*(?P<speaker>[^:]+):\s*(?P<text>.*)$')
+
+# Spoken hesitations the summary does not need, with the punctuation that follows them
+FILLER_PATTERN = re.compile(r'\b(?:uh-huh|u+m+|u+h+|e+r+m*|a+h+|h+m+|m+h*m+)\b[,.]?\s*', re.IGNORECASE)
+# Repeated words only; numbers such as "555 555 1234" or "4 4 units" are kept as spoken
+STUTTER_PATTERN = re.compile(r'\b([^\W\d_]+)(?:[,\s]+\1\b)+', re.IGNORECASE)
+# Words that are correctly doubled in speech ("we had had enough", "that that is")
+DOUBLED_WORDS = {'had', 'that', 'is', 'very', 'so', 'bye'}
+
+# Turns made only of these words are acknowledgements, dropped first when over budget
+BACKCHANNELS = {'yeah', 'yes', 'yep', 'ok', 'okay', 'right', 'sure', 'mhm', 'uh-huh', 'no', 'thanks', 'great', 'cool'}
+
+# Loaded encodings by name; None marks one that could not be loaded
+_encodings = {}
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding(name):
+    if not tiktoken:
+        return None
+    if name not in _encodings:
+        with _encoding_lock:
+            if name not in _encodings:
+                try:
+                    _encodings[name] = tiktoken.get_encoding(name)
+                except Exception as e:
+                    # The encoding is downloaded on first use, which fails offline
+                    logger.warning(f"Tokenizer {name} unavailable, estimating tokens: {str(e)}")
+                    _encodings[name] = None
+    return _encodings[name]
+
+
+def count_tokens(text, settings=None):
+    """Count model tokens in text with tiktoken, or estimate them when it is not installed.
+
+    The encoding is summary_tokenizer_encoding of settings (config.settings by default).
+    """
+    encoding = _get_encoding((settings or config.settings).summary_tokenizer_encoding)
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+@dataclass
+class Compaction:
+    """A compacted transcript and what compaction saved."""
+
+    text: str
+    tokens_before: int
+    tokens_after: int
+    turns_before: int
+    turns_after: int
+    turns_omitted: int = 0
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+    def to_dict(self):
+        return {
+            'tokens_before': self.tokens_before,
+            'tokens_after': self.tokens_after,
+            'tokens_saved': self.tokens_saved,
+            'turns_before': self.turns_before,
+            'turns_after': self.turns_after,
+            'turns_omitted': self.turns_omitted
+        }
+
+
+def collapse_repeat(match):
+    word = match.group(1)
+    return match.group(0) if word.lower() in DOUBLED_WORDS else word
+
+
+def clean_text(text):
+    """Strip filler words and repeated words from one utterance."""
+    text = FILLER_PATTERN.sub('', text)
+    text = STUTTER_PATTERN.sub(collapse_repeat, text)
+    text = re.sub(r'\s+([,.?!])', r'\1', text)
+    text = re.sub(r'\s{2,}', ' ', text).strip(' ,')
+    return text[:1].upper() + text[1:]
+
+
+def parse_turns(transcript):
+    """Return (speaker, text) for each line; lines without a speaker prefix have speaker None."""
+    turns = []
+    for line in transcript.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = TURN_PATTERN.match(line)
+        if match:
+            turns.append((match.group('speaker').strip(), match.group('text').strip()))
+        else:
+            turns.append((None, line))
+    return turns
+
+
+def merge_turns(turns):
+    """Clean each utterance and join consecutive utterances by the same speaker."""
+    merged = []
+    for speaker, text in turns:
+        text = clean_text(text)
+        if not text:
+            continue
+        if merged and speaker is not None and merged[-1][0] == speaker:
+            merged[-1] = (speaker, f"{merged[-1][1]} {text}")
+        else:
+            merged.append((speaker, text))
+    return merged
+
+
+def format_turns(turns):
+    return "\n".join(f"{speaker}: {text}" if speaker else text for speaker, text in turns)
+
+
+def is_backchannel(text):
+    words = re.findall(r"[\w-]+", text.lower())
+    return bool(words) and len(words) <= 3 and all(word in BACKCHANNELS for word in words)
+
+
+def fit_to_budget(turns, budget, settings=None):
+    """Trim merged turns to at most budget tokens; returns (turns, number omitted).
+
+    Acknowledgement-only turns go first. If that is not enough, turns from the
+    middle of the meeting are replaced by a marker, keeping the opening, where
+    the agenda is set, and the end, where decisions and action items land.
+    """
+    if count_tokens(format_turns(turns), settings) <= budget:
+        return turns, 0
+    kept = [turn for turn in turns if not is_backchannel(turn[1])]
+    omitted = len(turns) - len(kept)
+    if count_tokens(format_turns(kept), settings) <= budget:
+        return kept, omitted
+
+    costs = [count_tokens(format_turns([turn]), settings) + 1 for turn in kept]
+    head_budget = budget // 3
+    head, used = 0, 0
+    while head < len(kept) and used + costs[head] <= head_budget:
+        used += costs[head]
+        head += 1
+    tail = len(kept)
+    # Leave room for the omission marker
+    while tail > head and used + costs[tail - 1] <= budget - 16:
+        used += costs[tail - 1]
+        tail -= 1
+    marker = (None, f"[... {tail - head} turns omitted ...]")
+    return kept[:head] + [marker] + kept[tail:], omitted + tail - head
+
+
+def compact_transcript(transcript, budget=None, settings=None):
+    """Compact a formatted transcript for the summarization prompt.
+
+    Filler and repeated words are stripped, consecutive turns by one speaker
+    are merged and timestamps are dropped. With budget, the result is trimmed
+    to at most that many tokens with fit_to_budget. Tokens are counted with
+    the encoding in settings (config.settings by default). Returns a Compaction.
+    """
+    turns = parse_turns(transcript)
+    merged = merge_turns(turns)
+    omitted = 0
+    if budget:
+        merged, omitted = fit_to_budget(merged, budget, settings)
+    text = format_turns(merged)
+    compaction = Compaction(
+        text=text,
+        tokens_before=count_tokens(transcript, settings),
+        tokens_after=count_tokens(text, settings),
+        turns_before=len(turns),
+        turns_after=len(merged),
+        turns_omitted=omitted
+    )
+    SUMMARY_PROMPT_TOKENS.inc(compaction.tokens_before, stage='raw')
+    SUMMARY_PROMPT_TOKENS.inc(compaction.tokens_after, stage='compacted')
+    return compaction
+
+
+def combine_compactions(compactions):
+    """Add up the compactions of consecutive parts of one transcript into one Compaction."""
+    return Compaction(
+        text="\n".join(c.text for c in compactions if c.text),
+        tokens_before=sum(c.tokens_before for c in compactions),
+        tokens_after=sum(c.tokens_after for c in compactions),
+        turns_before=sum(c.turns_before for c in compactions),
+        turns_after=sum(c.turns_after for c in compactions),
+        turns_omitted=sum(c.turns_omitted for c in compactions)
+    )
@@ -0,0 +1,123 @@
+import functools
+import sys
+import threading
+import logging
+from flask_socketio import SocketIO
+import config
+
+logger = logging.getLogger(__name__)
+
+THREADING = 'threading'
+GEVENT = 'gevent'
+ASYNC_MODES = (THREADING, GEVENT)
+
+# Set by configure_async_mode() for the gevent mode: the event loop's hub and the thread it runs on
+_hub = None
+_loop_thread = None
+
+
+def configure_async_mode(async_mode, blocking_threads=None):
+    """Check that the server can run in async_mode and prepare run_blocking and emits for it.
+
+    In the gevent mode the standard library must already be patched with
+    threading left alone, as gevent_worker.GeventWorker does: Speech SDK
+    callbacks and the app's background work stay on real threads, and only
+    connections are served by greenlets. blocking_threads defaults to
+    config.settings.blocking_threads. Raises ValueError for an unknown mode
+    and RuntimeError when the process is not set up for it.
+    """
+    global _hub, _loop_thread
+    if async_mode not in ASYNC_MODES:
+        raise ValueError(f"Unsupported ASYNC_MODE {async_mode}; expected one of {', '.join(ASYNC_MODES)}")
+    _hub = None
+    _loop_thread = None
+    if async_mode == THREADING:
+        return async_mode
+    try:
+        import gevent
+        from gevent import monkey
+    except ImportError:
+        raise RuntimeError("ASYNC_MODE=gevent requires the gevent package")
+    if not monkey.is_module_patched('socket'):
+        raise RuntimeError("ASYNC_MODE=gevent must be served by gunicorn with gunicorn.conf.py")
+    if monkey.is_module_patched('threading') or monkey.is_module_patched('queue'):
+        raise RuntimeError("ASYNC_MODE=gevent cannot run with threading patched; use gevent_worker.GeventWorker")
+    if blocking_threads is None:
+        blocking_threads = config.settings.blocking_threads
+    _hub = gevent.get_hub()
+    _hub.threadpool.maxsize = blocking_threads
+    _loop_thread = threading.get_ident()
+    logger.info(f"Serving with gevent, {blocking_threads} threads for blocking calls")
+    return async_mode
+
+
+def sockets_patched():
+    """Whether gevent has made the socket module cooperative in this process."""
+    monkey = sys.modules.get('gevent.monkey')
+    return bool(monkey and monkey.is_module_patched('socket'))
+
+
+class ThreadBound:
+    """A value built by build() on first use, shared by every thread unless gevent patched sockets.
+
+    A patched socket waits on the hub of the thread that opened it, and using
+    it from another real thread fails with "Cannot switch to a different
+    thread". Clients that pool connections, such as the OpenAI HTTP client
+    and redis.Redis, are therefore built once per thread in that case.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self._value = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Return the value for the calling thread, building it if needed."""
+        if sockets_patched():
+            value = getattr(self._local, 'value', None)
+            if value is None:
+                value = self._local.value = self.build()
+            return value
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self.build()
+        return self._value
+
+
+def on_loop():
+    """Whether the caller runs on the gevent event loop, where blocking stalls every connection."""
+    return _hub is not None and threading.get_ident() == _loop_thread
+
+
+def run_blocking(fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) and return its result.
+
+    On the event loop the call runs on the blocking-call thread pool while
+    other connections are served; anywhere else it runs in place.
+    """
+    if on_loop():
+        return _hub.threadpool.apply(fn, args, kwargs)
+    return fn(*args, **kwargs)
+
+
+def call_in_loop(fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) on the event loop, without waiting when called from another thread."""
+    if _hub is None or on_loop():
+        fn(*args, **kwargs)
+        return
+    import gevent
+    _hub.loop.run_callback_threadsafe(gevent.spawn, functools.partial(fn, *args, **kwargs))
+
+
+class LoopSocketIO(SocketIO):
+    """SocketIO that can emit from any thread.
+
+    Transcripts, job results and email status are emitted from SDK and
+    worker threads; in the gevent mode the emits are handed to the event
+    loop, which owns every client connection.
+    """
+
+    def emit(self, event, *args, **kwargs):
+        call_in_loop(super().emit, event, *args, **kwargs)
@@ -1,50 +1,223 @@
 import os
 from dotenv import load_dotenv
 import sys
+import tempfile
+from dataclasses import dataclass, field
 
 # Load environment variables
 env_path = os.path.join(os.getcwd(), '.env')
 load_dotenv(env_path)
 
-# Azure Speech Services configuration
-AZURE_SPEECH_KEY = os.getenv('AZURE_SPEECH_KEY')
-AZURE_SPEECH_REGION = os.getenv('AZURE_SPEECH_REGION')
+# Settings that must be set for every feature to work
+REQUIRED_SETTINGS = (
+    'AZURE_SPEECH_KEY',
+    'AZURE_SPEECH_REGION',
+    'AZURE_OPENAI_API_KEY',
+    'AZURE_OPENAI_ENDPOINT',
+    'EMAIL_USER',
+    'EMAIL_PASSWORD',
+    'EMAIL_SMTP_SERVER',
+    'EMAIL_SMTP_PORT'
+)
 
-# Azure OpenAI configuration
-AZURE_OPENAI_API_KEY = os.getenv('AZURE_OPENAI_API_KEY')
-AZURE_OPENAI_ENDPOINT = os.getenv('AZURE_OPENAI_ENDPOINT')
-AZURE_OPENAI_API_VERSION = "2023-05-15"
-AZURE_OPENAI_DEPLOYMENT = "gpt-35-turbo"
 
-# Email configuration
-EMAIL_USER = os.getenv('EMAIL_USER')
-EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
-EMAIL_SMTP_SERVER = os.getenv('EMAIL_SMTP_SERVER')
-EMAIL_SMTP_PORT = int(os.getenv('EMAIL_SMTP_PORT', '587'))
+def _env(name, default=None, parse=str):
+    """Dataclass field read from environment variable name when Settings is created."""
+    def read():
+        value = os.getenv(name)
+        return parse(value) if value is not None else default
+    return field(default_factory=read)
+
+def _env_int(name, default):
+    return _env(name, default, int)
+
+def _env_float(name, default):
+    return _env(name, default, float)
+
+def _env_bool(name, default):
+    return _env(name, default, lambda value: value.lower() == 'true')
+
+def _env_ints(name, default):
+    return _env(name, default, lambda value: tuple(int(item) for item in value.split(',')))
+
+def clean_openai_endpoint(endpoint):
+    """Strip a trailing slash and '/openai' suffix from an Azure OpenAI endpoint."""
+    if endpoint:
+        endpoint = endpoint.rstrip('/')
+        if endpoint.endswith('/openai'):
+            endpoint = endpoint[:-7]
+    return endpoint
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed application settings.
+
+    Each field defaults to the environment variable of the same name in upper
+    case, so Settings() reads the environment and Settings(database_path=...)
+    overrides single values, e.g. in tests.
+    """
+
+    # Azure Speech Services configuration
+    azure_speech_key: str = _env('AZURE_SPEECH_KEY')
+    azure_speech_region: str = _env('AZURE_SPEECH_REGION')
+
+    # Azure OpenAI configuration
+    azure_openai_api_key: str = _env('AZURE_OPENAI_API_KEY')
+    azure_openai_endpoint: str = _env('AZURE_OPENAI_ENDPOINT')
+    azure_openai_api_version: str = _env('AZURE_OPENAI_API_VERSION', '2023-05-15')
+    azure_openai_deployment: str = _env('AZURE_OPENAI_DEPLOYMENT', 'gpt-35-turbo')
+
+    # Azure OpenAI client behaviour. Each call gets OPENAI_DEADLINE_SECONDS in
+    # total across retries; rate limits of 0 leave requests unthrottled and a
+    # hedge delay of 0 disables hedged requests.
+    openai_max_connections: int = _env_int('OPENAI_MAX_CONNECTIONS', 20)
+    openai_keepalive_seconds: float = _env_float('OPENAI_KEEPALIVE_SECONDS', 60)
+    openai_connect_timeout_seconds: float = _env_float('OPENAI_CONNECT_TIMEOUT_SECONDS', 5)
+    openai_request_timeout_seconds: float = _env_float('OPENAI_REQUEST_TIMEOUT_SECONDS', 60)
+    openai_deadline_seconds: float = _env_float('OPENAI_DEADLINE_SECONDS', 180)
+    openai_max_retries: int = _env_int('OPENAI_MAX_RETRIES', 4)
+    openai_backoff_base_seconds: float = _env_float('OPENAI_BACKOFF_BASE_SECONDS', 1)
+    openai_backoff_max_seconds: float = _env_float('OPENAI_BACKOFF_MAX_SECONDS', 30)
+    openai_requests_per_minute: int = _env_int('OPENAI_REQUESTS_PER_MINUTE', 0)
+    openai_tokens_per_minute: int = _env_int('OPENAI_TOKENS_PER_MINUTE', 0)
+    openai_circuit_failure_threshold: int = _env_int('OPENAI_CIRCUIT_FAILURE_THRESHOLD', 5)
+    openai_circuit_reset_seconds: float = _env_float('OPENAI_CIRCUIT_RESET_SECONDS', 30)
+    openai_hedge_after_seconds: float = _env_float('OPENAI_HEDGE_AFTER_SECONDS', 0)
+
+    # Summarization configuration
+    summary_max_tokens: int = _env_int('SUMMARY_MAX_TOKENS', 1000)
+    summary_temperature: float = _env_float('SUMMARY_TEMPERATURE', 0.7)
+    summary_chunk_tokens: int = _env_int('SUMMARY_CHUNK_TOKENS', 6000)
+    summary_max_workers: int = _env_int('SUMMARY_MAX_WORKERS', 4)
+    summary_stream_flush_seconds: float = _env_float('SUMMARY_STREAM_FLUSH_SECONDS', 0.05)
+    summary_cache_enabled: bool = _env_bool('SUMMARY_CACHE_ENABLED', True)
+    summary_cache_memory_entries: int = _env_int('SUMMARY_CACHE_MEMORY_ENTRIES', 256)
+    summary_cache_db_entries: int = _env_int('SUMMARY_CACHE_DB_ENTRIES', 10000)
+    # Transcripts are compacted before summarization; 0 leaves long ones to chunking
+    summary_compaction_enabled: bool = _env_bool('SUMMARY_COMPACTION_ENABLED', True)
+    summary_max_transcript_tokens: int = _env_int('SUMMARY_MAX_TRANSCRIPT_TOKENS', 0)
+    summary_tokenizer_encoding: str = _env('SUMMARY_TOKENIZER_ENCODING', 'cl100k_base')
+    # While a meeting records, its transcript is folded into a running summary
+    # every ROLLING_SUMMARY_INTERVAL_SECONDS or ROLLING_SUMMARY_WINDOW_TOKENS,
+    # whichever comes first, so ending it only summarizes the last window
+    rolling_summary_enabled: bool = _env_bool('ROLLING_SUMMARY_ENABLED', True)
+    rolling_summary_interval_seconds: float = _env_float('ROLLING_SUMMARY_INTERVAL_SECONDS', 300)
+    rolling_summary_window_tokens: int = _env_int('ROLLING_SUMMARY_WINDOW_TOKENS', 2000)
+    rolling_summary_wait_seconds: float = _env_float('ROLLING_SUMMARY_WAIT_SECONDS', 30)
+
+    # Email configuration
+    email_user: str = _env('EMAIL_USER')
+    email_password: str = _env('EMAIL_PASSWORD')
+    email_smtp_server: str = _env('EMAIL_SMTP_SERVER')
+    email_smtp_port: int = _env_int('EMAIL_SMTP_PORT', 587)
+    smtp_timeout_seconds: float = _env_float('SMTP_TIMEOUT_SECONDS', 30)
+    smtp_idle_timeout_seconds: float = _env_float('SMTP_IDLE_TIMEOUT_SECONDS', 60)
+    # Plaintext relays (and the benchmark SMTP sink) do not offer STARTTLS
+    smtp_starttls: bool = _env_bool('SMTP_STARTTLS', True)
+
+    # Email outbox configuration
+    outbox_batch_size: int = _env_int('OUTBOX_BATCH_SIZE', 20)
+    outbox_poll_seconds: float = _env_float('OUTBOX_POLL_SECONDS', 30)
+    outbox_max_attempts: int = _env_int('OUTBOX_MAX_ATTEMPTS', 6)
+    outbox_retry_base_seconds: float = _env_float('OUTBOX_RETRY_BASE_SECONDS', 15)
+    outbox_retry_max_seconds: float = _env_float('OUTBOX_RETRY_MAX_SECONDS', 1800)
+    # A message another live worker has been sending for longer than this is requeued
+    outbox_claim_timeout_seconds: float = _env_float('OUTBOX_CLAIM_TIMEOUT_SECONDS', 600)
+
+    # Database configuration
+    database_path: str = _env('DATABASE_PATH', 'meetings.db')
+    db_busy_timeout_seconds: float = _env_float('DB_BUSY_TIMEOUT_SECONDS', 5)
+    db_cache_size_kb: int = _env_int('DB_CACHE_SIZE_KB', 16384)
+    db_mmap_size_bytes: int = _env_int('DB_MMAP_SIZE_BYTES', 256 * 1024 * 1024)
+    db_statement_cache_size: int = _env_int('DB_STATEMENT_CACHE_SIZE', 128)
+
+    # Meeting session configuration
+    max_concurrent_meetings: int = _env_int('MAX_CONCURRENT_MEETINGS', 20)
+    meeting_idle_timeout_seconds: int = _env_int('MEETING_IDLE_TIMEOUT_SECONDS', 900)
+    meeting_reap_interval_seconds: int = _env_int('MEETING_REAP_INTERVAL_SECONDS', 60)
+
+    # Audio input configuration. 'browser' streams audio from the page over
+    # Socket.IO; 'microphone' records from the server's default microphone.
+    audio_source: str = _env('AUDIO_SOURCE', 'browser')
+    audio_sample_rates: tuple = _env_ints('AUDIO_SAMPLE_RATES', (16000, 8000))
+    audio_frame_ms: int = _env_int('AUDIO_FRAME_MS', 20)
+    audio_min_frame_ms: int = _env_int('AUDIO_MIN_FRAME_MS', 10)
+    audio_max_frame_ms: int = _env_int('AUDIO_MAX_FRAME_MS', 200)
+    audio_buffer_ms: int = _env_int('AUDIO_BUFFER_MS', 2000)
+    # Audio the recognizer may fall behind by before the client is asked to pause
+    audio_max_unrecognized_ms: int = _env_int('AUDIO_MAX_UNRECOGNIZED_MS', 5000)
+    audio_max_compressed_frame_bytes: int = _env_int('AUDIO_MAX_COMPRESSED_FRAME_BYTES', 65536)
+    # Compressed input needs GStreamer installed next to the Speech SDK
+    audio_opus_enabled: bool = _env_bool('AUDIO_OPUS_ENABLED', False)
+    # Recognizers kept connected for browser meetings in the default audio format;
+    # replaced after RECOGNIZER_POOL_MAX_IDLE_SECONDS, before the service drops them
+    recognizer_pool_size: int = _env_int('RECOGNIZER_POOL_SIZE', 2)
+    recognizer_pool_max_idle_seconds: float = _env_float('RECOGNIZER_POOL_MAX_IDLE_SECONDS', 240)
+    recognizer_pool_check_seconds: float = _env_float('RECOGNIZER_POOL_CHECK_SECONDS', 15)
+
+    # Live transcript delivery configuration
+    transcript_emit_window_seconds: float = _env_float('TRANSCRIPT_EMIT_WINDOW_SECONDS', 0.1)
+    transcript_partial_interval_seconds: float = _env_float('TRANSCRIPT_PARTIAL_INTERVAL_SECONDS', 0.3)
+
+    # Live transcript persistence configuration
+    segment_persistence_enabled: bool = _env_bool('SEGMENT_PERSISTENCE_ENABLED', True)
+    segment_batch_size: int = _env_int('SEGMENT_BATCH_SIZE', 50)
+    segment_flush_seconds: float = _env_float('SEGMENT_FLUSH_SECONDS', 0.5)
+    segment_memory_tail: int = _env_int('SEGMENT_MEMORY_TAIL', 200)
+    meeting_heartbeat_seconds: int = _env_int('MEETING_HEARTBEAT_SECONDS', 30)
+    meeting_recovery_grace_seconds: int = _env_int('MEETING_RECOVERY_GRACE_SECONDS', 120)
+
+    # Recognized events of every meeting are captured here for replay.py when set
+    recognition_capture_dir: str = _env('RECOGNITION_CAPTURE_DIR')
+
+    # Batch transcription of recorded meetings
+    batch_max_workers: int = _env_int('BATCH_MAX_WORKERS', 4)
+    batch_upload_dir: str = _env('BATCH_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'meeting-uploads'))
+    batch_max_upload_bytes: int = _env_int('BATCH_MAX_UPLOAD_BYTES', 512 * 1024 * 1024)
+    batch_progress_interval_seconds: float = _env_float('BATCH_PROGRESS_INTERVAL_SECONDS', 1)
+    # A file fails if recognition has not finished this long after its length in audio,
+    # or after BATCH_RECOGNITION_TIMEOUT_SECONDS when its length is unknown (FLAC)
+    batch_recognition_slack_seconds: float = _env_float('BATCH_RECOGNITION_SLACK_SECONDS', 300)
+    batch_recognition_timeout_seconds: float = _env_float('BATCH_RECOGNITION_TIMEOUT_SECONDS', 4 * 3600)
+
+    # Multi-worker mode. With REDIS_URL set, Socket.IO emits go through Redis
+    # and meeting ownership and job status are shared between workers.
+    redis_url: str = _env('REDIS_URL')
+    web_workers: int = _env_int('WEB_WORKERS', 1)
+    # Signs Flask sessions and meeting tokens; must be the same on every worker
+    secret_key: str = _env('SECRET_KEY')
+    # Serving mode, checked when the app is created: 'gevent' (set by gunicorn.conf.py) serves
+    # each connection on a greenlet and runs blocking calls on BLOCKING_THREADS real threads;
+    # 'threading' serves each request on its own thread, for development and tests
+    async_mode: str = _env('ASYNC_MODE', 'threading')
+    web_worker_connections: int = _env_int('WEB_WORKER_CONNECTIONS', 5000)
+    web_threads: int = _env_int('WEB_THREADS', 8)
+    blocking_threads: int = _env_int('BLOCKING_THREADS', 16)
+    worker_command_timeout_seconds: float = _env_float('WORKER_COMMAND_TIMEOUT_SECONDS', 10)
+    # A worker's claim on its meetings lapses this long after its command server stops refreshing it
+    meeting_owner_ttl_seconds: float = _env_float('MEETING_OWNER_TTL_SECONDS', 30)
+
+    # Background job configuration
+    job_max_workers: int = _env_int('JOB_MAX_WORKERS', 4)
+    job_retention_seconds: int = _env_int('JOB_RETENTION_SECONDS', 3600)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'azure_openai_endpoint', clean_openai_endpoint(self.azure_openai_endpoint))
+
+    def missing(self):
+        """Return the names of required settings that are not set."""
+        return [name for name in REQUIRED_SETTINGS if not getattr(self, name.lower())]
+
+
+settings = Settings()
 
 def validate_config():
     """Validate that all required environment variables are set."""
-    required_vars = [
-        'AZURE_SPEECH_KEY',
-        'AZURE_SPEECH_REGION',
-        'AZURE_OPENAI_API_KEY',
-        'AZURE_OPENAI_ENDPOINT',
-        'EMAIL_USER',
-        'EMAIL_PASSWORD',
-        'EMAIL_SMTP_SERVER',
-        'EMAIL_SMTP_PORT'
-    ]
-    
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
-    
+    missing_vars = Settings().missing()
+
     if missing_vars:
         print(f"Missing required environment variables: {', '.join(missing_vars)}")
         return False
-    
-    return True
 
-# Clean up OpenAI endpoint
-if AZURE_OPENAI_ENDPOINT:
-    AZURE_OPENAI_ENDPOINT = AZURE_OPENAI_ENDPOINT.rstrip('/')
-    if AZURE_OPENAI_ENDPOINT.endswith('/openai'):
-        AZURE_OPENAI_ENDPOINT = AZURE_OPENAI_ENDPOINT[:-7] 
\ No newline at end of file
+    return True
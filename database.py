@@ -2,99 +2,736 @@ import sqlite3
 import datetime
 import json
 import os
+import base64
+import html
+import re
+import sys
+import argparse
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from metrics import DB_QUERY_DURATION, timed
+import config
 
-# Use a local SQLite database
-DATABASE_PATH = 'meetings.db'
-
-def get_connection():
-    """Get a connection to the SQLite database."""
-    return sqlite3.connect(DATABASE_PATH)
-
-def init_db():
-    """Initialize the SQLite database."""
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS meetings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                transcript TEXT NOT NULL,
-                summary TEXT NOT NULL,
-                participants TEXT
-            )
-        ''')
-        conn.commit()
+def connection_pragmas(settings):
+    """Return the tuning applied to every pooled connection opened with settings.
+
+    WAL lets readers run alongside a writer, and synchronous=NORMAL is durable
+    in WAL mode except for the last transactions before a power loss.
+    """
+    return (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA cache_size=-{settings.db_cache_size_kb}",
+        f"PRAGMA mmap_size={settings.db_mmap_size_bytes}",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA foreign_keys=ON"
+    )
+
+# SQL is kept in constants so each pooled connection's statement cache
+# reuses the prepared statements across calls.
+CREATE_MEETINGS_SQL = '''
+    CREATE TABLE IF NOT EXISTS meetings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        transcript TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        participants TEXT
+    )
+'''
+CREATE_MEETINGS_TIMESTAMP_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_meetings_timestamp_id ON meetings (timestamp DESC, id DESC)
+"""
+INSERT_MEETING_SQL = "INSERT INTO meetings (timestamp, transcript, summary) VALUES (?, ?, ?)"
+LATEST_MEETING_ID_SQL = "SELECT id FROM meetings ORDER BY id DESC LIMIT 1"
+UPDATE_PARTICIPANTS_SQL = "UPDATE meetings SET participants = ? WHERE id = ?"
+SELECT_ALL_MEETINGS_SQL = "SELECT id, timestamp, transcript, summary, participants FROM meetings ORDER BY timestamp DESC"
+SELECT_MEETING_SQL = "SELECT id, timestamp, transcript, summary, participants FROM meetings WHERE id = ?"
+# Listing queries read only the columns needed for a lightweight row and walk
+# idx_meetings_timestamp_id from the cursor position, so a page costs the same
+# regardless of how many meetings are stored.
+LIST_MEETINGS_SQL = """
+    SELECT id, timestamp, participants, substr(summary, 1, ?)
+    FROM meetings
+    ORDER BY timestamp DESC, id DESC
+    LIMIT ?
+"""
+LIST_MEETINGS_AFTER_SQL = """
+    SELECT id, timestamp, participants, substr(summary, 1, ?)
+    FROM meetings
+    WHERE (timestamp, id) < (?, ?)
+    ORDER BY timestamp DESC, id DESC
+    LIMIT ?
+"""
+
+# Full-text index over transcripts and summaries. It is an external-content
+# FTS5 table, so it stores only the index; triggers keep it in step with
+# inserts, deletes and transcript/summary edits on meetings.
+CREATE_SEARCH_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(
+        transcript, summary,
+        content='meetings', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS meetings_fts_insert AFTER INSERT ON meetings BEGIN
+        INSERT INTO meetings_fts (rowid, transcript, summary)
+        VALUES (new.id, new.transcript, new.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS meetings_fts_delete AFTER DELETE ON meetings BEGIN
+        INSERT INTO meetings_fts (meetings_fts, rowid, transcript, summary)
+        VALUES ('delete', old.id, old.transcript, old.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS meetings_fts_update AFTER UPDATE OF transcript, summary ON meetings BEGIN
+        INSERT INTO meetings_fts (meetings_fts, rowid, transcript, summary)
+        VALUES ('delete', old.id, old.transcript, old.summary);
+        INSERT INTO meetings_fts (rowid, transcript, summary)
+        VALUES (new.id, new.transcript, new.summary);
+    END
+    """
+)
+REBUILD_SEARCH_INDEX_SQL = "INSERT INTO meetings_fts (meetings_fts) VALUES ('rebuild')"
+# Summary matches weigh twice as much as transcript matches. Snippet markers
+# are control characters so the text can be HTML-escaped before highlighting.
+SEARCH_MEETINGS_SQL = """
+    SELECT m.id, m.timestamp, m.participants,
+           snippet(meetings_fts, 0, char(2), char(3), '...', 16),
+           snippet(meetings_fts, 1, char(2), char(3), '...', 16),
+           bm25(meetings_fts, 1.0, 2.0) AS rank
+    FROM meetings_fts
+    JOIN meetings m ON m.id = meetings_fts.rowid
+    WHERE meetings_fts MATCH ?
+    ORDER BY rank
+    LIMIT ? OFFSET ?
+"""
+
+# Meetings that are still recording. Segments are appended while the meeting
+# runs so a crashed worker loses at most the last unflushed batch; owner and
+# heartbeat_at let a restarted process find meetings nobody is recording.
+CREATE_LIVE_MEETINGS_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS live_meetings (
+        meeting_id TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'recording',
+        started_at DATETIME NOT NULL,
+        heartbeat_at DATETIME NOT NULL,
+        saved_meeting_id INTEGER REFERENCES meetings (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meeting_segments (
+        meeting_id TEXT NOT NULL REFERENCES live_meetings (meeting_id) ON DELETE CASCADE,
+        seq INTEGER NOT NULL,
+        timestamp TEXT NOT NULL,
+        speaker TEXT NOT NULL,
+        speaker_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        PRIMARY KEY (meeting_id, seq)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_live_meetings_status ON live_meetings (status, heartbeat_at)"
+)
+INSERT_LIVE_MEETING_SQL = """
+    INSERT OR REPLACE INTO live_meetings (meeting_id, owner, status, started_at, heartbeat_at)
+    VALUES (?, ?, 'recording', ?, ?)
+"""
+INSERT_SEGMENT_SQL = """
+    INSERT OR IGNORE INTO meeting_segments (meeting_id, seq, timestamp, speaker, speaker_id, text)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+HEARTBEAT_LIVE_MEETING_SQL = "UPDATE live_meetings SET heartbeat_at = ? WHERE meeting_id = ? AND status = 'recording'"
+SELECT_SEGMENTS_SQL = "SELECT timestamp, speaker, text FROM meeting_segments WHERE meeting_id = ? ORDER BY seq"
+FINISH_LIVE_MEETING_SQL = "UPDATE live_meetings SET status = ?, saved_meeting_id = ? WHERE meeting_id = ?"
+DELETE_SEGMENTS_SQL = "DELETE FROM meeting_segments WHERE meeting_id = ?"
+SELECT_RECORDING_MEETINGS_SQL = "SELECT meeting_id, owner, heartbeat_at FROM live_meetings WHERE status = 'recording'"
+CLAIM_LIVE_MEETING_SQL = "UPDATE live_meetings SET status = 'recovering', owner = ? WHERE meeting_id = ? AND status = 'recording'"
+
+# Persistent tier of the summary cache, keyed by a hash of the transcript and
+# the generation parameters; least recently used rows are evicted first.
+CREATE_SUMMARY_CACHE_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS summary_cache (
+        key TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        created_at DATETIME NOT NULL,
+        last_used_at DATETIME NOT NULL,
+        hit_count INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_summary_cache_last_used ON summary_cache (last_used_at)"
+)
+SELECT_CACHED_SUMMARY_SQL = "SELECT summary FROM summary_cache WHERE key = ?"
+TOUCH_CACHED_SUMMARY_SQL = "UPDATE summary_cache SET last_used_at = ?, hit_count = hit_count + 1 WHERE key = ?"
+INSERT_CACHED_SUMMARY_SQL = """
+    INSERT OR REPLACE INTO summary_cache (key, summary, created_at, last_used_at)
+    VALUES (?, ?, ?, ?)
+"""
+COUNT_CACHED_SUMMARIES_SQL = "SELECT COUNT(*) FROM summary_cache"
+EVICT_CACHED_SUMMARIES_SQL = """
+    DELETE FROM summary_cache WHERE key IN (
+        SELECT key FROM summary_cache ORDER BY last_used_at LIMIT ?
+    )
+"""
+
+# Outgoing email, written by request handlers and drained by the outbox sender.
+# Rows move queued -> sending -> sent, or back to queued with a later
+# next_attempt_at after a transient failure, or to failed once retries run out.
+# owner and claimed_at record which process is sending a row, so a starting
+# worker only requeues messages whose sender is gone.
+CREATE_OUTBOX_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipients TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at DATETIME NOT NULL,
+        next_attempt_at DATETIME NOT NULL,
+        sent_at DATETIME,
+        owner TEXT,
+        claimed_at DATETIME,
+        meeting_id TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)"
+)
+# Columns added after the outbox table was first released, added to older databases by init_db
+OUTBOX_ADDED_COLUMNS = (('owner', 'TEXT'), ('claimed_at', 'DATETIME'), ('meeting_id', 'TEXT'))
+INSERT_OUTBOX_SQL = """
+    INSERT INTO outbox (recipients, subject, body, created_at, next_attempt_at, meeting_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SELECT_DUE_OUTBOX_SQL = """
+    SELECT id, recipients, subject, body, attempts, meeting_id FROM outbox
+    WHERE status = 'queued' AND next_attempt_at <= ?
+    ORDER BY next_attempt_at, id
+    LIMIT ?
+"""
+CLAIM_OUTBOX_SQL = """
+    UPDATE outbox SET status = 'sending', attempts = attempts + 1, owner = ?, claimed_at = ?
+    WHERE id = ? AND status = 'queued'
+"""
+MARK_OUTBOX_SENT_SQL = "UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?"
+MARK_OUTBOX_RETRY_SQL = "UPDATE outbox SET status = 'queued', last_error = ?, next_attempt_at = ? WHERE id = ?"
+MARK_OUTBOX_FAILED_SQL = "UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?"
+SELECT_SENDING_OUTBOX_SQL = "SELECT id, owner, claimed_at FROM outbox WHERE status = 'sending'"
+REQUEUE_SENDING_OUTBOX_SQL = "UPDATE outbox SET status = 'queued', owner = NULL WHERE id = ? AND status = 'sending'"
+SELECT_OUTBOX_SQL = """
+    SELECT id, recipients, subject, status, attempts, last_error, created_at, next_attempt_at, sent_at
+    FROM outbox WHERE id = ?
+"""
+NEXT_OUTBOX_ATTEMPT_SQL = "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'queued'"
+
+SUMMARY_PREVIEW_CHARS = 200
+
+_local = threading.local()
+# Settings each database was initialized with, so connections opened later by
+# any thread get the same tuning
+_settings_by_path = {}
+
+def _open_connection(db_path, settings):
+    """Open and tune a new connection to db_path with settings."""
+    conn = sqlite3.connect(
+        db_path,
+        timeout=settings.db_busy_timeout_seconds,
+        cached_statements=settings.db_statement_cache_size,
+        # Take the write lock when a write transaction starts rather than on
+        # its first write, so concurrent writers wait instead of deadlocking.
+        isolation_level='IMMEDIATE'
+    )
+    for pragma in connection_pragmas(settings):
+        conn.execute(pragma)
+    return conn
+
+def get_connection(db_path=None):
+    """Get this thread's connection to the SQLite database, opening it on first use.
+
+    The connection is tuned with the settings db_path was initialized with by
+    init_db, or config.settings for a database init_db has not seen.
+    """
+    db_path = db_path or config.settings.database_path
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = _open_connection(db_path, _settings_by_path.get(db_path, config.settings))
+    return conn
+
+@contextmanager
+def connection(db_path=None):
+    """Yield a pooled connection inside a transaction.
+
+    The transaction commits when the block exits normally and rolls back if it
+    raises. The connection stays open for reuse by the same thread.
+    """
+    conn = get_connection(db_path)
+    with conn:
+        yield conn
+
+def close_connections():
+    """Close all of this thread's pooled connections."""
+    connections = getattr(_local, 'connections', None) or {}
+    for conn in connections.values():
         conn.close()
+    connections.clear()
+
+@timed(DB_QUERY_DURATION, function='init_db')
+def init_db(db_path=None, settings=None):
+    """Initialize the SQLite database, tuning its connections with settings (config.settings by default)."""
+    settings = settings or config.settings
+    db_path = db_path or settings.database_path
+    _settings_by_path[db_path] = settings
+    try:
+        with connection(db_path) as conn:
+            conn.execute(CREATE_MEETINGS_SQL)
+            conn.execute(CREATE_MEETINGS_TIMESTAMP_INDEX_SQL)
+            for statement in CREATE_SEARCH_INDEX_SQL + CREATE_LIVE_MEETINGS_SQL + CREATE_SUMMARY_CACHE_SQL + CREATE_OUTBOX_SQL:
+                conn.execute(statement)
+            outbox_columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+            for name, column_type in OUTBOX_ADDED_COLUMNS:
+                if name not in outbox_columns:
+                    conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {column_type}")
         print("Database initialized successfully")
     except Exception as e:
         print(f"Error initializing database: {str(e)}")
         raise e
 
-def save_meeting(transcript, summary):
+@timed(DB_QUERY_DURATION, function='save_meeting')
+def save_meeting(transcript, summary, db_path=None):
     """Save a meeting's transcript and summary to the database."""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        timestamp = datetime.datetime.now()
-        cursor.execute(
-            "INSERT INTO meetings (timestamp, transcript, summary) VALUES (?, ?, ?)",
-            (timestamp, transcript, summary)
-        )
-        conn.commit()
-        meeting_id = cursor.lastrowid
-        conn.close()
-        return meeting_id
+        with connection(db_path) as conn:
+            timestamp = datetime.datetime.now()
+            cursor = conn.execute(INSERT_MEETING_SQL, (timestamp, transcript, summary))
+            return cursor.lastrowid
     except Exception as e:
         print(f"Error saving meeting: {str(e)}")
-        if conn:
-            conn.close()
         raise e
 
-def update_meeting_participants(participants):
+@timed(DB_QUERY_DURATION, function='update_meeting_participants')
+def update_meeting_participants(participants, db_path=None):
     """Update the most recent meeting with participant information."""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM meetings ORDER BY id DESC LIMIT 1")
-        result = cursor.fetchone()
-        if result:
-            meeting_id = result[0]
-            participants_str = ",".join(participants)
-            cursor.execute(
-                "UPDATE meetings SET participants = ? WHERE id = ?",
-                (participants_str, meeting_id)
-            )
-            conn.commit()
-        else:
-            print("No meetings found to update participants")
-        conn.close()
+        with connection(db_path) as conn:
+            result = conn.execute(LATEST_MEETING_ID_SQL).fetchone()
+            if result:
+                meeting_id = result[0]
+                participants_str = ",".join(participants)
+                conn.execute(UPDATE_PARTICIPANTS_SQL, (participants_str, meeting_id))
+            else:
+                print("No meetings found to update participants")
     except Exception as e:
         print(f"Error updating participants: {str(e)}")
-        if conn:
-            conn.close()
         raise e
 
-def get_all_meetings():
+def _meeting_from_row(row):
+    return {
+        'id': row[0],
+        'timestamp': row[1],
+        'transcript': row[2],
+        'summary': row[3],
+        'participants': row[4].split(',') if row[4] else []
+    }
+
+@timed(DB_QUERY_DURATION, function='get_all_meetings')
+def get_all_meetings(db_path=None):
     """Get all meetings from the database."""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM meetings ORDER BY timestamp DESC")
-        meetings = []
-        for row in cursor.fetchall():
-            meetings.append({
+        with connection(db_path) as conn:
+            return [_meeting_from_row(row) for row in conn.execute(SELECT_ALL_MEETINGS_SQL)]
+    except Exception as e:
+        print(f"Error getting meetings: {str(e)}")
+        raise e
+
+def encode_cursor(timestamp, meeting_id):
+    """Encode a (timestamp, id) keyset position as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps([timestamp, meeting_id]).encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor; raises ValueError if it is malformed."""
+    try:
+        timestamp, meeting_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(timestamp, str) or not isinstance(meeting_id, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, meeting_id
+
+@timed(DB_QUERY_DURATION, function='get_meetings_page')
+def get_meetings_page(limit=20, cursor=None, db_path=None):
+    """Get one page of meetings, newest first, without transcripts.
+
+    Returns (meetings, next_cursor); next_cursor is None on the last page.
+    """
+    try:
+        with connection(db_path) as conn:
+            if cursor:
+                timestamp, meeting_id = decode_cursor(cursor)
+                rows = conn.execute(
+                    LIST_MEETINGS_AFTER_SQL,
+                    (SUMMARY_PREVIEW_CHARS, timestamp, meeting_id, limit + 1)
+                ).fetchall()
+            else:
+                rows = conn.execute(LIST_MEETINGS_SQL, (SUMMARY_PREVIEW_CHARS, limit + 1)).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        meetings = [
+            {
+                'id': row[0],
+                'timestamp': row[1],
+                'participants': row[2].split(',') if row[2] else [],
+                'summary_preview': row[3]
+            }
+            for row in rows
+        ]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if has_more else None
+        return meetings, next_cursor
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"Error listing meetings: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='get_meeting')
+def get_meeting(meeting_id, db_path=None):
+    """Get one meeting, including its full transcript, or None if it does not exist."""
+    try:
+        with connection(db_path) as conn:
+            row = conn.execute(SELECT_MEETING_SQL, (meeting_id,)).fetchone()
+        return _meeting_from_row(row) if row else None
+    except Exception as e:
+        print(f"Error getting meeting {meeting_id}: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='rebuild_search_index')
+def rebuild_search_index(db_path=None):
+    """Rebuild the full-text index from the meetings table.
+
+    Needed once for meetings stored before the index existed; afterwards the
+    triggers keep it current.
+    """
+    try:
+        with connection(db_path) as conn:
+            conn.execute(REBUILD_SEARCH_INDEX_SQL)
+            conn.execute("INSERT INTO meetings_fts (meetings_fts) VALUES ('optimize')")
+            return conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+    except Exception as e:
+        print(f"Error rebuilding search index: {str(e)}")
+        raise e
+
+def build_search_query(text):
+    """Turn free text into an FTS5 query matching all terms.
+
+    Each term is quoted so punctuation and FTS operators in user input cannot
+    cause syntax errors; a trailing * on a term keeps prefix matching.
+    """
+    terms = []
+    for term in re.findall(r'\w+\*?', text):
+        prefix = term.endswith('*')
+        terms.append(f'"{term.rstrip("*")}"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+def _highlight(snippet):
+    return html.escape(snippet or '').replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+@timed(DB_QUERY_DURATION, function='search_meetings')
+def search_meetings(text, limit=20, offset=0, db_path=None):
+    """Search transcripts and summaries, best matches first.
+
+    Returns (results, next_offset); next_offset is None on the last page.
+    Snippets are HTML-escaped with matches wrapped in <mark> tags.
+    """
+    query = build_search_query(text)
+    if not query:
+        return [], None
+    try:
+        with connection(db_path) as conn:
+            rows = conn.execute(SEARCH_MEETINGS_SQL, (query, limit + 1, offset)).fetchall()
+        has_more = len(rows) > limit
+        results = [
+            {
                 'id': row[0],
                 'timestamp': row[1],
-                'transcript': row[2],
-                'summary': row[3],
-                'participants': row[4].split(',') if row[4] else []
-            })
-        conn.close()
-        return meetings
+                'participants': row[2].split(',') if row[2] else [],
+                'transcript_snippet': _highlight(row[3]),
+                'summary_snippet': _highlight(row[4]),
+                'rank': row[5]
+            }
+            for row in rows[:limit]
+        ]
+        return results, offset + limit if has_more else None
     except Exception as e:
-        print(f"Error getting meetings: {str(e)}")
-        if conn:
-            conn.close()
-        raise e 
\ No newline at end of file
+        print(f"Error searching meetings: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='begin_live_meeting')
+def begin_live_meeting(meeting_id, owner, db_path=None):
+    """Record that meeting_id has started recording in process owner."""
+    try:
+        with connection(db_path) as conn:
+            now = datetime.datetime.now()
+            conn.execute(INSERT_LIVE_MEETING_SQL, (meeting_id, owner, now, now))
+    except Exception as e:
+        print(f"Error starting live meeting {meeting_id}: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='append_segments')
+def append_segments(segments, heartbeat_meeting_ids=(), db_path=None):
+    """Append transcript segments and refresh heartbeats in a single transaction.
+
+    segments is a list of (meeting_id, seq, timestamp, speaker, speaker_id, text)
+    tuples; rows already written (same meeting_id and seq) are skipped.
+    """
+    try:
+        with connection(db_path) as conn:
+            conn.executemany(INSERT_SEGMENT_SQL, segments)
+            now = datetime.datetime.now()
+            conn.executemany(
+                HEARTBEAT_LIVE_MEETING_SQL,
+                [(now, meeting_id) for meeting_id in heartbeat_meeting_ids]
+            )
+    except Exception as e:
+        print(f"Error appending segments: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='get_live_transcript')
+def get_live_transcript(meeting_id, db_path=None):
+    """Rebuild the formatted transcript of a live meeting from its stored segments."""
+    try:
+        with connection(db_path) as conn:
+            return "\n".join(
+                f"[{timestamp}] {speaker}: {text}"
+                for timestamp, speaker, text in conn.execute(SELECT_SEGMENTS_SQL, (meeting_id,))
+            )
+    except Exception as e:
+        print(f"Error reading segments for {meeting_id}: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='finish_meeting')
+def finish_meeting(meeting_id, transcript, summary, status='finished', db_path=None):
+    """Save a finished meeting and drop its live segments in one transaction.
+
+    Returns the id of the new meetings row. meeting_id may have no live
+    record (for example when segment persistence is disabled).
+    """
+    try:
+        with connection(db_path) as conn:
+            timestamp = datetime.datetime.now()
+            saved_meeting_id = conn.execute(INSERT_MEETING_SQL, (timestamp, transcript, summary)).lastrowid
+            conn.execute(FINISH_LIVE_MEETING_SQL, (status, saved_meeting_id, meeting_id))
+            conn.execute(DELETE_SEGMENTS_SQL, (meeting_id,))
+            return saved_meeting_id
+    except Exception as e:
+        print(f"Error finishing meeting {meeting_id}: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='abandon_live_meeting')
+def abandon_live_meeting(meeting_id, db_path=None):
+    """Mark a live meeting that produced no transcript as abandoned."""
+    try:
+        with connection(db_path) as conn:
+            conn.execute(FINISH_LIVE_MEETING_SQL, ('abandoned', None, meeting_id))
+            conn.execute(DELETE_SEGMENTS_SQL, (meeting_id,))
+    except Exception as e:
+        print(f"Error abandoning meeting {meeting_id}: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='claim_orphaned_meetings')
+def claim_orphaned_meetings(owner, is_owner_alive, grace_seconds, db_path=None):
+    """Claim recording meetings whose owning process is gone.
+
+    A meeting is orphaned when is_owner_alive(owner) is False or its heartbeat
+    is older than grace_seconds. Claimed meetings move to 'recovering' so only
+    one process recovers each of them. Returns the claimed meeting ids.
+    """
+    try:
+        cutoff = (datetime.datetime.now() - datetime.timedelta(seconds=grace_seconds)).isoformat(' ')
+        claimed = []
+        with connection(db_path) as conn:
+            for meeting_id, meeting_owner, heartbeat_at in conn.execute(SELECT_RECORDING_MEETINGS_SQL).fetchall():
+                if meeting_owner == owner:
+                    continue
+                if is_owner_alive(meeting_owner) and heartbeat_at >= cutoff:
+                    continue
+                if conn.execute(CLAIM_LIVE_MEETING_SQL, (owner, meeting_id)).rowcount:
+                    claimed.append(meeting_id)
+        return claimed
+    except Exception as e:
+        print(f"Error claiming orphaned meetings: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='get_cached_summary')
+def get_cached_summary(key, db_path=None):
+    """Return the cached summary for key and mark it as recently used, or None."""
+    try:
+        with connection(db_path) as conn:
+            row = conn.execute(SELECT_CACHED_SUMMARY_SQL, (key,)).fetchone()
+            if row:
+                conn.execute(TOUCH_CACHED_SUMMARY_SQL, (datetime.datetime.now(), key))
+            return row[0] if row else None
+    except Exception as e:
+        print(f"Error reading cached summary: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='put_cached_summary')
+def put_cached_summary(key, summary, max_entries, db_path=None):
+    """Store a summary under key, evicting least recently used rows beyond max_entries.
+
+    Returns the number of evicted rows.
+    """
+    try:
+        with connection(db_path) as conn:
+            now = datetime.datetime.now()
+            conn.execute(INSERT_CACHED_SUMMARY_SQL, (key, summary, now, now))
+            excess = conn.execute(COUNT_CACHED_SUMMARIES_SQL).fetchone()[0] - max_entries
+            if excess > 0:
+                conn.execute(EVICT_CACHED_SUMMARIES_SQL, (excess,))
+            return max(excess, 0)
+    except Exception as e:
+        print(f"Error caching summary: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='enqueue_email')
+def enqueue_email(recipients, subject, body, db_path=None, meeting_id=None):
+    """Add an email, optionally about meeting_id, to the outbox and return its message id."""
+    try:
+        with connection(db_path) as conn:
+            now = datetime.datetime.now()
+            cursor = conn.execute(
+                INSERT_OUTBOX_SQL, (json.dumps(list(recipients)), subject, body, now, now, meeting_id)
+            )
+            return cursor.lastrowid
+    except Exception as e:
+        print(f"Error queueing email: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='claim_due_emails')
+def claim_due_emails(limit, db_path=None, owner=None):
+    """Mark up to limit queued emails that are due as sending by process owner and return them.
+
+    Each message is a dict with id, recipients, subject, body, attempts and
+    meeting_id, where attempts already counts the delivery about to be made.
+    """
+    try:
+        with connection(db_path) as conn:
+            now = datetime.datetime.now()
+            rows = conn.execute(SELECT_DUE_OUTBOX_SQL, (now, limit)).fetchall()
+            messages = []
+            for message_id, recipients, subject, body, attempts, meeting_id in rows:
+                if conn.execute(CLAIM_OUTBOX_SQL, (owner, now, message_id)).rowcount:
+                    messages.append({
+                        'id': message_id,
+                        'recipients': json.loads(recipients),
+                        'subject': subject,
+                        'body': body,
+                        'attempts': attempts + 1,
+                        'meeting_id': meeting_id
+                    })
+            return messages
+    except Exception as e:
+        print(f"Error claiming queued emails: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='mark_email_sent')
+def mark_email_sent(message_id, db_path=None):
+    """Record that an outbox message was delivered."""
+    try:
+        with connection(db_path) as conn:
+            conn.execute(MARK_OUTBOX_SENT_SQL, (datetime.datetime.now(), message_id))
+    except Exception as e:
+        print(f"Error marking email {message_id} sent: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='mark_email_failed')
+def mark_email_failed(message_id, error, retry_at=None, db_path=None):
+    """Record a failed delivery, queueing a retry at retry_at or failing the message for good."""
+    try:
+        with connection(db_path) as conn:
+            if retry_at:
+                conn.execute(MARK_OUTBOX_RETRY_SQL, (error, retry_at, message_id))
+            else:
+                conn.execute(MARK_OUTBOX_FAILED_SQL, (error, message_id))
+    except Exception as e:
+        print(f"Error marking email {message_id} failed: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='requeue_sending_emails')
+def requeue_sending_emails(owner, is_owner_alive, grace_seconds, db_path=None):
+    """Return emails left in 'sending' by a stopped sender to the queue; returns their count.
+
+    Called by owner before its sender starts, so its own claims are always
+    interrupted. Another process's claims are requeued when
+    is_owner_alive(owner) is False or they are older than grace_seconds,
+    the same way claim_orphaned_meetings treats meetings.
+    """
+    try:
+        cutoff = (datetime.datetime.now() - datetime.timedelta(seconds=grace_seconds)).isoformat(' ')
+        requeued = 0
+        with connection(db_path) as conn:
+            for message_id, message_owner, claimed_at in conn.execute(SELECT_SENDING_OUTBOX_SQL).fetchall():
+                if message_owner and message_owner != owner and is_owner_alive(message_owner) \
+                        and claimed_at and claimed_at >= cutoff:
+                    continue
+                requeued += conn.execute(REQUEUE_SENDING_OUTBOX_SQL, (message_id,)).rowcount
+        return requeued
+    except Exception as e:
+        print(f"Error requeueing emails: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='next_email_attempt')
+def next_email_attempt(db_path=None):
+    """Return when the earliest queued email is due, or None if the queue is empty."""
+    try:
+        with connection(db_path) as conn:
+            value = conn.execute(NEXT_OUTBOX_ATTEMPT_SQL).fetchone()[0]
+            return datetime.datetime.fromisoformat(value) if value else None
+    except Exception as e:
+        print(f"Error reading outbox schedule: {str(e)}")
+        raise e
+
+@timed(DB_QUERY_DURATION, function='get_outbox_message')
+def get_outbox_message(message_id, db_path=None):
+    """Return the delivery status of an outbox message, or None if it does not exist."""
+    try:
+        with connection(db_path) as conn:
+            row = conn.execute(SELECT_OUTBOX_SQL, (message_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            'message_id': row[0],
+            'recipients': json.loads(row[1]),
+            'subject': row[2],
+            'status': row[3],
+            'attempts': row[4],
+            'last_error': row[5],
+            'created_at': row[6],
+            'next_attempt_at': row[7],
+            'sent_at': row[8]
+        }
+    except Exception as e:
+        print(f"Error getting outbox message {message_id}: {str(e)}")
+        raise e
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Meeting database maintenance")
+    parser.add_argument('command', choices=['init', 'rebuild-search-index'])
+    parser.add_argument('--db', default=config.settings.database_path, help="Path to the SQLite database")
+    args = parser.parse_args()
+
+    init_db(args.db)
+    if args.command == 'rebuild-search-index':
+        count = rebuild_search_index(args.db)
+        print(f"Indexed {count} meetings")
+    sys.exit(0)
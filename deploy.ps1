@@ -83,7 +83,7 @@ $appSettings | Get-Member -MemberType NoteProperty | ForEach-Object {
 # Configure Python version and startup command
 Write-Host "Configuring Python version and startup command..."
 az webapp config set --name $appServiceName --resource-group $resourceGroupName --linux-fx-version "PYTHON:3.9"
-az webapp config set --name $appServiceName --resource-group $resourceGroupName --startup-file "gunicorn --bind=0.0.0.0 --timeout 600 app:app"
+az webapp config set --name $appServiceName --resource-group $resourceGroupName --startup-file "gunicorn --config gunicorn.conf.py wsgi:app"
 
 # Enable WebSocket support
 Write-Host "Enabling WebSocket support..."
@@ -1,16 +1,121 @@
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from config import (
-    EMAIL_USER,
-    EMAIL_PASSWORD,
-    EMAIL_SMTP_SERVER,
-    EMAIL_SMTP_PORT
-)
-
-def send_meeting_summary(participants, summary):
-    """Send meeting summary to participants via email."""
+import config
+from metrics import SMTP_SEND_DURATION
+
+def summary_subject():
+    """Return the subject line used for meeting summary emails."""
+    return f"Meeting Summary - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+
+def build_message(recipients, subject, body, sender=None):
+    """Build a plain-text email from sender (email_user of config.settings by default) to recipients."""
+    msg = MIMEMultipart()
+    msg['From'] = sender or config.settings.email_user
+    msg['To'] = ", ".join(recipients)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def describe_smtp_error(e):
+    """Return a user-facing description of an email delivery error."""
+    if isinstance(e, smtplib.SMTPAuthenticationError):
+        error_msg = str(e)
+        if "Application-specific password required" in error_msg:
+            return "Gmail requires an App Password. Please generate one in your Google Account settings."
+        return f"Authentication failed: {error_msg}"
+    if isinstance(e, smtplib.SMTPException):
+        return f"SMTP error: {str(e)}"
+    return f"Failed to send email: {str(e)}"
+
+def is_permanent_smtp_error(e):
+    """Return whether retrying a delivery that raised e cannot succeed.
+
+    5xx replies and rejected recipients are permanent; connection problems and
+    4xx replies are worth retrying.
+    """
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 500 <= e.smtp_code < 600
+    return False
+
+
+class SMTPSession:
+    """A reusable, authenticated SMTP connection.
+
+    The connection is opened on the first send and kept for later sends so a
+    burst of messages pays for TLS and login once. A connection the server
+    has dropped is reopened and the send retried once. Call close_if_idle()
+    periodically to release a connection unused for idle_timeout seconds.
+    The server, credentials and timeouts come from settings (config.settings
+    by default).
+    """
+
+    def __init__(self, idle_timeout=None, timeout=None, settings=None):
+        self.settings = settings or config.settings
+        self.idle_timeout = self.settings.smtp_idle_timeout_seconds if idle_timeout is None else idle_timeout
+        self.timeout = self.settings.smtp_timeout_seconds if timeout is None else timeout
+        self._server = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        settings = self.settings
+        server = smtplib.SMTP(settings.email_smtp_server, int(settings.email_smtp_port), timeout=self.timeout)
+        try:
+            if settings.smtp_starttls:
+                server.starttls()
+            server.login(settings.email_user, settings.email_password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+
+    def send(self, msg):
+        """Send msg, opening or reopening the connection as needed."""
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            for attempt in range(2):
+                if self._server is None:
+                    self._connect()
+                try:
+                    self._server.send_message(msg)
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    self._server = None
+                    if attempt:
+                        raise
+                except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                    # The server answered, so the connection is still usable
+                    raise
+                except Exception:
+                    self.close()
+                    raise
+            self._last_used = time.monotonic()
+            outcome = 'success'
+        finally:
+            SMTP_SEND_DURATION.observe(time.perf_counter() - start, outcome=outcome)
+
+    def close_if_idle(self):
+        """Close the connection if it has not been used for idle_timeout seconds."""
+        if self._server and time.monotonic() - self._last_used >= self.idle_timeout:
+            self.close()
+
+    def close(self):
+        """Close the connection."""
+        server, self._server = self._server, None
+        if server:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+def send_meeting_summary(participants, summary, settings=None):
+    """Send meeting summary to participants via email, with settings (config.settings by default)."""
+    settings = settings or config.settings
     if not participants:
         return False, "No recipients specified"
     
@@ -19,28 +124,22 @@ def send_meeting_summary(participants, summary):
     
     try:
         # Create message
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_USER
-        msg['To'] = ", ".join(participants)
-        msg['Subject'] = f"Meeting Summary - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-        
-        # Add body
-        msg.attach(MIMEText(summary, 'plain'))
+        msg = build_message(participants, summary_subject(), summary, settings.email_user)
         
         # Connect to SMTP server
-        with smtplib.SMTP(EMAIL_SMTP_SERVER, int(EMAIL_SMTP_PORT)) as server:
-            server.starttls()  # Enable TLS
-            server.login(EMAIL_USER, EMAIL_PASSWORD)
-            server.send_message(msg)
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            with smtplib.SMTP(settings.email_smtp_server, int(settings.email_smtp_port)) as server:
+                if settings.smtp_starttls:
+                    server.starttls()  # Enable TLS
+                server.login(settings.email_user, settings.email_password)
+                server.send_message(msg)
+            outcome = 'success'
+        finally:
+            SMTP_SEND_DURATION.observe(time.perf_counter() - start, outcome=outcome)
         
         return True, "Email sent successfully"
-    except smtplib.SMTPAuthenticationError as e:
-        error_msg = str(e)
-        if "Application-specific password required" in error_msg:
-            return False, "Gmail requires an App Password. Please generate one in your Google Account settings."
-        return False, f"Authentication failed: {error_msg}"
-    except smtplib.SMTPException as e:
-        return False, f"SMTP error: {str(e)}"
     except Exception as e:
         print(f"Error sending email: {str(e)}")
-        return False, f"Failed to send email: {str(e)}" 
\ No newline at end of file
+        return False, describe_smtp_error(e) 
\ No newline at end of file
@@ -0,0 +1,33 @@
+from gevent import monkey, socket
+from gunicorn.workers.ggevent import GeventWorker as BaseGeventWorker
+
+
+def patch_process():
+    """Make sockets, SSL, select and sleep cooperative, leaving threads real.
+
+    Queues and subprocesses stay unpatched too: gevent's queues cannot be
+    shared between real threads, which ThreadPoolExecutor relies on, and its
+    subprocesses can only be started from the event loop's thread.
+    """
+    try:
+        # httpcore imports trio when it is installed, and trio needs the select.epoll that gevent removes
+        import trio  # noqa: F401
+    except ImportError:
+        pass
+    monkey.patch_all(thread=False, queue=False, subprocess=False)
+
+
+class GeventWorker(BaseGeventWorker):
+    """gunicorn's gevent worker, leaving threading unpatched.
+
+    Sockets, SSL, select and sleep become cooperative, so one worker holds
+    thousands of idle WebSocket connections, while Speech SDK callbacks and
+    the app's background threads stay real threads (see concurrency.py).
+    """
+
+    def patch(self):
+        patch_process()
+        self.sockets = [
+            socket.socket(s.FAMILY, socket.SOCK_STREAM, fileno=s.sock.fileno())
+            for s in self.sockets
+        ]
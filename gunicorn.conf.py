@@ -0,0 +1,32 @@
+# Gunicorn settings for every way the app is served: startup.sh, startup.txt,
+# deploy.ps1 and `python app.py` all run `gunicorn --config gunicorn.conf.py wsgi:app`.
+import os
+import sys
+from dotenv import load_dotenv
+
+# Importable however gunicorn was started; --chdir only applies to the app
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Served cooperatively unless ASYNC_MODE, here or in .env, says otherwise
+load_dotenv(os.path.join(os.getcwd(), '.env'))
+os.environ.setdefault('ASYNC_MODE', 'gevent')
+
+from config import Settings
+
+settings = Settings()
+
+# Azure App Service passes the port as PORT, or HTTP_PLATFORM_PORT behind IIS
+bind = f"0.0.0.0:{os.getenv('PORT') or os.getenv('HTTP_PLATFORM_PORT') or 5000}"
+workers = settings.web_workers
+timeout = 120
+keepalive = 5
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+
+if settings.async_mode == 'gevent':
+    worker_class = 'gevent_worker.GeventWorker'
+    worker_connections = settings.web_worker_connections
+else:
+    worker_class = 'gthread'
+    threads = settings.web_threads
@@ -0,0 +1,133 @@
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job:
+    """A unit of background work and its observable status."""
+
+    def __init__(self, kind, meeting_id=None, requested_by=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.meeting_id = meeting_id
+        # Socket.IO session id of the client that asked for a job not tied to a meeting
+        self.requested_by = requested_by
+        self.status = QUEUED
+        self.stage = None
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def set_stage(self, stage):
+        """Record the pipeline stage the job is currently in."""
+        self.stage = stage
+        logger.info(f"Job {self.id} ({self.kind}) stage: {stage}")
+
+    def set_progress(self, progress):
+        """Record the fraction of the current stage that is done, from 0 to 1."""
+        self.progress = progress
+
+    def to_dict(self):
+        """Return a JSON-serializable snapshot of the job."""
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'meeting_id': self.meeting_id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """Runs jobs on a bounded worker pool and keeps their status for a retention window.
+
+    max_workers and retention_seconds default to those of config.settings.
+    """
+
+    def __init__(self, max_workers=None, retention_seconds=None, on_complete=None):
+        settings = config.settings
+        self.retention_seconds = settings.job_retention_seconds if retention_seconds is None else retention_seconds
+        self.on_complete = on_complete
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.job_max_workers, thread_name_prefix='job'
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, meeting_id=None, requested_by=None, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return the new Job.
+
+        The function's return value becomes the job result; an exception marks
+        the job as failed. on_complete(job) is called when the job finishes.
+        """
+        job = Job(kind, meeting_id=meeting_id, requested_by=requested_by)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = SUCCEEDED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+        if self.on_complete:
+            try:
+                self.on_complete(job)
+            except Exception as e:
+                logger.error(f"Error notifying completion of job {job.id}: {str(e)}")
+        return job
+
+    def get(self, job_id):
+        """Return the Job with job_id, or None if unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes and return it."""
+        job = self.get(job_id)
+        if job and job.future:
+            job.future.result(timeout=timeout)
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
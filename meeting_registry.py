@@ -0,0 +1,142 @@
+import threading
+import time
+import uuid
+import logging
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class MeetingLimitReached(Exception):
+    """Raised when the registry already hosts the maximum number of meetings."""
+
+
+class MeetingRegistry:
+    """Thread-safe registry of active MeetingTranscriber instances keyed by meeting id.
+
+    max_meetings, idle_timeout and the reaper interval default to settings
+    (config.settings when not given).
+    """
+
+    def __init__(self, max_meetings=None, idle_timeout=None, on_reap=None, settings=None):
+        self.settings = settings or config.settings
+        self.max_meetings = self.settings.max_concurrent_meetings if max_meetings is None else max_meetings
+        self.idle_timeout = self.settings.meeting_idle_timeout_seconds if idle_timeout is None else idle_timeout
+        self.on_reap = on_reap
+        self._meetings = {}
+        self._starting = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reaper_thread = None
+
+    def start_meeting(self, factory):
+        """Create a transcriber with factory(meeting_id), start it and register it.
+
+        Returns (meeting_id, transcriber). Raises MeetingLimitReached when the
+        number of running recognizers is already at the configured cap.
+        """
+        with self._lock:
+            if len(self._meetings) + self._starting >= self.max_meetings:
+                raise MeetingLimitReached(
+                    f"Maximum of {self.max_meetings} concurrent meetings reached"
+                )
+            # Reserve a slot so concurrent starts cannot overshoot the cap
+            self._starting += 1
+
+        meeting_id = uuid.uuid4().hex
+        try:
+            transcriber = factory(meeting_id)
+            transcriber.start_recording()
+        except Exception:
+            with self._lock:
+                self._starting -= 1
+            raise
+
+        with self._lock:
+            self._starting -= 1
+            self._meetings[meeting_id] = transcriber
+        logger.info(f"Registered meeting {meeting_id} ({len(self)} active)")
+        return meeting_id, transcriber
+
+    def get(self, meeting_id):
+        """Return the transcriber for meeting_id, or None."""
+        with self._lock:
+            return self._meetings.get(meeting_id)
+
+    def pop(self, meeting_id):
+        """Unregister and return the transcriber for meeting_id, or None."""
+        with self._lock:
+            return self._meetings.pop(meeting_id, None)
+
+    def pop_only(self):
+        """Unregister and return (meeting_id, transcriber) if exactly one meeting is active."""
+        with self._lock:
+            if len(self._meetings) != 1:
+                return None, None
+            meeting_id = next(iter(self._meetings))
+            return meeting_id, self._meetings.pop(meeting_id)
+
+    def meeting_ids(self):
+        """Return a snapshot of the active meeting ids."""
+        with self._lock:
+            return list(self._meetings)
+
+    def transcribers(self):
+        """Return a snapshot of the active transcribers."""
+        with self._lock:
+            return list(self._meetings.values())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._meetings)
+
+    def reap_idle(self, now=None):
+        """Unregister meetings with no recognition activity for idle_timeout seconds.
+
+        Each reaped transcriber is handed to on_reap (or simply stopped when no
+        callback is configured). Returns the list of reaped meeting ids.
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            idle = [
+                (meeting_id, transcriber)
+                for meeting_id, transcriber in self._meetings.items()
+                if now - transcriber.last_activity > self.idle_timeout
+            ]
+            for meeting_id, _ in idle:
+                del self._meetings[meeting_id]
+
+        for meeting_id, transcriber in idle:
+            logger.info(f"Reaping idle meeting {meeting_id}")
+            try:
+                if self.on_reap:
+                    self.on_reap(meeting_id, transcriber)
+                else:
+                    transcriber.stop_recording()
+            except Exception as e:
+                logger.error(f"Error reaping meeting {meeting_id}: {str(e)}")
+        return [meeting_id for meeting_id, _ in idle]
+
+    def start_reaper(self, interval=None):
+        """Start a daemon thread that periodically reaps idle meetings."""
+        if self._reaper_thread and self._reaper_thread.is_alive():
+            return
+        if interval is None:
+            interval = self.settings.meeting_reap_interval_seconds
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(interval):
+                self.reap_idle()
+
+        self._reaper_thread = threading.Thread(
+            target=run, name='meeting-reaper', daemon=True
+        )
+        self._reaper_thread.start()
+
+    def stop_reaper(self):
+        """Stop the idle-meeting reaper thread."""
+        self._stop_event.set()
+        if self._reaper_thread:
+            self._reaper_thread.join(timeout=5)
+            self._reaper_thread = None
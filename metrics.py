@@ -0,0 +1,288 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in seconds, from 1 ms to 1 minute
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class for a named metric with a fixed set of label names."""
+
+    type_name = None
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        """Return the metric in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Metric):
+    """A value that can go up and down, or be computed by a callback at scrape time."""
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, label_names=(), function=None):
+        super().__init__(name, documentation, label_names)
+        self.function = function
+        self._values = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        if self.function:
+            return self.function()
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        if self.function:
+            try:
+                return [f"{self.name} {_format_value(self.function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Counts observations into cumulative buckets and tracks their sum."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _samples(self):
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them for /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add metric, or return the already registered metric of the same name."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=(), function=None):
+        return self.register(Gauge(name, documentation, label_names, function))
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Pipeline metrics shared across modules
+TRANSCRIPT_EMIT_LATENCY = registry.histogram(
+    'transcript_emit_latency_seconds',
+    'Time from a recognized speech event to its Socket.IO emit'
+)
+TRANSCRIPT_ENTRIES = registry.counter(
+    'transcript_entries_total',
+    'Recognized transcript entries emitted to clients'
+)
+OPENAI_REQUEST_DURATION = registry.histogram(
+    'openai_request_duration_seconds',
+    'Azure OpenAI chat completion duration',
+    ('operation', 'outcome')
+)
+OPENAI_TOKENS = registry.counter(
+    'openai_tokens_total',
+    'Azure OpenAI tokens used; streamed responses are estimated',
+    ('type',)
+)
+OPENAI_RETRIES = registry.counter(
+    'openai_retries_total',
+    'Azure OpenAI requests retried, by reason (rate_limited, server_error, timeout or connection)',
+    ('reason',)
+)
+OPENAI_RATE_LIMIT_WAIT = registry.histogram(
+    'openai_rate_limit_wait_seconds',
+    'Time Azure OpenAI requests waited for the client-side rate limiter'
+)
+OPENAI_HEDGED_REQUESTS = registry.counter(
+    'openai_hedged_requests_total',
+    'Azure OpenAI requests hedged with a second attempt, by which attempt answered first',
+    ('winner',)
+)
+DB_QUERY_DURATION = registry.histogram(
+    'db_query_duration_seconds',
+    'SQLite call duration by database function',
+    ('function',)
+)
+SUMMARY_PROMPT_TOKENS = registry.counter(
+    'summary_prompt_tokens_total',
+    'Transcript tokens sent for summarization, before (raw) and after (compacted) compaction',
+    ('stage',)
+)
+SUMMARY_CACHE_REQUESTS = registry.counter(
+    'summary_cache_requests_total',
+    'Summary cache lookups by result (memory_hit, db_hit or miss)',
+    ('result',)
+)
+RECOGNIZER_POOL_REQUESTS = registry.counter(
+    'recognizer_pool_requests_total',
+    'Meetings started with a pre-connected recognizer (hit) or a new one (miss)',
+    ('result',)
+)
+AUDIO_FRAMES = registry.counter(
+    'audio_frames_total',
+    'Browser audio frames received by result (accepted or dropped)',
+    ('result',)
+)
+SMTP_SEND_DURATION = registry.histogram(
+    'smtp_send_duration_seconds',
+    'SMTP delivery duration',
+    ('outcome',)
+)
+OUTBOX_DELIVERIES = registry.counter(
+    'outbox_deliveries_total',
+    'Outbox delivery attempts by outcome (sent, retry or failed)',
+    ('outcome',)
+)
+
+
+def timed(histogram, **labels):
+    """Decorator observing the duration of every call of the wrapped function."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def percentiles(samples):
+    """Summarize latency samples in seconds as nearest-rank percentiles in milliseconds."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * 1000
+
+    return {
+        'count': len(ordered),
+        'p50': round(rank(50), 3),
+        'p95': round(rank(95), 3),
+        'p99': round(rank(99), 3),
+        'max': round(ordered[-1] * 1000, 3),
+        'mean': round(sum(ordered) / len(ordered) * 1000, 3)
+    }
@@ -0,0 +1,337 @@
+"""Resilient access to Azure OpenAI chat completions.
+
+ResilientOpenAI wraps the shared AzureOpenAI client, whose SDK retries are
+turned off, and adds the following:
+
+- A deadline for each call, covering every attempt and backoff.
+- Exponential backoff with jitter. A Retry-After header from the service
+  overrides it.
+- A process-wide limiter for requests and tokens per minute. A 429 with
+  Retry-After pauses every caller, not just the one that got it.
+- A circuit breaker that fails calls fast while the deployment keeps timing
+  out or returning server errors.
+- Optional hedging for non-streamed calls. If the first attempt is slow, a
+  second one is sent and the first answer wins.
+"""
+import email.utils
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import openai
+import config
+from metrics import OPENAI_RETRIES, OPENAI_RATE_LIMIT_WAIT, OPENAI_HEDGED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call cannot finish within its deadline."""
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the service while the circuit breaker is open."""
+
+
+def build_http_client(settings=None):
+    """Return the HTTP client, and so the connection pool, shared by every OpenAI request."""
+    settings = settings or config.settings
+    # openai exposes the Limits and Timeout types of the HTTP library it is built on
+    limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_connections,
+        keepalive_expiry=settings.openai_keepalive_seconds
+    )
+    return openai.DefaultHttpxClient(limits=limits, timeout=openai.Timeout(
+        settings.openai_request_timeout_seconds, connect=settings.openai_connect_timeout_seconds
+    ))
+
+
+def failure_reason(error):
+    """Return why a failed request is worth retrying, or None when it is not."""
+    if isinstance(error, openai.APITimeoutError):
+        return 'timeout'
+    if isinstance(error, openai.APIConnectionError):
+        return 'connection'
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code == 429:
+            return 'rate_limited'
+        if error.status_code in (408, 409) or error.status_code >= 500:
+            return 'server_error'
+    return None
+
+
+def retry_after(error):
+    """Return the seconds the service asked callers to wait, or None."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return max(0.0, float(headers['retry-after-ms']) / 1000)
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base, cap):
+    """Exponential backoff with full jitter for retry number attempt (0 for the first retry)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _Bucket:
+    def __init__(self, per_minute, capacity, now):
+        self.rate = per_minute / 60
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # A request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, shared by every caller in the process.
+
+    Requests may burst to ten seconds' worth, since Azure enforces request
+    quotas over short windows; tokens may burst to a minute's worth so a large
+    summarization prompt still fits. A limit of 0 is unlimited; limits not
+    given are taken from settings (config.settings by default).
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, clock=time.monotonic, settings=None):
+        settings = settings or config.settings
+        if requests_per_minute is None:
+            requests_per_minute = settings.openai_requests_per_minute
+        if tokens_per_minute is None:
+            tokens_per_minute = settings.openai_tokens_per_minute
+        self.clock = clock
+        now = clock()
+        self._requests = _Bucket(requests_per_minute, max(1, requests_per_minute // 6), now) \
+            if requests_per_minute else None
+        self._tokens = _Bucket(tokens_per_minute, tokens_per_minute, now) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Hold every caller for seconds, e.g. when the service answers 429 with Retry-After."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def _wait_time(self, tokens, now):
+        waits = [self._paused_until - now]
+        for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+            if bucket:
+                bucket.refill(now)
+                waits.append(bucket.wait_time(amount))
+        return max(waits)
+
+    def _take(self, tokens):
+        if self._requests:
+            self._requests.level -= 1
+        if self._tokens:
+            self._tokens.level -= min(tokens, self._tokens.capacity)
+
+    def try_acquire(self, tokens=0):
+        """Take capacity for one request of tokens if it is available now; returns whether it was."""
+        with self._lock:
+            if self._wait_time(tokens, self.clock()) > 0:
+                return False
+            self._take(tokens)
+            return True
+
+    def acquire(self, tokens=0, deadline=None):
+        """Wait until one request of tokens fits, then take it; returns the seconds waited.
+
+        Raises DeadlineExceeded, without waiting, when the wait would run past
+        deadline (a time.monotonic() value).
+        """
+        start = self.clock()
+        while True:
+            with self._lock:
+                now = self.clock()
+                delay = self._wait_time(tokens, now)
+                if delay <= 0:
+                    self._take(tokens)
+                    waited = now - start
+                    OPENAI_RATE_LIMIT_WAIT.observe(waited)
+                    return waited
+            if deadline is not None and now + delay > deadline:
+                raise DeadlineExceeded(f"Rate limit wait of {delay:.1f}s exceeds the deadline")
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    """Fails calls fast after failure_threshold consecutive failures, for reset_seconds.
+
+    After reset_seconds one trial call goes through (half-open); its success
+    closes the circuit and its failure opens it again. A threshold of 0
+    disables the breaker. Values not given are taken from settings.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=None, reset_seconds=None, clock=time.monotonic, settings=None):
+        settings = settings or config.settings
+        self.failure_threshold = settings.openai_circuit_failure_threshold if failure_threshold is None \
+            else failure_threshold
+        self.reset_seconds = settings.openai_circuit_reset_seconds if reset_seconds is None else reset_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.state != self.CLOSED
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not go out."""
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_seconds - self.clock()
+                if remaining > 0:
+                    raise CircuitOpenError(
+                        f"Azure OpenAI circuit open after {self.failures} failures; retrying in {remaining:.0f}s"
+                    )
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    raise CircuitOpenError("Azure OpenAI circuit half-open; waiting for the trial request")
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Azure OpenAI circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failure_threshold and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    logger.warning(f"Azure OpenAI circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+
+
+class ResilientOpenAI:
+    """Chat completions through the shared client with deadlines, retries, rate limiting,
+    a circuit breaker and optional hedging.
+
+    get_client returns the AzureOpenAI client; it is called for every attempt
+    so the client can be created lazily. Values not given are taken from
+    settings (config.settings by default).
+    """
+
+    def __init__(self, get_client, limiter=None, breaker=None, max_retries=None, deadline_seconds=None,
+                 request_timeout=None, hedge_after=None, sleep=time.sleep, settings=None):
+        settings = settings or config.settings
+        self.get_client = get_client
+        self.limiter = limiter or RateLimiter(settings=settings)
+        self.breaker = breaker or CircuitBreaker(settings=settings)
+        self.max_retries = settings.openai_max_retries if max_retries is None else max_retries
+        self.deadline_seconds = settings.openai_deadline_seconds if deadline_seconds is None else deadline_seconds
+        self.request_timeout = settings.openai_request_timeout_seconds if request_timeout is None \
+            else request_timeout
+        self.hedge_after = settings.openai_hedge_after_seconds if hedge_after is None else hedge_after
+        self.backoff_base = settings.openai_backoff_base_seconds
+        self.backoff_max = settings.openai_backoff_max_seconds
+        self.sleep = sleep
+        # Runs both attempts of hedged requests
+        self.hedge_pool = ThreadPoolExecutor(
+            max_workers=settings.openai_max_connections, thread_name_prefix='openai-hedge'
+        )
+
+    def create(self, tokens=0, deadline_seconds=None, **kwargs):
+        """Run chat.completions.create(**kwargs) and return its response.
+
+        tokens is the request's estimated cost for the token limiter (prompt
+        plus max_tokens). With stream=True, only opening the stream is retried;
+        a stream that fails midway raises to the caller.
+        """
+        deadline = time.monotonic() + (deadline_seconds or self.deadline_seconds)
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens, deadline)
+            timeout = min(self.request_timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise DeadlineExceeded("Azure OpenAI deadline reached before the request was sent")
+            # Only once the request is certain to go out, since a half-open circuit
+            # lets a single trial through and waits for its outcome
+            self.breaker.before_call()
+            try:
+                response = self._attempt(kwargs, timeout, tokens)
+            except Exception as e:
+                reason = failure_reason(e)
+                if reason in ('timeout', 'connection', 'server_error'):
+                    self.breaker.record_failure()
+                else:
+                    # The service answered, so it is reachable
+                    self.breaker.record_success()
+                if not reason or attempt >= self.max_retries:
+                    raise
+                delay = retry_after(e)
+                requested = delay is not None
+                if not requested:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                if time.monotonic() + delay >= deadline:
+                    raise DeadlineExceeded(f"Azure OpenAI deadline reached after {attempt + 1} attempts: {e}") from e
+                OPENAI_RETRIES.inc(reason=reason)
+                logger.warning(f"Azure OpenAI request failed ({reason}), retrying in {delay:.1f}s: {str(e)}")
+                if requested:
+                    # Every caller waits out Retry-After in the limiter, not just this one
+                    self.limiter.pause(delay)
+                else:
+                    self.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return response
+
+    def _attempt(self, kwargs, timeout, tokens):
+        def call(timeout):
+            return self.get_client().chat.completions.create(timeout=timeout, **kwargs)
+
+        # Streams are not hedged, since both would push deltas to clients
+        if not self.hedge_after or kwargs.get('stream') or timeout <= self.hedge_after:
+            return call(timeout)
+        primary = self.hedge_pool.submit(call, timeout)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        # Do not add load to a deployment the limiter is already holding back
+        if done or not self.limiter.try_acquire(tokens):
+            return primary.result()
+        hedge = self.hedge_pool.submit(call, timeout - self.hedge_after)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    OPENAI_HEDGED_REQUESTS.inc(winner='hedge' if future is hedge else 'primary')
+                    return future.result()
+                error = future.exception()
+        raise error
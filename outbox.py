@@ -0,0 +1,143 @@
+import datetime
+import threading
+import logging
+from database import (
+    enqueue_email, claim_due_emails, mark_email_sent, mark_email_failed,
+    requeue_sending_emails, next_email_attempt, get_outbox_message
+)
+from email_service import SMTPSession, build_message, describe_smtp_error, is_permanent_smtp_error
+from metrics import OUTBOX_DELIVERIES
+from segment_writer import PROCESS_OWNER, is_owner_alive
+import config
+
+logger = logging.getLogger(__name__)
+
+SENT = 'sent'
+RETRY = 'retry'
+FAILED = 'failed'
+
+def retry_delay(attempts, base, maximum):
+    """Return the backoff in seconds before retrying a message after its attempts-th failure."""
+    return min(base * 2 ** (attempts - 1), maximum)
+
+
+class OutboxSender:
+    """Delivers queued outbox emails from a background thread.
+
+    Request handlers only insert into the outbox table. The sender thread
+    claims due messages in batches of up to batch_size and sends them over
+    one SMTPSession, so a burst of messages shares a single TLS handshake and
+    login. Transient failures are retried with exponential backoff until
+    max_attempts is reached. on_status(message_id, status, error, meeting_id)
+    is called after every attempt. Messages are claimed in the name of owner, so
+    starting another worker does not resend what this one is sending.
+    Limits, backoff and the SMTP session come from settings (config.settings
+    by default) unless given explicitly.
+    """
+
+    def __init__(self, db_path=None, batch_size=None, poll_interval=None, max_attempts=None, session=None,
+                 on_status=None, owner=PROCESS_OWNER, claim_timeout=None, settings=None):
+        self.settings = settings or config.settings
+        self.db_path = db_path
+        self.owner = owner
+        self.claim_timeout = self.settings.outbox_claim_timeout_seconds if claim_timeout is None else claim_timeout
+        self.batch_size = batch_size or self.settings.outbox_batch_size
+        self.poll_interval = self.settings.outbox_poll_seconds if poll_interval is None else poll_interval
+        self.max_attempts = max_attempts or self.settings.outbox_max_attempts
+        self.retry_base = self.settings.outbox_retry_base_seconds
+        self.retry_max = self.settings.outbox_retry_max_seconds
+        self.session = session or SMTPSession(settings=self.settings)
+        self.on_status = on_status
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Requeue messages interrupted by a previous stop and start the sender thread."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            requeued = requeue_sending_emails(self.owner, is_owner_alive, self.claim_timeout, self.db_path)
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted outbox messages")
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='outbox-sender', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the sender thread and close the SMTP connection."""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def enqueue(self, recipients, subject, body, meeting_id=None):
+        """Queue an email, optionally about meeting_id, and return its message id without waiting for SMTP."""
+        message_id = enqueue_email(recipients, subject, body, self.db_path, meeting_id=meeting_id)
+        self._wake.set()
+        return message_id
+
+    def status(self, message_id):
+        """Return the delivery status of a message, or None if it does not exist."""
+        return get_outbox_message(message_id, self.db_path)
+
+    def send_due(self):
+        """Deliver every message that is currently due; returns the number attempted."""
+        attempted = 0
+        while True:
+            messages = claim_due_emails(self.batch_size, self.db_path, owner=self.owner)
+            for message in messages:
+                self._deliver(message)
+            attempted += len(messages)
+            if len(messages) < self.batch_size:
+                return attempted
+
+    def _deliver(self, message):
+        try:
+            self.session.send(build_message(message['recipients'], message['subject'], message['body'], self.settings.email_user))
+        except Exception as e:
+            error = describe_smtp_error(e)
+            if is_permanent_smtp_error(e) or message['attempts'] >= self.max_attempts:
+                outcome, retry_at = FAILED, None
+                logger.error(f"Giving up on outbox message {message['id']}: {error}")
+            else:
+                outcome = RETRY
+                retry_at = datetime.datetime.now() + datetime.timedelta(seconds=retry_delay(message['attempts'], self.retry_base, self.retry_max))
+                logger.warning(f"Outbox message {message['id']} failed, retrying at {retry_at}: {error}")
+            mark_email_failed(message['id'], error, retry_at, self.db_path)
+            self._notify(message, outcome, error)
+            return
+        mark_email_sent(message['id'], self.db_path)
+        self._notify(message, SENT, None)
+
+    def _notify(self, message, outcome, error):
+        OUTBOX_DELIVERIES.inc(outcome=outcome)
+        if self.on_status:
+            try:
+                self.on_status(message['id'], 'queued' if outcome == RETRY else outcome, error, message.get('meeting_id'))
+            except Exception as e:
+                logger.error(f"Error in outbox status callback: {str(e)}")
+
+    def _next_wait(self):
+        """Seconds until the next queued message is due, capped at poll_interval."""
+        due = next_email_attempt(self.db_path)
+        if due is None:
+            return self.poll_interval
+        return min(max((due - datetime.datetime.now()).total_seconds(), 0), self.poll_interval)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.send_due()
+                wait = self._next_wait()
+            except Exception as e:
+                logger.error(f"Error draining outbox: {str(e)}")
+                wait = self.poll_interval
+            # Keep the SMTP session warm while messages keep arriving, and let it go once idle
+            if self._wake.wait(min(wait, self.session.idle_timeout)):
+                self._wake.clear()
+            else:
+                self.session.close_if_idle()
+        self.session.close()
@@ -0,0 +1,141 @@
+import threading
+import time
+import logging
+import azure.cognitiveservices.speech as speechsdk
+import config
+from audio_stream import stream_format, stream_key
+from transcriber import get_speech_config
+from metrics import RECOGNIZER_POOL_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+OPENING = 'opening'
+CONNECTED = 'connected'
+DISCONNECTED = 'disconnected'
+
+
+class WarmRecognizer:
+    """A recognizer reading from its own push stream, with its service connection opened ahead of use."""
+
+    def __init__(self, key, push_stream, recognizer, connection, created_at):
+        self.key = key
+        self.push_stream = push_stream
+        self.recognizer = recognizer
+        self.connection = connection
+        self.created_at = created_at
+        self.state = OPENING
+
+    def close(self):
+        """Close the service connection; the push stream belongs to the meeting's AudioStream once acquired."""
+        try:
+            self.connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing recognizer connection: {str(e)}")
+
+
+class RecognizerPool:
+    """Keeps recognizers for one audio format ready for new meetings.
+
+    Every recognizer shares one SpeechConfig and has its own push
+    stream, and its connection is opened with speechsdk.Connection.open as soon
+    as it is built. A background thread refills the pool after each acquire and
+    every check_interval replaces recognizers whose connection dropped or that
+    sat idle for max_idle seconds, before the service closes them.
+    acquire() never builds; on a miss the caller builds a recognizer as before.
+    The speech config and values not given are taken from settings
+    (config.settings by default).
+    """
+
+    def __init__(self, audio_format, size=None, max_idle=None, check_interval=None, clock=time.monotonic,
+                 settings=None):
+        self.settings = settings or config.settings
+        self.audio_format = audio_format
+        self.key = stream_key(audio_format)
+        self.size = self.settings.recognizer_pool_size if size is None else size
+        self.max_idle = self.settings.recognizer_pool_max_idle_seconds if max_idle is None else max_idle
+        self.check_interval = self.settings.recognizer_pool_check_seconds if check_interval is None \
+            else check_interval
+        self.clock = clock
+        self._idle = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle)
+
+    def start(self):
+        """Start the thread that fills and checks the pool."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='recognizer-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for warm in idle:
+            warm.close()
+
+    def acquire(self, audio_format):
+        """Return a ready WarmRecognizer for audio_format, or None if there is none."""
+        warm = None
+        if stream_key(audio_format) == self.key:
+            with self._lock:
+                # Prefer connected recognizers, then ones still connecting
+                for state in (CONNECTED, OPENING):
+                    warm = next((w for w in self._idle if w.state == state), None)
+                    if warm:
+                        self._idle.remove(warm)
+                        break
+        RECOGNIZER_POOL_REQUESTS.inc(result='hit' if warm else 'miss')
+        self._wake.set()
+        return warm
+
+    def build(self):
+        """Build a recognizer on a new push stream and start opening its connection."""
+        push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format(self.audio_format))
+        recognizer = speechsdk.SpeechRecognizer(
+            speech_config=get_speech_config(self.settings),
+            audio_config=speechsdk.audio.AudioConfig(stream=push_stream)
+        )
+        connection = speechsdk.Connection.from_recognizer(recognizer)
+        warm = WarmRecognizer(self.key, push_stream, recognizer, connection, self.clock())
+        connection.connected.connect(lambda evt: setattr(warm, 'state', CONNECTED))
+        connection.disconnected.connect(lambda evt: setattr(warm, 'state', DISCONNECTED))
+        connection.open(True)
+        return warm
+
+    def check(self):
+        """Drop dropped and stale recognizers, then build up to size."""
+        now = self.clock()
+        with self._lock:
+            stale = [w for w in self._idle if w.state == DISCONNECTED or now - w.created_at >= self.max_idle]
+            self._idle = [w for w in self._idle if w not in stale]
+            missing = self.size - len(self._idle)
+        for warm in stale:
+            warm.close()
+        for _ in range(missing):
+            if self._stop_event.is_set():
+                return
+            warm = self.build()
+            with self._lock:
+                self._idle.append(warm)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake.clear()
+            try:
+                self.check()
+            except Exception as e:
+                # Typically missing or wrong speech credentials; meetings still start without the pool
+                logger.error(f"Error filling recognizer pool: {str(e)}")
+            self._wake.wait(self.check_interval)
@@ -0,0 +1,304 @@
+"""Capture and offline replay of Speech SDK recognition events.
+
+Meetings started with RECOGNITION_CAPTURE_DIR set write every recognized
+result (text, offset, duration and word timings) to a gzip-compressed JSONL
+file. Replaying a capture feeds the same results through
+MeetingTranscriber.handle_result without Azure, at the recorded pace, faster,
+or as fast as possible:
+
+    python replay.py captures/<meeting>.jsonl.gz --speed max --persist --profile replay.prof
+"""
+import argparse
+import cProfile
+import collections
+import gzip
+import json
+import os
+import pstats
+import queue
+import sys
+import tempfile
+import threading
+import time
+import logging
+from types import SimpleNamespace
+import azure.cognitiveservices.speech as speechsdk
+from metrics import percentiles
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_VERSION = 1
+
+
+def result_words(result):
+    """Return [word, offset, duration] for each word of a result's best detailed hypothesis."""
+    try:
+        best = json.loads(result.json)['NBest'][0]
+        return [[word['Word'], word['Offset'], word['Duration']] for word in best.get('Words', ())]
+    except (AttributeError, TypeError, ValueError, KeyError, IndexError):
+        return []
+
+
+def capture_path(directory, meeting_id):
+    """Return the capture file path for a meeting starting now."""
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{meeting_id}.jsonl.gz")
+
+
+class RecognitionRecorder:
+    """Writes the recognized events of one meeting to a capture file from a background thread.
+
+    The first line is a header; every following line is one event with t,
+    the seconds since the capture started. Recognition callbacks only enqueue.
+    """
+
+    def __init__(self, path, meeting_id=None):
+        self.path = path
+        self.meeting_id = meeting_id
+        self.events = 0
+        self._started = time.monotonic()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='recognition-recorder', daemon=True)
+        self._thread.start()
+
+    def record(self, evt):
+        """Queue a recognized event for writing; never blocks."""
+        result = evt.result
+        self._queue.put_nowait((time.monotonic() - self._started, result))
+
+    def close(self, timeout=10):
+        """Write the remaining events and close the file."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'version': CAPTURE_VERSION,
+                    'meeting_id': self.meeting_id,
+                    'started_at': time.time()
+                }) + "\n")
+                while True:
+                    item = self._queue.get()
+                    if item is None:
+                        return
+                    t, result = item
+                    f.write(json.dumps({
+                        't': round(t, 4),
+                        'text': result.text,
+                        'offset': result.offset,
+                        'duration': result.duration,
+                        'words': result_words(result)
+                    }) + "\n")
+                    self.events += 1
+        except Exception as e:
+            logger.error(f"Error writing recognition capture {self.path}: {str(e)}")
+
+
+def read_capture(path):
+    """Return (header, events) from a capture file."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture version {header.get('version')} in {path}")
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+def make_event(event):
+    """Build an object shaped like a recognized SDK event from a captured event."""
+    detailed = {
+        'DisplayText': event['text'],
+        'Offset': event['offset'],
+        'Duration': event['duration'],
+        'NBest': [{
+            'Display': event['text'],
+            'Words': [{'Word': w, 'Offset': o, 'Duration': d} for w, o, d in event['words']]
+        }]
+    }
+    result = SimpleNamespace(
+        reason=speechsdk.ResultReason.RecognizedSpeech,
+        text=event['text'],
+        offset=event['offset'],
+        duration=event['duration'],
+        json=json.dumps(detailed)
+    )
+    return SimpleNamespace(result=result, session_id='replay')
+
+
+class ReplayClock:
+    """Clock for MeetingTranscriber that reads the capture time of the event being replayed."""
+
+    def __init__(self, now=None):
+        self.now = now if now is not None else time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def replay(events, transcriber, speed=1.0, clock=None):
+    """Feed captured events to transcriber.handle_result.
+
+    speed 1 keeps the recorded pace, 10 runs ten times faster and None as fast
+    as possible. When clock is the transcriber's ReplayClock it is set to each
+    event's capture time, so the speaker heuristic sees the recorded gaps at
+    any speed. Returns throughput and handle_result latency.
+    """
+    base = clock.now if clock else time.time()
+    handler_seconds = []
+    start = time.perf_counter()
+    for event in events:
+        if speed:
+            delay = start + event['t'] / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if clock:
+            clock.now = base + event['t']
+        evt = make_event(event)
+        handled = time.perf_counter()
+        transcriber.handle_result(evt)
+        handler_seconds.append(time.perf_counter() - handled)
+    elapsed = time.perf_counter() - start
+    return {
+        'events': len(events),
+        'elapsed_seconds': round(elapsed, 3),
+        'events_per_second': round(len(events) / elapsed, 1) if elapsed else None,
+        'handle_result_ms': percentiles(handler_seconds)
+    }
+
+
+class StackSampler:
+    """Samples the Python stacks of all threads and counts them in folded format.
+
+    The output (one "frame;frame;frame count" line per stack) is what
+    flamegraph.pl and speedscope read. Threads idle in a wait are skipped.
+    """
+
+    IDLE_FUNCTIONS = {'wait', 'get', 'sleep', 'select', 'poll', 'accept', '_wait_for_tstate_lock'}
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_name in self.IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _NullSocketIO:
+    """Counts emits instead of sending them."""
+
+    def __init__(self):
+        self.emits = collections.Counter()
+
+    def emit(self, event, data=None, **kwargs):
+        self.emits[event] += 1
+
+
+def parse_speed(value):
+    if value in ('max', '0'):
+        return None
+    speed = float(value.rstrip('x'))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main(argv=None):
+    # Imported here so capturing meetings does not pull in the transcriber
+    from database import init_db
+    from segment_writer import SegmentWriter
+    from transcript_emitter import TranscriptEmitter
+    from transcriber import MeetingTranscriber
+
+    parser = argparse.ArgumentParser(description="Replay a recognition capture through the transcript pipeline.")
+    parser.add_argument('capture', help="capture file written with RECOGNITION_CAPTURE_DIR set")
+    parser.add_argument('--speed', type=parse_speed, default=1.0,
+                        help="1 for the recorded pace, 10 for ten times faster, max for no delays (default 1)")
+    parser.add_argument('--persist', action='store_true', help="write segments to a scratch database")
+    parser.add_argument('--db', help="database for --persist (default a temporary file)")
+    parser.add_argument('--no-emit', action='store_true', help="skip the transcript emitter")
+    parser.add_argument('--profile', help="write cProfile stats to this file and print the top functions")
+    parser.add_argument('--folded', help="write sampled stacks in folded format for flame graphs")
+    parser.add_argument('--top', type=int, default=25, help="functions to print with --profile (default 25)")
+    args = parser.parse_args(argv)
+
+    header, events = read_capture(args.capture)
+    meeting_id = f"replay-{header.get('meeting_id') or 'capture'}"
+    socketio = _NullSocketIO()
+    emitter = None if args.no_emit else TranscriptEmitter(socketio)
+    segment_writer = None
+    if args.persist:
+        db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='replay-'), 'replay.db')
+        init_db(db_path)
+        segment_writer = SegmentWriter(db_path=db_path)
+        segment_writer.begin_meeting(meeting_id)
+    if emitter:
+        emitter.start()
+
+    clock = ReplayClock(header.get('started_at'))
+    transcriber = MeetingTranscriber(
+        meeting_id=meeting_id, segment_writer=segment_writer, emitter=emitter, clock=clock,
+        # Replays profile the transcript pipeline without calling Azure OpenAI
+        rolling_summary=False
+    )
+
+    profiler = cProfile.Profile() if args.profile else None
+    sampler = StackSampler() if args.folded else None
+    if sampler:
+        sampler.start()
+    if profiler:
+        profiler.enable()
+    stats = replay(events, transcriber, speed=args.speed, clock=clock)
+    if segment_writer:
+        flush_start = time.perf_counter()
+        segment_writer.flush()
+        stats['persist_flush_seconds'] = round(time.perf_counter() - flush_start, 3)
+    if profiler:
+        profiler.disable()
+    if sampler:
+        sampler.stop()
+        sampler.write(args.folded)
+    if emitter:
+        # Let the emitter drain its last window
+        time.sleep(emitter.window + emitter.partial_interval)
+
+    stats['speed'] = args.speed or 'max'
+    stats['transcript_entries'] = transcriber.segment_count
+    stats['emits'] = dict(socketio.emits)
+    print(json.dumps(stats, indent=2))
+    if profiler:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(args.top)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
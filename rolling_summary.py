@@ -0,0 +1,101 @@
+import threading
+import logging
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class RollingSummary:
+    """Running summary of a meeting in progress, updated from closed transcript windows.
+
+    Transcript lines are collected into an open window. Once it holds
+    window_tokens or has been open for interval seconds, it is closed and
+    update(previous_summary, window_text) runs on executor to fold it into
+    the summary; on_update(self) is called after each fold. One window is
+    summarized at a time, and while one runs the next keeps filling. A window
+    whose update fails goes back to the front of the open one. window_tokens
+    and interval default to those of config.settings.
+    """
+
+    def __init__(self, update, executor, on_update=None, window_tokens=None, interval=None):
+        self.update = update
+        self.executor = executor
+        self.on_update = on_update
+        self.window_tokens = window_tokens or config.settings.rolling_summary_window_tokens
+        self.interval = interval or config.settings.rolling_summary_interval_seconds
+        self.summary = None
+        # Windows and transcript lines folded into the summary
+        self.windows = 0
+        self.lines = 0
+        self._open = []
+        self._open_tokens = 0
+        self._opened_at = None
+        self._running = []
+        self._future = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def add(self, line, now):
+        """Add one transcript line recognized at now; cheap enough for the SDK callback thread."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._opened_at is None:
+                self._opened_at = now
+            self._open.append(line)
+            # Same estimate as transcriber.estimate_tokens
+            self._open_tokens += len(line) // 4 + 1
+            if self._running:
+                return
+            if self._open_tokens >= self.window_tokens or now - self._opened_at >= self.interval:
+                self._running, self._open = self._open, []
+                self._open_tokens = 0
+                self._opened_at = None
+                self._future = self.executor.submit(self._fold, self._running, now)
+
+    def _fold(self, lines, closed_at):
+        try:
+            summary = self.update(self.summary, "\n".join(lines))
+        except Exception as e:
+            logger.error(f"Error updating rolling summary: {str(e)}")
+            with self._lock:
+                self._running = []
+                if not self._closed:
+                    self._open[:0] = lines
+                    self._open_tokens += sum(len(line) // 4 + 1 for line in lines)
+                    self._opened_at = closed_at
+            return
+        with self._lock:
+            self._running = []
+            if self._closed:
+                # finish() gave up waiting and already handed these lines on
+                return
+            self.summary = summary
+            self.windows += 1
+            self.lines += len(lines)
+        if self.on_update:
+            try:
+                self.on_update(self)
+            except Exception as e:
+                logger.error(f"Error publishing rolling summary: {str(e)}")
+
+    def finish(self, timeout=None):
+        """Stop summarizing windows and return (summary, tail).
+
+        Waits up to timeout seconds for the window being summarized. tail is
+        the transcript the summary does not cover yet; it includes that
+        window if it did not finish in time. summary is None when no window
+        was folded.
+        """
+        future = self._future
+        if future:
+            try:
+                future.result(timeout)
+            except Exception:
+                # Timed out; the window is handed on below
+                pass
+        with self._lock:
+            self._closed = True
+            tail = self._running + self._open
+            self._running, self._open = [], []
+            return self.summary, "\n".join(tail)
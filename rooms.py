@@ -0,0 +1,69 @@
+"""Socket.IO rooms that scope live events to the clients following a meeting.
+
+Clients join with a 'join_meeting' event or with connect auth
+({'meeting_id': ..., 'metadata_only': ...}). Full subscribers get the
+transcript, summary and job events of the meeting; metadata-only subscribers,
+such as dashboards, only get its 'meeting_status' events. A metadata-only
+subscription without a meeting id follows every meeting's status. A full
+subscription needs the meeting's token, which /start_meeting returns to the
+client that started it, so knowing a meeting id is not enough to read it.
+The same token is needed to read the meeting's jobs and to tie an email to
+the meeting. A session token, handed to a Socket.IO client for its own
+session id, lets an HTTP upload name that session as the one to notify.
+"""
+import hashlib
+import hmac
+
+ALL_MEETINGS_ROOM = 'meetings'
+
+
+def meeting_room(meeting_id):
+    """Room of the clients following a meeting's transcript and summary."""
+    return f"meeting:{meeting_id}"
+
+
+def metadata_room(meeting_id):
+    """Room of the clients following only a meeting's status."""
+    return f"meeting:{meeting_id}:metadata"
+
+
+def status_rooms(meeting_id):
+    """Every room that receives a meeting's status events."""
+    return [meeting_room(meeting_id), metadata_room(meeting_id), ALL_MEETINGS_ROOM]
+
+
+def meeting_token(meeting_id, secret):
+    """Token that lets a client follow meeting_id's transcript and summary; the same on every worker."""
+    return hmac.new(secret.encode(), meeting_id.encode(), hashlib.sha256).hexdigest()
+
+
+def valid_token(meeting_id, token, secret):
+    """Whether token is meeting_id's token."""
+    return isinstance(meeting_id, str) and isinstance(token, str) and \
+        hmac.compare_digest(token, meeting_token(meeting_id, secret))
+
+
+def session_token(sid, secret):
+    """Token proving that a client holds the Socket.IO session sid; the same on every worker."""
+    return hmac.new(secret.encode(), f"session:{sid}".encode(), hashlib.sha256).hexdigest()
+
+
+def valid_session_token(sid, token, secret):
+    """Whether token is sid's session token."""
+    return isinstance(sid, str) and isinstance(token, str) and \
+        hmac.compare_digest(token, session_token(sid, secret))
+
+
+def subscription_room(meeting_id=None, metadata_only=False, token=None, secret=None):
+    """Return the room for a subscription request, or raise ValueError."""
+    if not meeting_id:
+        if not metadata_only:
+            raise ValueError("meeting_id is required unless metadata_only is set")
+        return ALL_MEETINGS_ROOM
+    if not isinstance(meeting_id, str):
+        raise ValueError("meeting_id must be a string")
+    if metadata_only:
+        return metadata_room(meeting_id)
+    if not valid_token(meeting_id, token, secret):
+        raise ValueError("A valid token is required to follow a meeting")
+    return meeting_room(meeting_id)
@@ -0,0 +1,123 @@
+import os
+import queue
+import socket
+import threading
+import time
+import logging
+from database import begin_live_meeting, append_segments
+import config
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as the owner of the meetings it records
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def is_owner_alive(owner):
+    """Return whether the process named by a PROCESS_OWNER string is still running.
+
+    Owners on other hosts cannot be checked and are assumed alive; their
+    meetings are only recovered once their heartbeat goes stale.
+    """
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class SegmentWriter:
+    """Appends transcript segments to SQLite from a background thread.
+
+    Recognition callbacks only enqueue; the writer thread groups queued
+    segments into transactions of up to batch_size rows, at least every
+    flush_interval seconds, and refreshes the heartbeat of open meetings.
+    Values not given are taken from settings (config.settings by default).
+    """
+
+    def __init__(self, db_path=None, batch_size=None, flush_interval=None, heartbeat_interval=None,
+                 settings=None):
+        settings = settings or config.settings
+        self.db_path = db_path or settings.database_path
+        self.batch_size = settings.segment_batch_size if batch_size is None else batch_size
+        self.flush_interval = settings.segment_flush_seconds if flush_interval is None else flush_interval
+        self.heartbeat_interval = settings.meeting_heartbeat_seconds if heartbeat_interval is None \
+            else heartbeat_interval
+        self._queue = queue.Queue()
+        self._open_meetings = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the writer thread if it is not already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='segment-writer', daemon=True)
+            self._thread.start()
+
+    def begin_meeting(self, meeting_id):
+        """Create the live record for a meeting before its first segment arrives."""
+        begin_live_meeting(meeting_id, PROCESS_OWNER, self.db_path)
+        with self._lock:
+            self._open_meetings.add(meeting_id)
+        self.start()
+
+    def end_meeting(self, meeting_id):
+        """Stop sending heartbeats for a meeting."""
+        with self._lock:
+            self._open_meetings.discard(meeting_id)
+
+    def append(self, meeting_id, seq, entry):
+        """Queue one transcript entry for writing; never blocks."""
+        self._queue.put_nowait((
+            meeting_id, seq, entry['timestamp'], entry['speaker'], entry['speaker_id'], entry['text']
+        ))
+
+    def flush(self, timeout=10):
+        """Block until every segment queued before this call has been written."""
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            logger.warning("Timed out waiting for segment writer to flush")
+            return False
+        return True
+
+    def _run(self):
+        batch = []
+        waiters = []
+        deadline = time.monotonic() + self.flush_interval
+        last_heartbeat = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            heartbeat_due = now - last_heartbeat >= self.heartbeat_interval
+            if waiters or len(batch) >= self.batch_size or now >= deadline:
+                if batch or heartbeat_due:
+                    with self._lock:
+                        heartbeat_ids = list(self._open_meetings)
+                    try:
+                        append_segments(batch, heartbeat_ids, self.db_path)
+                        last_heartbeat = now
+                    except Exception as e:
+                        logger.error(f"Error writing {len(batch)} segments: {str(e)}")
+                    batch = []
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+                deadline = now + self.flush_interval
@@ -0,0 +1,112 @@
+import sys
+import time
+from array import array
+
+
+def format_segment(timestamp, speaker, text):
+    """Format one transcript line as "[HH:MM:SS] Speaker: text"."""
+    return f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] {speaker}: {text}"
+
+
+class SegmentStore:
+    """Compact store of one meeting's recognized segments.
+
+    Each segment is its text plus a few numbers in parallel arrays: the time
+    it was recognized, the SDK offset, the speaker id and the index of its
+    interned speaker label. With max_segments only the newest segments are
+    kept. formatted() keeps the formatted transcript between calls and only
+    formats segments appended since, so ending a meeting formats each line
+    once.
+    """
+
+    __slots__ = (
+        'max_segments', 'total', '_start', '_texts', '_times', '_offsets', '_speaker_ids',
+        '_label_indexes', '_labels', '_label_lookup', '_view', '_view_start', '_view_end'
+    )
+
+    def __init__(self, max_segments=None):
+        self.max_segments = max_segments
+        # Segments ever appended; index i of the store is segment total - len(self) + i
+        self.total = 0
+        self._start = 0
+        self._texts = []
+        self._times = array('d')
+        self._offsets = array('q')
+        self._speaker_ids = array('H')
+        self._label_indexes = array('H')
+        self._labels = []
+        self._label_lookup = {}
+        self._view = ""
+        self._view_start = 0
+        self._view_end = 0
+
+    def __len__(self):
+        return len(self._texts) - self._start
+
+    def append(self, text, speaker, speaker_id, timestamp, offset=0):
+        """Add a segment and return its sequence number within the meeting."""
+        label = self._label_lookup.get(speaker)
+        if label is None:
+            label = self._label_lookup[speaker] = len(self._labels)
+            self._labels.append(sys.intern(speaker))
+        self._texts.append(text)
+        self._times.append(timestamp)
+        self._offsets.append(offset)
+        self._speaker_ids.append(speaker_id)
+        self._label_indexes.append(label)
+        seq = self.total
+        self.total += 1
+        if self.max_segments is not None and len(self) > self.max_segments:
+            self._start += 1
+            # Drop the evicted prefix in one go once it is as long as the kept tail
+            if self._start >= self.max_segments:
+                self._compact()
+        return seq
+
+    def _compact(self):
+        start = self._start
+        del self._texts[:start]
+        del self._times[:start]
+        del self._offsets[:start]
+        del self._speaker_ids[:start]
+        del self._label_indexes[:start]
+        self._start = 0
+
+    def _line(self, i):
+        return format_segment(self._times[i], self._labels[self._label_indexes[i]], self._texts[i])
+
+    def entry(self, i):
+        """Return segment i of the store as a transcript entry dict."""
+        i += self._start
+        return {
+            'text': self._texts[i],
+            'speaker': self._labels[self._label_indexes[i]],
+            'timestamp': time.strftime('%H:%M:%S', time.localtime(self._times[i])),
+            'speaker_id': self._speaker_ids[i]
+        }
+
+    def entries(self):
+        """Return the stored segments as transcript entry dicts."""
+        return [self.entry(i) for i in range(len(self))]
+
+    def texts(self):
+        """Return the stored segment texts."""
+        return self._texts[self._start:]
+
+    def offsets(self):
+        """Return the SDK offsets of the stored segments."""
+        return self._offsets[self._start:].tolist()
+
+    def formatted(self):
+        """Return the stored segments as one "[time] Speaker: text" line each."""
+        first = self.total - len(self)
+        if first > self._view_start:
+            # Segments in the cached view were evicted; start over from the kept tail
+            self._view = ""
+            self._view_start = self._view_end = first
+        if self._view_end < self.total:
+            offset = self._start - first
+            lines = "\n".join(self._line(seq + offset) for seq in range(self._view_end, self.total))
+            self._view = f"{self._view}\n{lines}" if self._view else lines
+            self._view_end = self.total
+        return self._view
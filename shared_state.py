@@ -0,0 +1,249 @@
+import collections
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+import config
+from concurrency import ThreadBound, sockets_patched
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'meeting-assistant:'
+
+
+class CommandTimeout(Exception):
+    """Raised when the worker owning a meeting does not answer a command in time."""
+
+
+class LocalRedis:
+    """In-process stand-in for the Redis commands SharedState uses.
+
+    Used when REDIS_URL is not set, so a single worker runs the same code as
+    a multi-worker deployment, and by the tests. Expiry applies to plain
+    values only.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lists = collections.defaultdict(collections.deque)
+        self._condition = threading.Condition()
+
+    def _live(self, key):
+        entry = self._values.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._condition:
+            if nx and self._live(key):
+                return None
+            self._values[key] = (value, time.monotonic() + ex if ex else None)
+            return True
+
+    def get(self, key):
+        with self._condition:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def delete(self, *keys):
+        with self._condition:
+            removed = 0
+            for key in keys:
+                removed += self._values.pop(key, None) is not None
+                removed += self._lists.pop(key, None) is not None
+            return removed
+
+    def expire(self, key, seconds):
+        with self._condition:
+            entry = self._live(key)
+            if entry:
+                self._values[key] = (entry[0], time.monotonic() + seconds)
+            return bool(entry) or key in self._lists
+
+    def rpush(self, key, *values):
+        with self._condition:
+            self._lists[key].extend(values)
+            self._condition.notify_all()
+            return len(self._lists[key])
+
+    def blpop(self, keys, timeout=0):
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._condition:
+            while True:
+                for key in keys:
+                    if self._lists.get(key):
+                        value = self._lists[key].popleft()
+                        if not self._lists[key]:
+                            del self._lists[key]
+                        return key, value
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+
+class ThreadLocalRedis:
+    """Sends each call to a redis.Redis client of the calling thread.
+
+    Used when gevent patched sockets, since a pooled connection opened by one
+    thread cannot be used from another (see concurrency.ThreadBound).
+    """
+
+    def __init__(self, build):
+        self._clients = ThreadBound(build)
+
+    def __getattr__(self, name):
+        if not callable(getattr(self._clients.current(), name)):
+            return getattr(self._clients.current(), name)
+
+        # Resolved when called, so a method handed to another thread uses that thread's client
+        def call(*args, **kwargs):
+            return getattr(self._clients.current(), name)(*args, **kwargs)
+        return call
+
+
+def connect(redis_url=None):
+    """Return a Redis client for redis_url, or a LocalRedis when it is not set."""
+    if not redis_url:
+        return LocalRedis()
+    import redis
+    if sockets_patched():
+        return ThreadLocalRedis(lambda: redis.Redis.from_url(redis_url, decode_responses=True))
+    return redis.Redis.from_url(redis_url, decode_responses=True)
+
+
+class SharedState:
+    """Meeting ownership, job status and commands shared between workers.
+
+    A meeting belongs to the worker whose recognizer records it. A request for
+    it that lands on another worker is sent to the owner as a command on the
+    owner's Redis list; replies come back on a one-off list. A claim expires
+    after owner_ttl seconds (config.settings.meeting_owner_ttl_seconds by
+    default) unless the owner's command server refreshes it, so the meetings
+    of a worker that died are not forwarded to it forever. Job status is
+    mirrored so /jobs answers on every worker, for job_ttl seconds
+    (config.settings.job_retention_seconds by default).
+    """
+
+    def __init__(self, client, worker_id, prefix=KEY_PREFIX, job_ttl=None, owner_ttl=None):
+        self.client = client
+        self.worker_id = worker_id
+        self.prefix = prefix
+        self.job_ttl = config.settings.job_retention_seconds if job_ttl is None else job_ttl
+        self.owner_ttl = config.settings.meeting_owner_ttl_seconds if owner_ttl is None else owner_ttl
+        # Meetings claimed by this worker, refreshed while it serves commands
+        self._owned = set()
+        self._owned_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _key(self, *parts):
+        return self.prefix + ':'.join(parts)
+
+    def claim_meeting(self, meeting_id):
+        """Record this worker as the owner of meeting_id for owner_ttl seconds."""
+        with self._owned_lock:
+            self._owned.add(meeting_id)
+        self.client.set(self._key('meeting', meeting_id), self.worker_id, ex=self.owner_ttl or None)
+
+    def refresh_meetings(self):
+        """Extend this worker's claim on every meeting it owns by owner_ttl seconds."""
+        with self._owned_lock:
+            owned = list(self._owned)
+        for meeting_id in owned:
+            self.client.set(self._key('meeting', meeting_id), self.worker_id, ex=self.owner_ttl or None)
+
+    def meeting_owner(self, meeting_id):
+        """Return the id of the worker recording meeting_id, or None."""
+        return self.client.get(self._key('meeting', meeting_id))
+
+    def release_meeting(self, meeting_id):
+        with self._owned_lock:
+            self._owned.discard(meeting_id)
+        self.client.delete(self._key('meeting', meeting_id))
+
+    def save_job(self, job):
+        """Publish a job's status dict for other workers."""
+        self.client.set(self._key('job', job['job_id']), json.dumps(job), ex=self.job_ttl)
+
+    def load_job(self, job_id):
+        """Return a job's status dict published by any worker, or None."""
+        data = self.client.get(self._key('job', job_id))
+        return json.loads(data) if data else None
+
+    def send(self, worker_id, command, payload, reply_timeout=None):
+        """Send a command to worker_id.
+
+        With reply_timeout, waits that many seconds for the reply and returns
+        it, raising CommandTimeout if none arrives; otherwise returns at once.
+        """
+        message = {'command': command, 'payload': payload}
+        reply_key = None
+        if reply_timeout:
+            reply_key = message['reply_to'] = self._key('reply', uuid.uuid4().hex)
+        self.client.rpush(self._key('commands', worker_id), json.dumps(message))
+        if not reply_key:
+            return None
+        item = self.client.blpop([reply_key], timeout=math.ceil(reply_timeout))
+        if item is None:
+            raise CommandTimeout(f"Worker {worker_id} did not answer {command} within {reply_timeout}s")
+        return json.loads(item[1])
+
+    def serve(self, handlers, poll_timeout=1):
+        """Run handlers[command](payload) for commands sent to this worker, on a daemon thread.
+
+        The same thread refreshes this worker's meeting claims every third of owner_ttl.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._serve, args=(handlers, poll_timeout), name='command-server', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _serve(self, handlers, poll_timeout):
+        key = self._key('commands', self.worker_id)
+        heartbeat_at = 0.0
+        while not self._stop_event.is_set():
+            if self.owner_ttl and time.monotonic() >= heartbeat_at:
+                heartbeat_at = time.monotonic() + self.owner_ttl / 3
+                try:
+                    self.refresh_meetings()
+                except Exception as e:
+                    logger.error(f"Error refreshing meeting ownership: {str(e)}")
+            try:
+                item = self.client.blpop([key], timeout=poll_timeout)
+            except Exception as e:
+                logger.error(f"Error reading worker commands: {str(e)}")
+                self._stop_event.wait(poll_timeout)
+                continue
+            if item is None:
+                continue
+            message = json.loads(item[1])
+            handler = handlers.get(message['command'])
+            try:
+                if not handler:
+                    raise ValueError(f"Unknown command {message['command']}")
+                reply = handler(message['payload'])
+            except Exception as e:
+                logger.error(f"Error handling command {message['command']}: {str(e)}")
+                reply = {'status_code': 500, 'body': {'status': 'error', 'message': str(e)}}
+            if message.get('reply_to'):
+                try:
+                    self.client.rpush(message['reply_to'], json.dumps(reply))
+                    # Nobody reads a reply that arrives after the sender gave up
+                    self.client.expire(message['reply_to'], 60)
+                except Exception as e:
+                    logger.error(f"Error replying to command {message['command']}: {str(e)}")
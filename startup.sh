@@ -27,4 +27,4 @@ pip install -r /home/site/wwwroot/requirements.txt
 # Start the application
 echo "Starting application..."
 cd /home/site/wwwroot
-gunicorn --bind 0.0.0.0:$PORT --workers 1 --threads 8 --timeout 120 wsgi:app 
\ No newline at end of file
+gunicorn --config gunicorn.conf.py wsgi:app 
\ No newline at end of file
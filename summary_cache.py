@@ -0,0 +1,127 @@
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import logging
+from collections import OrderedDict
+import config
+from database import get_cached_summary, put_cached_summary
+from metrics import SUMMARY_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+MEMORY_HIT = 'memory_hit'
+DB_HIT = 'db_hit'
+MISS = 'miss'
+
+_WHITESPACE = re.compile(r'[ \t\r\f\v]+')
+
+
+def normalize_transcript(text):
+    """Normalize text so that formatting-only differences hash the same.
+
+    Applies Unicode NFC, collapses runs of whitespace within each line and
+    drops blank lines.
+    """
+    text = unicodedata.normalize('NFC', text)
+    lines = (_WHITESPACE.sub(' ', line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def summary_cache_key(text, **params):
+    """Return a hex digest identifying text summarized with the given parameters.
+
+    params should hold everything that changes the model output, such as the
+    deployment, prompt version and sampling settings.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_transcript(text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Two-tier cache of generated summaries keyed by summary_cache_key().
+
+    Lookups go to an in-process LRU of max_memory_entries first and then to
+    the summary_cache table, which keeps at most max_db_entries rows. A
+    database error is logged and treated as a miss so caching never fails a
+    summary. The limits default to those of config.settings.
+    """
+
+    def __init__(self, db_path=None, max_memory_entries=None, max_db_entries=None, persist=True):
+        settings = config.settings
+        self.db_path = db_path
+        self.max_memory_entries = settings.summary_cache_memory_entries if max_memory_entries is None \
+            else max_memory_entries
+        self.max_db_entries = settings.summary_cache_db_entries if max_db_entries is None else max_db_entries
+        self.persist = persist
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {MEMORY_HIT: 0, DB_HIT: 0, MISS: 0, 'memory_evictions': 0, 'db_evictions': 0}
+
+    def get(self, key):
+        """Return the cached summary for key, or None."""
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+        if summary is not None:
+            self._record(MEMORY_HIT)
+            return summary
+
+        if self.persist:
+            try:
+                summary = get_cached_summary(key, self.db_path)
+            except Exception as e:
+                logger.warning(f"Summary cache lookup failed: {str(e)}")
+        if summary is not None:
+            self._remember(key, summary)
+            self._record(DB_HIT)
+            return summary
+
+        self._record(MISS)
+        return None
+
+    def put(self, key, summary):
+        """Store summary under key in both tiers."""
+        self._remember(key, summary)
+        if self.persist:
+            try:
+                evicted = put_cached_summary(key, summary, self.max_db_entries, self.db_path)
+                with self._lock:
+                    self._stats['db_evictions'] += evicted
+            except Exception as e:
+                logger.warning(f"Summary cache write failed: {str(e)}")
+
+    def get_or_compute(self, key, compute):
+        """Return the cached summary for key, calling compute() and caching its result on a miss."""
+        summary = self.get(key)
+        if summary is None:
+            summary = compute()
+            self.put(key, summary)
+        return summary
+
+    def stats(self):
+        """Return hit, miss and eviction counts and the in-memory size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._entries)
+        lookups = stats[MEMORY_HIT] + stats[DB_HIT] + stats[MISS]
+        stats['hit_ratio'] = (stats[MEMORY_HIT] + stats[DB_HIT]) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, summary):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_memory_entries:
+                self._entries.popitem(last=False)
+                self._stats['memory_evictions'] += 1
+
+    def _record(self, result):
+        with self._lock:
+            self._stats[result] += 1
+        SUMMARY_CACHE_REQUESTS.inc(result=result)
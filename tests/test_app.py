@@ -1,10 +1,19 @@
+import io
+import dataclasses
 import os
 import unittest
 import tempfile
 import shutil
 from flask import Flask
-from app import app, socketio
-from database import init_db, save_meeting
+import app as app_module
+from app import create_app, socketio as real_socketio
+from rooms import meeting_token, session_token
+from transcript_emitter import TranscriptEmitter
+from config import Settings
+import transcriber
+from database import save_meeting, begin_live_meeting, append_segments, get_meeting
+from outbox import OutboxSender
+from shared_state import SharedState
 from unittest.mock import patch, MagicMock
 
 class TestApp(unittest.TestCase):
@@ -13,13 +22,10 @@ class TestApp(unittest.TestCase):
         self.test_dir = tempfile.mkdtemp()
         self.test_db_path = os.path.join(self.test_dir, 'test_meetings.db')
         
-        # Initialize test database
-        init_db(self.test_db_path)
-        
-        # Configure app for testing
-        app.config['TESTING'] = True
-        app.config['DATABASE_PATH'] = self.test_db_path
-        self.app = app.test_client()
+        # Create the app against the test database
+        self.flask_app = create_app(Settings(database_path=self.test_db_path), start_background=False)
+        self.flask_app.config['TESTING'] = True
+        self.app = self.flask_app.test_client()
         
         # Mock socketio
         self.socketio_patcher = patch('app.socketio')
@@ -27,9 +33,23 @@ class TestApp(unittest.TestCase):
 
     def tearDown(self):
         # Clean up
+        for meeting_id in app_module.meetings.meeting_ids():
+            app_module.meetings.pop(meeting_id)
         self.socketio_patcher.stop()
         shutil.rmtree(self.test_dir)
 
+    def test_create_app_rejects_unknown_async_mode(self):
+        """Test that an unsupported serving mode stops startup."""
+        with self.assertRaises(ValueError):
+            create_app(Settings(database_path=self.test_db_path, async_mode='asyncio'), start_background=False)
+
+    def test_create_app_without_credentials(self):
+        """Test that the app starts without credentials and builds no OpenAI client."""
+        settings = Settings(database_path=self.test_db_path, azure_openai_api_key=None, azure_speech_key=None)
+        flask_app = create_app(settings, start_background=False)
+        self.assertEqual(flask_app.test_client().get('/meetings').status_code, 200)
+        self.assertNotIn((settings, 'client'), transcriber._shared)
+
     def test_index_route(self):
         """Test the index route."""
         response = self.app.get('/')
@@ -41,10 +61,51 @@ class TestApp(unittest.TestCase):
         save_meeting("Test transcript 1", "Test summary 1", self.test_db_path)
         save_meeting("Test transcript 2", "Test summary 2", self.test_db_path)
         
-        response = self.app.get('/meetings')
+        response = self.app.get('/meetings?limit=1')
         self.assertEqual(response.status_code, 200)
         data = response.get_json()
-        self.assertEqual(len(data), 2)
+        self.assertEqual(len(data['meetings']), 1)
+        self.assertEqual(data['meetings'][0]['summary_preview'], "Test summary 2")
+        
+        response = self.app.get(f"/meetings?limit=1&cursor={data['next_cursor']}")
+        data = response.get_json()
+        self.assertEqual(len(data['meetings']), 1)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_list_meetings_invalid_cursor(self):
+        """Test the list meetings route with a malformed cursor."""
+        response = self.app.get('/meetings?cursor=bogus')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_meeting_route(self):
+        """Test fetching a single meeting's full transcript."""
+        meeting_id = save_meeting("Test transcript", "Test summary", self.test_db_path)
+        
+        response = self.app.get(f'/meetings/{meeting_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['transcript'], "Test transcript")
+        self.assertEqual(self.app.get(f'/meetings/{meeting_id + 1}').status_code, 404)
+
+    def test_search_meetings_route(self):
+        """Test the meeting search route."""
+        save_meeting("Speaker 1: budget review", "Budget approved", self.test_db_path)
+        save_meeting("Speaker 1: hiring plan", "Hiring", self.test_db_path)
+        
+        response = self.app.get('/meetings/search?q=budget')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['results']), 1)
+        self.assertEqual(self.app.get('/meetings/search').status_code, 400)
+
+    def test_metrics_route(self):
+        """Test the metrics route exposes pipeline metrics."""
+        save_meeting("Test transcript", "Test summary", self.test_db_path)
+        
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('db_query_duration_seconds_count{function="save_meeting"}', body)
+        self.assertIn('active_meetings 0', body)
 
     @patch('app.MeetingTranscriber')
     def test_start_meeting_success(self, mock_transcriber):
@@ -56,8 +117,102 @@ class TestApp(unittest.TestCase):
         response = self.app.post('/start_meeting')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json['status'], 'success')
+        self.assertIn('meeting_id', response.json)
+        self.assertEqual(
+            response.json['token'], meeting_token(response.json['meeting_id'], self.flask_app.config['SECRET_KEY'])
+        )
         mock_instance.start_recording.assert_called_once()
 
+    @patch('app.MeetingTranscriber')
+    def test_start_meeting_negotiates_browser_audio(self, mock_transcriber):
+        """Test that the requested audio format is negotiated and handed to the transcriber."""
+        response = self.app.post('/start_meeting', json={
+            'audio': {'format': 'pcm', 'sample_rate': 44100, 'frame_ms': 5}
+        })
+        
+        self.assertEqual(response.status_code, 200)
+        audio = response.json['audio']
+        self.assertEqual((audio['sample_rate'], audio['frame_ms']), (16000, 10))
+        self.assertEqual(audio['frame_bytes'], 320)
+        audio_stream = mock_transcriber.call_args.kwargs['audio_stream']
+        self.assertEqual(audio_stream.format, audio)
+
+    @patch('app.MeetingTranscriber')
+    def test_start_meeting_uses_pooled_recognizer(self, mock_transcriber):
+        """Test that a browser meeting takes a pre-connected recognizer and its push stream."""
+        warm = MagicMock()
+        with patch('app.recognizer_pool') as pool:
+            pool.acquire.return_value = warm
+            response = self.app.post('/start_meeting')
+
+        self.assertEqual(response.status_code, 200)
+        pool.acquire.assert_called_once_with(response.json['audio'])
+        kwargs = mock_transcriber.call_args.kwargs
+        self.assertIs(kwargs['warm_recognizer'], warm)
+        self.assertIs(kwargs['audio_stream'].push_stream, warm.push_stream)
+
+    def test_start_meeting_rejects_unknown_audio_format(self):
+        """Test that an unsupported audio format is a client error."""
+        response = self.app.post('/start_meeting', json={'audio': {'format': 'mp3'}})
+        self.assertEqual(response.status_code, 400)
+
+    @patch('app.MeetingTranscriber')
+    def test_audio_frame_routed_to_meeting(self, mock_transcriber):
+        """Test that binary audio frames reach the meeting's audio stream."""
+        data = self.app.post('/start_meeting').json
+        mock_instance = mock_transcriber.return_value
+        client = real_socketio.test_client(self.flask_app, auth={'meeting_id': data['meeting_id'], 'token': data['token']})
+        
+        client.emit('audio_frame', data['meeting_id'], b'\0' * 320, callback=True)
+        mock_instance.audio_stream.write.assert_called_once_with(b'\0' * 320)
+        self.assertEqual(client.emit('audio_frame', 'unknown', b'\0', callback=True)['status'], 'error')
+        client.disconnect()
+
+    @patch('app.MeetingTranscriber')
+    def test_audio_frame_needs_meeting_room(self, mock_transcriber):
+        """Test that a client that did not join a meeting with its token cannot send it audio."""
+        meeting_id = self.app.post('/start_meeting').json['meeting_id']
+        client = real_socketio.test_client(self.flask_app, auth={'meeting_id': meeting_id, 'metadata_only': True})
+        
+        self.assertEqual(client.emit('audio_frame', meeting_id, b'\0' * 320, callback=True)['status'], 'error')
+        mock_transcriber.return_value.audio_stream.write.assert_not_called()
+        client.disconnect()
+
+    def test_socket_events_scoped_to_meeting_rooms(self):
+        """Test that meeting events only reach the clients following the meeting."""
+        secret = self.flask_app.config['SECRET_KEY']
+        follower = real_socketio.test_client(
+            self.flask_app, auth={'meeting_id': 'meeting-1', 'token': meeting_token('meeting-1', secret)}
+        )
+        dashboard = real_socketio.test_client(self.flask_app)
+        other = real_socketio.test_client(self.flask_app)
+        self.assertEqual(dashboard.emit('join_meeting', {'metadata_only': True}, callback=True)['status'], 'ok')
+        self.assertEqual(other.emit('join_meeting', {
+            'meeting_id': 'meeting-2', 'token': meeting_token('meeting-2', secret)
+        }, callback=True)['status'], 'ok')
+        self.assertEqual(other.emit('join_meeting', {}, callback=True)['status'], 'error')
+        # A meeting id learned from status events is not enough to read the meeting
+        self.assertEqual(other.emit('join_meeting', {'meeting_id': 'meeting-1'}, callback=True)['status'], 'error')
+        self.assertEqual(other.emit('join_meeting', {
+            'meeting_id': 'meeting-1', 'token': meeting_token('meeting-2', secret)
+        }, callback=True)['status'], 'error')
+
+        def received(client):
+            return [event['name'] for event in client.get_received()]
+
+        with patch('app.socketio', real_socketio):
+            TranscriptEmitter(real_socketio)._emit([('final', 'meeting-1', {'text': 'Hello.'}, 0)])
+            app_module.notify_meeting_status('meeting-1', 'recording')
+            self.assertEqual(received(follower), ['transcript_batch', 'meeting_status'])
+            self.assertEqual(received(dashboard), ['meeting_status'])
+            self.assertEqual(received(other), [])
+
+            follower.emit('leave_meeting', {'meeting_id': 'meeting-1'})
+            app_module.notify_meeting_status('meeting-1', 'ending')
+            self.assertEqual(received(follower), [])
+        for client in (follower, dashboard, other):
+            client.disconnect()
+
     @patch('app.MeetingTranscriber')
     def test_start_meeting_error(self, mock_transcriber):
         """Test meeting start with error."""
@@ -69,51 +224,275 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.json['status'], 'error')
 
     @patch('app.MeetingTranscriber')
-    def test_end_meeting_success(self, mock_transcriber):
+    def test_start_meeting_limit(self, mock_transcriber):
+        """Test that starting beyond the concurrent meeting cap is rejected."""
+        mock_transcriber.return_value = MagicMock()
+        
+        with patch.object(app_module.meetings, 'max_meetings', 1):
+            self.assertEqual(self.app.post('/start_meeting').status_code, 200)
+            response = self.app.post('/start_meeting')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json['status'], 'error')
+
+    @patch('app.finish_meeting')
+    @patch('app.MeetingTranscriber')
+    def test_end_meeting_success(self, mock_transcriber, mock_finish_meeting):
         """Test successful meeting end."""
         # Configure mock
         mock_instance = MagicMock()
         mock_instance.stop_recording.return_value = "Test transcript"
         mock_instance.generate_summary.return_value = "Test summary"
+        mock_instance.compaction = None
         mock_transcriber.return_value = mock_instance
+        mock_finish_meeting.return_value = 7
         
-        response = self.app.post('/end_meeting')
+        meeting_id = self.app.post('/start_meeting').json['meeting_id']
+        response = self.app.post('/end_meeting', json={'meeting_id': meeting_id})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json['status'], 'accepted')
+        
+        # Wait for the background pipeline and check its status
+        job_id = response.json['job_id']
+        app_module.jobs.wait(job_id, timeout=5)
+        token = meeting_token(meeting_id, self.flask_app.config['SECRET_KEY'])
+        response = self.app.get(f'/jobs/{job_id}?token={token}')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json['status'], 'success')
-        self.assertEqual(response.json['summary'], 'Test summary')
+        self.assertEqual(response.json['status'], 'succeeded')
+        self.assertEqual(response.json['result'], {'summary': 'Test summary', 'db_meeting_id': 7})
+        mock_finish_meeting.assert_called_once_with(
+            mock_instance.meeting_id, "Test transcript", "Test summary", db_path=self.test_db_path
+        )
+        self.mock_socketio.emit.assert_any_call('job_complete', {
+            'job_id': job_id,
+            'kind': 'end_meeting',
+            'meeting_id': meeting_id,
+            'status': 'succeeded',
+            'result': {'summary': 'Test summary', 'db_meeting_id': 7}
+        }, to=f'meeting:{meeting_id}')
+        # Status rooms need no token, so they are not told the job id
+        self.mock_socketio.emit.assert_any_call('meeting_status', {
+            'meeting_id': meeting_id, 'status': 'ended'
+        }, to=[f'meeting:{meeting_id}', f'meeting:{meeting_id}:metadata', 'meetings'])
+
+    @patch('app.MeetingTranscriber')
+    def test_meeting_job_needs_token(self, mock_transcriber):
+        """Test that a meeting's job, which holds its summary, is only readable with the meeting's token."""
+        meeting_id = self.app.post('/start_meeting').json['meeting_id']
+        job_id = self.app.post('/end_meeting', json={'meeting_id': meeting_id}).json['job_id']
+        app_module.jobs.wait(job_id, timeout=5)
+        secret = self.flask_app.config['SECRET_KEY']
+
+        self.assertEqual(self.app.get(f'/jobs/{job_id}').status_code, 403)
+        self.assertEqual(self.app.get(f"/jobs/{job_id}?token={meeting_token('other', secret)}").status_code, 403)
+        self.assertEqual(self.app.get(f"/jobs/{job_id}?token={meeting_token(meeting_id, secret)}").status_code, 200)
+
+    @patch('app.MeetingTranscriber')
+    def test_end_meeting_summary_failure_keeps_transcript(self, mock_transcriber):
+        """Test that a failed summary fails the job but still saves the transcript."""
+        mock_instance = mock_transcriber.return_value
+        mock_instance.stop_recording.return_value = "Test transcript"
+        mock_instance.generate_summary.side_effect = Exception("Rate limited")
+        
+        meeting_id = self.app.post('/start_meeting').json['meeting_id']
+        mock_instance.meeting_id = meeting_id
+        job_id = self.app.post('/end_meeting', json={'meeting_id': meeting_id}).json['job_id']
+        app_module.jobs.wait(job_id, timeout=5)
+        
+        token = meeting_token(meeting_id, self.flask_app.config['SECRET_KEY'])
+        self.assertEqual(self.app.get(f'/jobs/{job_id}?token={token}').json['error'], 'Rate limited')
+        meetings = self.app.get('/meetings').json['meetings']
+        self.assertEqual(len(meetings), 1)
+        self.assertEqual(get_meeting(meetings[0]['id'], self.test_db_path)['transcript'], "Test transcript")
+
+    def test_end_meeting_unknown_id(self):
+        """Test ending a meeting that is not active."""
+        response = self.app.post('/end_meeting', json={'meeting_id': 'missing'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['status'], 'error')
 
     @patch('app.MeetingTranscriber')
     def test_end_meeting_error(self, mock_transcriber):
         """Test meeting end with error."""
         # Configure mock to raise exception
-        mock_transcriber.side_effect = Exception("Test error")
+        mock_instance = MagicMock()
+        mock_instance.stop_recording.side_effect = Exception("Test error")
+        mock_transcriber.return_value = mock_instance
         
-        response = self.app.post('/end_meeting')
-        self.assertEqual(response.status_code, 500)
-        self.assertEqual(response.json['status'], 'error')
+        meeting_id = self.app.post('/start_meeting').json['meeting_id']
+        response = self.app.post('/end_meeting', json={'meeting_id': meeting_id})
+        self.assertEqual(response.status_code, 202)
+        
+        job_id = response.json['job_id']
+        app_module.jobs.wait(job_id, timeout=5)
+        token = meeting_token(meeting_id, self.flask_app.config['SECRET_KEY'])
+        response = self.app.get(f'/jobs/{job_id}?token={token}')
+        self.assertEqual(response.json['status'], 'failed')
+        self.assertEqual(response.json['error'], 'Test error')
+        # The finished job is shared with the other workers
+        self.assertEqual(app_module.state.load_job(job_id)['status'], 'failed')
 
-    @patch('app.send_meeting_summary')
-    def test_send_email_success(self, mock_send_email):
-        """Test successful email sending."""
-        # Configure mock
-        mock_send_email.return_value = (True, "Email sent successfully")
+    def test_get_unknown_job(self):
+        """Test the job status route with an unknown id."""
+        response = self.app.get('/jobs/missing')
+        self.assertEqual(response.status_code, 404)
+
+    def test_end_meeting_forwarded_to_owner(self):
+        """Test that ending a meeting recorded by another worker runs on that worker."""
+        other = SharedState(app_module.state.client, 'other-worker')
+        other.serve({'end_meeting': lambda payload: {
+            'status_code': 202, 'body': {'status': 'accepted', 'meeting_id': payload['meeting_id']}
+        }}, poll_timeout=0.05)
+        try:
+            other.claim_meeting('remote-meeting')
+            response = self.app.post('/end_meeting', json={'meeting_id': 'remote-meeting'})
+        finally:
+            other.stop()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json['meeting_id'], 'remote-meeting')
+
+    def test_end_meeting_owner_not_responding(self):
+        """Test that a meeting owned by a worker that does not answer returns 504."""
+        SharedState(app_module.state.client, 'dead-worker').claim_meeting('remote-meeting')
+        settings = dataclasses.replace(app_module.settings, worker_command_timeout_seconds=0.1)
+        with patch('app.settings', settings):
+            response = self.app.post('/end_meeting', json={'meeting_id': 'remote-meeting'})
+        self.assertEqual(response.status_code, 504)
+
+    def test_get_job_from_other_worker(self):
+        """Test that the job status route answers for jobs run by another worker."""
+        app_module.state.save_job({'job_id': 'remote-job', 'kind': 'end_meeting', 'status': 'running'})
+        response = self.app.get('/jobs/remote-job')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'running')
+
+    @patch('app.MeetingTranscriber')
+    def test_recover_orphaned_meetings(self, mock_transcriber):
+        """Test that meetings left recording by a dead process are summarized and saved."""
+        mock_transcriber.return_value.generate_summary.return_value = "Recovered summary"
+        begin_live_meeting('orphan', 'dead-host:1', self.test_db_path)
+        append_segments([('orphan', 0, '10:00:00', 'Speaker 1', 1, 'Hello')], db_path=self.test_db_path)
+        
+        with patch('app.is_owner_alive', return_value=False):
+            recovery_jobs = app_module.recover_orphaned_meetings()
+        
+        self.assertEqual([job.meeting_id for job in recovery_jobs], ['orphan'])
+        job = app_module.jobs.wait(recovery_jobs[0].id, timeout=5)
+        self.assertEqual(job.status, 'succeeded')
+        mock_transcriber.return_value.generate_summary.assert_called_once_with("[10:00:00] Speaker 1: Hello")
+        self.assertEqual(get_meeting(job.result['db_meeting_id'], self.test_db_path)['summary'], "Recovered summary")
+
+    @patch('app.transcribe_file', return_value={'db_meeting_id': 1})
+    def test_batch_transcribe_queues_uploads(self, mock_transcribe):
+        """Test that each uploaded recording becomes a batch job."""
+        response = self.app.post('/batch/transcribe', data={
+            'files': [(io.BytesIO(b'RIFF'), 'standup.wav'), (io.BytesIO(b'fLaC'), 'retro.flac')]
+        }, content_type='multipart/form-data')
         
-        # Test data
+        self.assertEqual(response.status_code, 202)
+        queued = response.json['jobs']
+        self.assertEqual([job['filename'] for job in queued], ['standup.wav', 'retro.flac'])
+        jobs = [app_module.batch_jobs.wait(job['job_id'], timeout=5) for job in queued]
+        self.assertEqual([job.status for job in jobs], ['succeeded', 'succeeded'])
+        self.assertEqual(self.app.get(f"/jobs/{jobs[0].id}").json['kind'], 'batch_transcription')
+        paths = [call.args[1] for call in mock_transcribe.call_args_list]
+        self.assertEqual(sorted(os.path.splitext(path)[1] for path in paths), ['.flac', '.wav'])
+        for path in paths:
+            os.remove(path)
+
+    @patch('app.transcribe_file', return_value={'summary': 'Private', 'db_meeting_id': 1})
+    def test_batch_results_sent_only_to_uploader(self, mock_transcribe):
+        """Test that batch job events go to the uploading client's session, not to everyone."""
+        client = real_socketio.test_client(self.flask_app)
+        uploader = client.emit('batch_token', callback=True)
+        client.disconnect()
+        response = self.app.post('/batch/transcribe', data={
+            'files': [(io.BytesIO(b'RIFF'), 'standup.wav')], 'sid': uploader['sid'], 'token': uploader['token']
+        }, content_type='multipart/form-data')
+        job = app_module.batch_jobs.wait(response.json['jobs'][0]['job_id'], timeout=5)
+        os.remove(mock_transcribe.call_args.args[1])
+
+        completions = [call for call in self.mock_socketio.emit.call_args_list if call.args[0] == 'job_complete']
+        self.assertEqual(len(completions), 1)
+        self.assertEqual(completions[0].kwargs, {'to': uploader['sid']})
+        self.assertEqual(completions[0].args[1]['job_id'], job.id)
+
+        self.mock_socketio.emit.reset_mock()
+        response = self.app.post('/batch/transcribe', data={
+            'files': [(io.BytesIO(b'RIFF'), 'standup.wav')]
+        }, content_type='multipart/form-data')
+        app_module.batch_jobs.wait(response.json['jobs'][0]['job_id'], timeout=5)
+        os.remove(mock_transcribe.call_args.args[1])
+        self.assertNotIn('job_complete', [call.args[0] for call in self.mock_socketio.emit.call_args_list])
+
+    @patch('app.submit_job')
+    def test_batch_sid_needs_session_token(self, mock_submit):
+        """Test that an upload cannot name another client's session without that session's token."""
+        for token in (None, 'forged', session_token('other-sid', self.flask_app.config['SECRET_KEY'])):
+            data = {'files': [(io.BytesIO(b'RIFF'), 'standup.wav')], 'sid': 'victim-sid'}
+            if token:
+                data['token'] = token
+            response = self.app.post('/batch/transcribe', data=data, content_type='multipart/form-data')
+            self.assertEqual(response.status_code, 403)
+        mock_submit.assert_not_called()
+
+    def test_batch_transcribe_rejects_unsupported_files(self):
+        """Test that only WAV and FLAC uploads are accepted."""
+        response = self.app.post('/batch/transcribe', data={
+            'files': [(io.BytesIO(b'ID3'), 'meeting.mp3')]
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.app.post('/batch/transcribe').status_code, 400)
+
+    def test_send_email_queues_message(self):
+        """Test that sending an email queues it and returns before delivery."""
+        outbox = OutboxSender(db_path=self.test_db_path, session=MagicMock())
         test_data = {
             'summary': 'Test summary',
             'participants': ['test@example.com']
         }
         
-        response = self.app.post('/send_email', json=test_data)
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json['status'], 'success')
-        mock_send_email.assert_called_once_with(['test@example.com'], 'Test summary')
+        with patch('app.outbox', outbox):
+            response = self.app.post('/send_email', json=test_data)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json['status'], 'accepted')
+            message_id = response.json['message_id']
+            outbox.session.send.assert_not_called()
+            
+            status = self.app.get(f'/outbox/{message_id}')
+            self.assertEqual(status.json['status'], 'queued')
+            self.assertEqual(status.json['recipients'], ['test@example.com'])
+            
+            outbox.send_due()
+            status = self.app.get(f'/outbox/{message_id}')
+            self.assertEqual(status.json['status'], 'sent')
+            self.assertEqual(self.app.get('/outbox/999').status_code, 404)
+
+    def test_email_status_sent_to_meeting_room(self):
+        """Test that delivery status goes to the email's meeting room, and needs the meeting's token."""
+        outbox = OutboxSender(db_path=self.test_db_path, session=MagicMock(), on_status=app_module.notify_email_status)
+        token = meeting_token('meeting-1', self.flask_app.config['SECRET_KEY'])
+        data = {'summary': 'Test summary', 'participants': ['test@example.com'], 'meeting_id': 'meeting-1'}
+
+        with patch('app.outbox', outbox):
+            self.assertEqual(self.app.post('/send_email', json=dict(data, token='wrong')).status_code, 403)
+            message_id = self.app.post('/send_email', json=dict(data, token=token)).json['message_id']
+            self.app.post('/send_email', json={'summary': 'Other', 'participants': ['test@example.com']})
+            outbox.send_due()
+
+        self.mock_socketio.emit.assert_called_once_with('email_status', {
+            'message_id': message_id, 'meeting_id': 'meeting-1', 'status': 'sent', 'error': None
+        }, to='meeting:meeting-1')
+
+    def test_send_email_missing_data(self):
+        """Test that a request without participants is rejected."""
+        response = self.app.post('/send_email', json={'summary': 'Test summary'})
+        self.assertEqual(response.status_code, 400)
 
-    @patch('app.send_meeting_summary')
-    def test_send_email_error(self, mock_send_email):
-        """Test email sending with error."""
+    @patch('app.outbox')
+    def test_send_email_error(self, mock_outbox):
+        """Test email queueing with error."""
         # Configure mock to raise exception
-        mock_send_email.side_effect = Exception("Test error")
+        mock_outbox.enqueue.side_effect = Exception("Test error")
         
         test_data = {
             'summary': 'Test summary',
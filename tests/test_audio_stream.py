@@ -0,0 +1,107 @@
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from audio_stream import AudioStream, AudioFormatError, negotiate_audio_format
+from config import Settings
+
+class TestAudioStream(unittest.TestCase):
+    def setUp(self):
+        self.signals = []
+        self.audio_format = negotiate_audio_format({'format': 'pcm', 'sample_rate': 16000, 'frame_ms': 20})
+        self.audio_format['max_buffered_frames'] = 4
+        self.audio_format['max_unrecognized_ms'] = 100
+        self.now = [0.0]
+        self.stream = AudioStream(self.audio_format, on_backpressure=lambda paused, depth: self.signals.append(paused),
+                                  clock=lambda: self.now[0])
+        self.stream.push_stream = MagicMock()
+
+    def test_negotiate_defaults_and_clamps(self):
+        """Test that unsupported rates and frame sizes fall back to supported values."""
+        audio_format = negotiate_audio_format({'sample_rate': 44100, 'frame_ms': 1000})
+        self.assertEqual(audio_format['format'], 'pcm')
+        self.assertEqual(audio_format['sample_rate'], 16000)
+        self.assertEqual(audio_format['frame_ms'], 200)
+        self.assertEqual(audio_format['frame_bytes'], 6400)
+
+    def test_negotiate_rejects_disabled_opus(self):
+        """Test that Opus is refused unless compressed input is enabled."""
+        with self.assertRaises(AudioFormatError):
+            negotiate_audio_format({'format': 'opus'}, Settings(audio_opus_enabled=False))
+        self.assertEqual(negotiate_audio_format({'format': 'opus'}, Settings(audio_opus_enabled=True))['format'], 'opus')
+
+    def test_negotiate_uses_given_settings(self):
+        """Test that the sample rates and buffer of the given settings are used."""
+        settings = Settings(audio_sample_rates=(8000,), audio_buffer_ms=400)
+        audio_format = negotiate_audio_format({'sample_rate': 16000, 'frame_ms': 20}, settings)
+        self.assertEqual(audio_format['sample_rate'], 8000)
+        self.assertEqual(audio_format['max_buffered_frames'], 20)
+
+    def test_frames_pumped_into_push_stream(self):
+        """Test that queued frames are written to the push stream and close ends the stream."""
+        self.stream.start()
+        self.assertTrue(self.stream.write(b'\x01\x00' * 160))
+        self.assertTrue(self.stream.write(b'\x02\x00' * 160))
+
+        self.stream.close()
+
+        written = [call.args[0] for call in self.stream.push_stream.write.call_args_list]
+        self.assertEqual(written, [b'\x01\x00' * 160, b'\x02\x00' * 160])
+        self.stream.push_stream.close.assert_called_once()
+        self.assertFalse(self.stream.write(b'\x00\x00'))
+        self.assertEqual(self.stream.pushed_ms, 20)
+
+    def test_invalid_frames_rejected(self):
+        """Test that oversized, odd-length and non-binary frames are refused."""
+        with self.assertRaises(AudioFormatError):
+            self.stream.write(b'\x00' * 642)
+        with self.assertRaises(AudioFormatError):
+            self.stream.write(b'\x00' * 3)
+        with self.assertRaises(AudioFormatError):
+            self.stream.write("text")
+
+    def test_backpressure_pauses_drops_and_resumes(self):
+        """Test pause at the high watermark, dropping when full and resume after draining."""
+        results = [self.stream.write(b'\x00\x00') for _ in range(5)]
+
+        self.assertEqual(results, [True, True, True, True, False])
+        self.assertEqual(self.stream.frames_dropped, 1)
+        self.assertEqual(self.signals, [True])
+
+        self.stream.start()
+        for _ in range(100):
+            if self.signals == [True, False]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.signals, [True, False])
+
+    def test_recognizer_lag_pauses_and_resumes(self):
+        """Test pause while pushed audio runs ahead of the recognizer and resume once it catches up."""
+        self.stream.pushed_ms = 200
+
+        self.stream.recognized_until(50 * 10000)
+        self.assertEqual(self.stream.unrecognized_ms(), 150)
+        self.assertEqual(self.signals, [True])
+
+        self.stream.recognized_until(150 * 10000)
+        self.assertEqual(self.signals, [True])
+        self.stream.recognized_until(180 * 10000)
+        self.assertEqual(self.signals, [True, False])
+
+    def test_silent_recognizer_does_not_hold_pause(self):
+        """Test that a recognizer reporting nothing is taken as hearing silence and the client resumes."""
+        self.stream.pushed_ms = 200
+        self.stream.recognized_until(50 * 10000)
+        self.assertEqual(self.signals, [True])
+
+        self.now[0] = 0.2
+        with patch('audio_stream.CHECK_INTERVAL', 0.01):
+            self.stream.start()
+            for _ in range(100):
+                if self.signals == [True, False]:
+                    break
+                time.sleep(0.01)
+            self.stream.close()
+        self.assertEqual(self.signals, [True, False])
+
+if __name__ == '__main__':
+    unittest.main()
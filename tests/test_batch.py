@@ -0,0 +1,159 @@
+import os
+import wave
+import array
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import azure.cognitiveservices.speech as speechsdk
+from config import Settings
+from database import init_db, get_meeting
+from jobs import Job
+from batch import (
+    WavFileReader, UnsupportedAudioFile, open_audio_file, format_segments, recognize_file,
+    transcribe_file, main, TICKS_PER_SECOND
+)
+
+def make_result(offset_seconds, text, duration_seconds=1):
+    evt = MagicMock()
+    evt.result.reason = speechsdk.ResultReason.RecognizedSpeech
+    evt.result.offset = offset_seconds * TICKS_PER_SECOND
+    evt.result.duration = duration_seconds * TICKS_PER_SECOND
+    evt.result.text = text
+    return evt
+
+class FakeRecognizer:
+    """Stands in for SpeechRecognizer, replaying canned results when started."""
+
+    results = []
+
+    def __init__(self, speech_config=None, audio_config=None):
+        self.recognized = MagicMock()
+        self.canceled = MagicMock()
+        self.session_stopped = MagicMock()
+
+    def start_continuous_recognition(self):
+        handle = self.recognized.connect.call_args.args[0]
+        for evt in self.results:
+            handle(evt)
+        self.session_stopped.connect.call_args.args[0](MagicMock())
+
+    def stop_continuous_recognition(self):
+        pass
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_db_path = os.path.join(self.test_dir, 'test_meetings.db')
+        init_db(self.test_db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_wav(self, name, samples, channels=1, sample_rate=16000):
+        path = os.path.join(self.test_dir, name)
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(array.array('h', samples).tobytes())
+        return path
+
+    def test_wav_reader_streams_first_channel_in_chunks(self):
+        """Test that stereo WAV is read chunk by chunk as mono with progress."""
+        path = self.write_wav('stereo.wav', [1, -1, 2, -2, 3, -3, 4, -4], channels=2)
+        progress = []
+        reader = WavFileReader(path, on_progress=progress.append, progress_interval=0)
+
+        buffer = memoryview(bytearray(4))
+        chunks = []
+        while True:
+            size = reader.read(buffer)
+            chunks.append(bytes(buffer[:size]))
+            if not size:
+                break
+        reader.close()
+
+        self.assertEqual(b"".join(chunks), array.array('h', [1, 2, 3, 4]).tobytes())
+        self.assertEqual(progress[-1], 1.0)
+        self.assertEqual(reader.duration_seconds(), 4 / 16000)
+
+    def test_unsupported_files_rejected(self):
+        """Test that non-16-bit WAV and unknown extensions are refused."""
+        path = os.path.join(self.test_dir, 'eight_bit.wav')
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(1)
+            wav.setframerate(8000)
+            wav.writeframes(b'\x80' * 10)
+
+        with self.assertRaises(UnsupportedAudioFile):
+            open_audio_file(path)
+        with self.assertRaises(UnsupportedAudioFile):
+            open_audio_file(os.path.join(self.test_dir, 'meeting.mp3'))
+
+    def test_format_segments_uses_offsets_and_pauses(self):
+        """Test audio-relative timestamps and speaker changes after long pauses."""
+        transcript = format_segments([
+            (0, TICKS_PER_SECOND, "Hello."),
+            (2 * TICKS_PER_SECOND, TICKS_PER_SECOND, "Still me."),
+            (3725 * TICKS_PER_SECOND, TICKS_PER_SECOND, "Someone else.")
+        ])
+
+        self.assertEqual(transcript, "\n".join([
+            "[00:00:00] Speaker 1: Hello.",
+            "[00:00:02] Speaker 1: Still me.",
+            "[01:02:05] Speaker 2: Someone else."
+        ]))
+
+    @patch('batch.speechsdk.SpeechRecognizer', FakeRecognizer)
+    def test_recognize_file_collects_results_in_order(self):
+        """Test that recognized results are gathered until the session stops."""
+        FakeRecognizer.results = [make_result(5, "Second."), make_result(0, "First.")]
+        reader = WavFileReader(self.write_wav('meeting.wav', [0] * 160))
+
+        transcript = recognize_file(reader)
+        reader.close()
+
+        self.assertEqual(transcript, "[00:00:00] Speaker 1: First.\n[00:00:05] Speaker 2: Second.")
+
+    @patch('batch.speechsdk.SpeechRecognizer')
+    def test_recognize_file_times_out(self, mock_recognizer):
+        """Test that a session that never stops fails instead of holding a worker."""
+        reader = WavFileReader(self.write_wav('meeting.wav', [0] * 16000))
+        self.addCleanup(reader.close)
+
+        with self.assertRaises(TimeoutError):
+            recognize_file(reader, settings=Settings(batch_recognition_slack_seconds=0.05))
+        mock_recognizer.return_value.stop_continuous_recognition.assert_called_once()
+
+    @patch('batch.MeetingTranscriber')
+    @patch('batch.recognize_file', return_value="[00:00:00] Speaker 1: Hello.")
+    def test_transcribe_file_saves_meeting(self, mock_recognize, mock_transcriber):
+        """Test the full file job: transcribe, summarize, save and clean up."""
+        mock_transcriber.return_value.generate_summary.return_value = "Summary"
+        path = self.write_wav('upload.wav', [0] * 160)
+        stages = []
+
+        result = transcribe_file(
+            Job('batch_transcription'), path, filename='standup.wav', db_path=self.test_db_path,
+            on_progress=lambda job, filename: stages.append((filename, job.stage)), delete_after=True
+        )
+
+        meeting = get_meeting(result['db_meeting_id'], self.test_db_path)
+        self.assertEqual(meeting['transcript'], "[00:00:00] Speaker 1: Hello.")
+        self.assertEqual(meeting['summary'], "Summary")
+        self.assertEqual(result['filename'], 'standup.wav')
+        self.assertEqual([stage for _, stage in stages], ['transcribing', 'summarizing', 'saving'])
+        self.assertFalse(os.path.exists(path))
+
+    @patch('batch.transcribe_file', side_effect=lambda job, path, **kwargs: {'db_meeting_id': 1})
+    def test_cli_runs_each_file(self, mock_transcribe):
+        """Test that the CLI queues every file and reports success."""
+        paths = [self.write_wav(f'{i}.wav', [0]) for i in range(3)]
+
+        self.assertEqual(main(paths + ['--workers', '2', '--db', self.test_db_path]), 0)
+        self.assertEqual(sorted(call.args[1] for call in mock_transcribe.call_args_list), sorted(paths))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import smtplib
+import threading
+import unittest
+from openai import OpenAI
+from benchmarks.stubs import FakeRecognizerFactory, OpenAIStub, SMTPSink, SUMMARY_TEXT
+from benchmarks.compare import compare
+
+class TestBenchmarkStubs(unittest.TestCase):
+    def test_fake_recognizer_emits_results(self):
+        """Test that fake recognizers emit partial and final results until stopped."""
+        factory = FakeRecognizerFactory(segments_per_second=50, partials=1)
+        recognizer = factory()
+        finals = []
+        partials = []
+        got_final = threading.Event()
+        recognizer.recognizing.connect(lambda evt: partials.append(evt.result.text))
+        recognizer.recognized.connect(lambda evt: (finals.append(evt.result.text), got_final.set()))
+
+        recognizer.start_continuous_recognition()
+        self.assertTrue(got_final.wait(2))
+        recognizer.stop_continuous_recognition()
+
+        self.assertTrue(partials)
+        self.assertIn(finals[0], factory.sent)
+
+    def test_openai_stub_completion_and_stream(self):
+        """Test the OpenAI stub with the OpenAI client, streamed and not."""
+        stub = OpenAIStub(latency=0, chunk_delay=0)
+        stub.start()
+        self.addCleanup(stub.stop)
+        client = OpenAI(api_key='test', base_url=stub.endpoint)
+        messages = [{'role': 'user', 'content': 'Summarize'}]
+
+        response = client.chat.completions.create(model='test', messages=messages)
+        self.assertEqual(response.choices[0].message.content, SUMMARY_TEXT)
+
+        chunks = client.chat.completions.create(model='test', messages=messages, stream=True)
+        self.assertEqual("".join(c.choices[0].delta.content for c in chunks).strip(), SUMMARY_TEXT)
+        self.assertEqual(stub.requests, 2)
+
+    def test_smtp_sink_accepts_messages(self):
+        """Test that the SMTP sink accepts a login and a message."""
+        sink = SMTPSink()
+        sink.start()
+        self.addCleanup(sink.stop)
+        with smtplib.SMTP(sink.host, sink.port, timeout=5) as server:
+            server.login('user', 'password')
+            server.sendmail('from@example.com', ['to@example.com'], 'Subject: test\r\n\r\nbody')
+        self.assertEqual(sink.messages, 1)
+
+class TestBenchmarkReports(unittest.TestCase):
+    def test_compare_skips_parameters(self):
+        """Test that compare reports relative changes of measured values only."""
+        before = {'parameters': {'meetings': 1}, 'latency_ms': {'end_meeting': {'p50': 10}}}
+        after = {'parameters': {'meetings': 1}, 'latency_ms': {'end_meeting': {'p50': 15}}}
+        self.assertEqual(compare(before, after), [('latency_ms.end_meeting.p50', 10, 15, 0.5)])
+
+if __name__ == '__main__':
+    unittest.main()
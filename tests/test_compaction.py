@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+import compaction
+from compaction import clean_text, combine_compactions, compact_transcript, count_tokens, fit_to_budget
+
+class TestCompaction(unittest.TestCase):
+    def test_clean_text_strips_fillers_and_repeats(self):
+        """Test that hesitations and stuttered words are removed."""
+        self.assertEqual(clean_text("Um, I I think, uh, we should ship."), "I think, we should ship.")
+        self.assertEqual(clean_text("Uh-huh"), "")
+        self.assertEqual(clean_text("The umbrella policy"), "The umbrella policy")
+
+    def test_clean_text_keeps_numbers_and_doubled_words(self):
+        """Test that repeated numbers and correctly doubled words are not collapsed."""
+        self.assertEqual(clean_text("Call me at 555 555 1234."), "Call me at 555 555 1234.")
+        self.assertEqual(clean_text("Order 4 4 units"), "Order 4 4 units")
+        self.assertEqual(clean_text("We had had enough."), "We had had enough.")
+        self.assertEqual(clean_text("I said that that is fine, fine"), "I said that that is fine")
+
+    def test_merges_consecutive_turns_and_drops_timestamps(self):
+        """Test that one speaker's consecutive lines become one turn."""
+        transcript = "\n".join([
+            "[10:00:00] Speaker 1: Hello everyone.",
+            "[10:00:02] Speaker 1: Um, let's start.",
+            "[10:00:05] Speaker 2: Sounds good.",
+            "[10:00:07] Speaker 1: First item."
+        ])
+
+        result = compact_transcript(transcript)
+
+        self.assertEqual(result.text, "\n".join([
+            "Speaker 1: Hello everyone. Let's start.",
+            "Speaker 2: Sounds good.",
+            "Speaker 1: First item."
+        ]))
+        self.assertEqual(result.turns_before, 4)
+        self.assertEqual(result.turns_after, 3)
+        self.assertGreater(result.tokens_saved, 0)
+        self.assertEqual(result.to_dict()['tokens_saved'], result.tokens_saved)
+
+    def test_lines_without_speaker_are_kept(self):
+        """Test that unrecognized lines pass through."""
+        self.assertEqual(compact_transcript("free text line").text, "Free text line")
+
+    def test_fit_to_budget_drops_backchannels_first(self):
+        """Test that acknowledgement turns are dropped before content."""
+        turns = [("Speaker 1", "We need a plan for the launch."), ("Speaker 2", "Yeah okay."),
+                 ("Speaker 1", "Marketing owns the announcement.")]
+        budget = count_tokens("Speaker 1: We need a plan for the launch.\nSpeaker 1: Marketing owns the announcement.")
+
+        kept, omitted = fit_to_budget(turns, budget)
+
+        self.assertEqual(omitted, 1)
+        self.assertEqual([text for _, text in kept], [turns[0][1], turns[2][1]])
+
+    def test_fit_to_budget_keeps_opening_and_end(self):
+        """Test that the middle of a long meeting is elided under a tight budget."""
+        turns = [(f"Speaker {i % 2 + 1}", f"Point number {i} about the project timeline.") for i in range(200)]
+
+        result = compact_transcript("\n".join(f"[10:00:00] {s}: {t}" for s, t in turns), budget=300)
+
+        lines = result.text.splitlines()
+        self.assertLessEqual(result.tokens_after, 300)
+        self.assertIn("Point number 0 ", lines[0])
+        self.assertIn("Point number 199 ", lines[-1])
+        self.assertTrue(any("turns omitted" in line for line in lines))
+        self.assertGreater(result.turns_omitted, 0)
+
+    def test_count_tokens_without_tiktoken(self):
+        """Test the character-based estimate used when tiktoken is missing."""
+        with patch.object(compaction, 'tiktoken', None), patch.dict(compaction._encodings, clear=True):
+            self.assertEqual(count_tokens("a" * 40), 11)
+
+    def test_combine_compactions_adds_parts(self):
+        """Test that compactions of consecutive windows add up."""
+        first = compact_transcript("[10:00:00] Speaker 1: Um, hello.\n[10:00:01] Speaker 1: Let's begin.")
+        second = compact_transcript("[10:05:00] Speaker 2: Uh, we we are done.")
+
+        result = combine_compactions([first, second])
+
+        self.assertEqual(result.text, "Speaker 1: Hello. Let's begin.\nSpeaker 2: We are done.")
+        self.assertEqual(result.tokens_before, first.tokens_before + second.tokens_before)
+        self.assertEqual(result.tokens_saved, first.tokens_saved + second.tokens_saved)
+        self.assertEqual((result.turns_before, result.turns_after), (3, 2))
+
+if __name__ == '__main__':
+    unittest.main()
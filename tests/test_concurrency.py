@@ -0,0 +1,139 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+import concurrency
+from benchmarks.stubs import OpenAIStub, RedisStub
+from concurrency import LoopSocketIO, ThreadBound, configure_async_mode, run_blocking, call_in_loop
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a process patched as the gevent worker patches it. Each client first
+# opens a pooled connection on one thread, which another thread then reuses.
+PATCHED_WORKER_SCRIPT = """
+import sys
+import gevent_worker
+gevent_worker.patch_process()
+import json
+from concurrent.futures import ThreadPoolExecutor
+from concurrency import configure_async_mode
+from config import Settings
+from jobs import JobQueue
+from shared_state import connect
+from transcriber import MeetingTranscriber
+
+configure_async_mode('gevent')
+settings = Settings(azure_openai_endpoint=sys.argv[1], azure_openai_api_key='key', rolling_summary_enabled=False)
+
+def summarize(job=None):
+    return MeetingTranscriber(settings=settings).generate_summary("[10:00:00] Speaker 1: Let's ship it.")
+
+ThreadPoolExecutor(1).submit(summarize).result(30)
+job = JobQueue(max_workers=1).submit('summary', summarize)
+job.future.result(30)
+
+client = connect(sys.argv[2])
+client.set('meeting', 'worker-1')
+owner = ThreadPoolExecutor(1).submit(client.get, 'meeting').result(30)
+print(json.dumps({'job': job.status, 'owner': owner}))
+"""
+
+
+class TestConcurrency(unittest.TestCase):
+    def tearDown(self):
+        configure_async_mode('threading')
+
+    def test_unknown_mode_rejected(self):
+        """Test that an unsupported async mode stops startup."""
+        with self.assertRaises(ValueError):
+            configure_async_mode('eventlet')
+
+    def test_gevent_requires_patched_worker(self):
+        """Test that gevent mode is refused in a process that was not monkey-patched."""
+        with self.assertRaises(RuntimeError):
+            configure_async_mode('gevent')
+        self.assertFalse(concurrency.on_loop())
+
+    def test_threading_runs_in_place(self):
+        """Test that blocking calls and emits run directly in threading mode."""
+        configure_async_mode('threading')
+        fn = MagicMock(return_value=3)
+
+        self.assertEqual(run_blocking(fn, 1, key=2), 3)
+        call_in_loop(fn, 4)
+
+        fn.assert_any_call(1, key=2)
+        fn.assert_any_call(4)
+
+    def test_blocking_call_offloaded_from_loop(self):
+        """Test that a blocking call made on the event loop goes to the hub's thread pool."""
+        hub = MagicMock()
+        hub.threadpool.apply.return_value = 'done'
+        fn = MagicMock()
+        with patch.object(concurrency, '_hub', hub), \
+                patch.object(concurrency, '_loop_thread', threading.get_ident()):
+            self.assertEqual(run_blocking(fn, 1, key=2), 'done')
+
+        hub.threadpool.apply.assert_called_once_with(fn, (1,), {'key': 2})
+        fn.assert_not_called()
+
+    def test_emit_from_thread_handed_to_loop(self):
+        """Test that an emit from a worker thread is scheduled on the event loop."""
+        hub = MagicMock()
+        socketio = LoopSocketIO()
+        socketio.server = MagicMock()
+        with patch.object(concurrency, '_hub', hub), patch.object(concurrency, '_loop_thread', -1):
+            socketio.emit('transcript_update', {'text': 'hello'}, to='meeting:1')
+
+        socketio.server.emit.assert_not_called()
+        spawn, callback = hub.loop.run_callback_threadsafe.call_args.args
+        callback()
+        socketio.server.emit.assert_called_once()
+        self.assertEqual(socketio.server.emit.call_args.args[:2], ('transcript_update', {'text': 'hello'}))
+
+    def test_thread_bound_shared_without_gevent(self):
+        """Test that without patched sockets every thread gets the same value."""
+        bound = ThreadBound(object)
+        values = []
+        thread = threading.Thread(target=lambda: values.append(bound.current()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(values[0], bound.current())
+
+    def test_thread_bound_per_thread_with_gevent(self):
+        """Test that with patched sockets each thread builds its own value."""
+        bound = ThreadBound(object)
+        values = []
+        with patch.object(concurrency, 'sockets_patched', return_value=True):
+            thread = threading.Thread(target=lambda: values.append(bound.current()))
+            thread.start()
+            thread.join()
+            self.assertIsNot(values[0], bound.current())
+            self.assertIs(bound.current(), bound.current())
+
+    def test_clients_used_from_threads_in_patched_worker(self):
+        """Test a summary from a job thread and a Redis call from a pool thread under the gevent worker."""
+        openai_stub = OpenAIStub(latency=0)
+        redis_stub = RedisStub()
+        openai_stub.start()
+        redis_stub.start()
+        self.addCleanup(openai_stub.stop)
+        self.addCleanup(redis_stub.stop)
+
+        result = subprocess.run(
+            [sys.executable, '-c', PATCHED_WORKER_SCRIPT, openai_stub.endpoint, redis_stub.url],
+            cwd=ROOT, capture_output=True, text=True, timeout=120
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        self.assertNotIn("Cannot switch to a different thread", result.stderr)
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), {'job': 'succeeded', 'owner': 'worker-1'})
+        self.assertEqual(openai_stub.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
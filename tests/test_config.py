@@ -51,7 +51,21 @@ class TestConfig(unittest.TestCase):
         for input_endpoint, expected_endpoint in test_endpoints:
             with patch.dict(os.environ, {'AZURE_OPENAI_ENDPOINT': input_endpoint}, clear=True):
                 importlib.reload(config)
-                self.assertEqual(config.AZURE_OPENAI_ENDPOINT, expected_endpoint)
+                self.assertEqual(config.settings.azure_openai_endpoint, expected_endpoint)
+
+    def test_settings_read_environment_and_overrides(self):
+        """Test that Settings reads the environment when created and accepts overrides."""
+        with patch.dict(os.environ, {'MAX_CONCURRENT_MEETINGS': '3', 'SUMMARY_CACHE_ENABLED': 'false'}):
+            settings = config.Settings(database_path='other.db')
+        self.assertEqual(settings.max_concurrent_meetings, 3)
+        self.assertFalse(settings.summary_cache_enabled)
+        self.assertEqual(settings.database_path, 'other.db')
+
+    def test_settings_missing(self):
+        """Test that missing() lists unset required settings."""
+        settings = config.Settings(azure_speech_key='', email_password=None)
+        self.assertIn('AZURE_SPEECH_KEY', settings.missing())
+        self.assertIn('EMAIL_PASSWORD', settings.missing())
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
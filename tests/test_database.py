@@ -3,7 +3,14 @@ import unittest
 import sqlite3
 import tempfile
 import shutil
-from database import init_db, save_meeting, update_meeting_participants, get_all_meetings
+import threading
+from database import (
+    init_db, save_meeting, update_meeting_participants, get_all_meetings,
+    connection, get_connection, get_meetings_page, get_meeting,
+    search_meetings, rebuild_search_index,
+    begin_live_meeting, append_segments, get_live_transcript, finish_meeting,
+    claim_orphaned_meetings
+)
 
 class TestDatabase(unittest.TestCase):
     def setUp(self):
@@ -92,5 +99,143 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(meetings[0]['transcript'], "Transcript 2")  # Most recent first
         self.assertEqual(meetings[1]['transcript'], "Transcript 1")
 
+    def test_connection_uses_wal(self):
+        """Test that pooled connections are opened in WAL mode."""
+        with connection(self.test_db_path) as conn:
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, 'wal')
+
+    def test_connection_reused_per_thread(self):
+        """Test that a thread reuses its connection and other threads get their own."""
+        self.assertIs(get_connection(self.test_db_path), get_connection(self.test_db_path))
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_connection(self.test_db_path)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], get_connection(self.test_db_path))
+
+    def test_connection_rolls_back_on_error(self):
+        """Test that a failing block leaves no partial writes behind."""
+        with self.assertRaises(RuntimeError):
+            with connection(self.test_db_path) as conn:
+                conn.execute(
+                    "INSERT INTO meetings (timestamp, transcript, summary) VALUES (?, ?, ?)",
+                    ('2024-01-01', 'Partial', 'Partial')
+                )
+                raise RuntimeError("Failure mid-transaction")
+
+        self.assertEqual(get_all_meetings(self.test_db_path), [])
+
+    def test_get_meetings_page(self):
+        """Test keyset pagination over meetings, newest first."""
+        ids = [save_meeting(f"Transcript {i}", "Summary " * 100, self.test_db_path) for i in range(5)]
+
+        first_page, cursor = get_meetings_page(limit=2, db_path=self.test_db_path)
+        second_page, cursor = get_meetings_page(limit=2, cursor=cursor, db_path=self.test_db_path)
+        last_page, cursor = get_meetings_page(limit=2, cursor=cursor, db_path=self.test_db_path)
+
+        # Verify pages cover every meeting once, without transcripts
+        page_ids = [m['id'] for m in first_page + second_page + last_page]
+        self.assertEqual(page_ids, list(reversed(ids)))
+        self.assertIsNone(cursor)
+        self.assertNotIn('transcript', first_page[0])
+        self.assertEqual(len(first_page[0]['summary_preview']), 200)
+
+    def test_get_meetings_page_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        with self.assertRaises(ValueError):
+            get_meetings_page(cursor="not-a-cursor", db_path=self.test_db_path)
+
+    def test_get_meeting(self):
+        """Test fetching a single meeting with its transcript."""
+        meeting_id = save_meeting("Full transcript", "Summary", self.test_db_path)
+
+        meeting = get_meeting(meeting_id, self.test_db_path)
+
+        self.assertEqual(meeting['transcript'], "Full transcript")
+        self.assertIsNone(get_meeting(meeting_id + 1, self.test_db_path))
+
+    def test_search_meetings(self):
+        """Test ranked full-text search with highlighted snippets."""
+        save_meeting("Speaker 1: we discussed the hiring plan", "Hiring update", self.test_db_path)
+        budget_id = save_meeting("Speaker 1: the budget <review> is due", "Budget approved", self.test_db_path)
+
+        results, next_offset = search_meetings("budget", db_path=self.test_db_path)
+
+        self.assertEqual([r['id'] for r in results], [budget_id])
+        self.assertIsNone(next_offset)
+        self.assertIn("<mark>budget</mark>", results[0]['transcript_snippet'])
+        self.assertIn("&lt;review&gt;", results[0]['transcript_snippet'])
+        self.assertEqual(results[0]['summary_snippet'], "<mark>Budget</mark> approved")
+
+    def test_search_index_follows_updates_and_deletes(self):
+        """Test that triggers keep the search index in sync with meetings."""
+        meeting_id = save_meeting("Speaker 1: roadmap", "Roadmap", self.test_db_path)
+        with connection(self.test_db_path) as conn:
+            conn.execute("UPDATE meetings SET summary = ? WHERE id = ?", ("Launch plan", meeting_id))
+        self.assertEqual(len(search_meetings("launch", db_path=self.test_db_path)[0]), 1)
+
+        with connection(self.test_db_path) as conn:
+            conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
+        self.assertEqual(search_meetings("roadmap", db_path=self.test_db_path)[0], [])
+
+    def test_search_meetings_pagination_and_syntax(self):
+        """Test offset pagination and that FTS operators in input are treated as text."""
+        for i in range(3):
+            save_meeting(f"Speaker 1: standup {i}", "Standup", self.test_db_path)
+
+        first_page, next_offset = search_meetings("standup", limit=2, db_path=self.test_db_path)
+        last_page, final_offset = search_meetings("standup", limit=2, offset=next_offset, db_path=self.test_db_path)
+
+        self.assertEqual((len(first_page), next_offset), (2, 2))
+        self.assertEqual((len(last_page), final_offset), (1, None))
+        self.assertEqual(search_meetings('stand* AND (', db_path=self.test_db_path)[0], [])
+        self.assertEqual(len(search_meetings('stand*', db_path=self.test_db_path)[0]), 3)
+
+    def test_rebuild_search_index(self):
+        """Test backfilling the index for rows written without triggers."""
+        save_meeting("Speaker 1: quarterly planning", "Planning", self.test_db_path)
+        with connection(self.test_db_path) as conn:
+            conn.execute("DELETE FROM meetings_fts")
+        self.assertEqual(search_meetings("quarterly", db_path=self.test_db_path)[0], [])
+
+        self.assertEqual(rebuild_search_index(self.test_db_path), 1)
+        self.assertEqual(len(search_meetings("quarterly", db_path=self.test_db_path)[0]), 1)
+
+    def test_finish_meeting(self):
+        """Test that finishing a live meeting saves it and drops its segments."""
+        begin_live_meeting('live-1', 'host:1', self.test_db_path)
+        append_segments([('live-1', 0, '10:00:00', 'Speaker 1', 1, 'Hello')], db_path=self.test_db_path)
+
+        meeting_id = finish_meeting('live-1', "[10:00:00] Speaker 1: Hello", "Summary", db_path=self.test_db_path)
+
+        self.assertEqual(get_meeting(meeting_id, self.test_db_path)['summary'], "Summary")
+        self.assertEqual(get_live_transcript('live-1', self.test_db_path), "")
+        conn = sqlite3.connect(self.test_db_path)
+        row = conn.execute("SELECT status, saved_meeting_id FROM live_meetings WHERE meeting_id = 'live-1'").fetchone()
+        conn.close()
+        self.assertEqual(row, ('finished', meeting_id))
+
+    def test_claim_orphaned_meetings(self):
+        """Test that only meetings of dead owners are claimed, and only once."""
+        begin_live_meeting('dead-owner', 'host:1', self.test_db_path)
+        begin_live_meeting('live-owner', 'host:2', self.test_db_path)
+        begin_live_meeting('own-meeting', 'host:3', self.test_db_path)
+        is_alive = lambda owner: owner != 'host:1'
+
+        claimed = claim_orphaned_meetings('host:3', is_alive, 60, self.test_db_path)
+
+        self.assertEqual(claimed, ['dead-owner'])
+        self.assertEqual(claim_orphaned_meetings('host:4', is_alive, 60, self.test_db_path), [])
+
+    def test_claim_orphaned_meetings_stale_heartbeat(self):
+        """Test that a meeting with a stale heartbeat is claimed even if its owner looks alive."""
+        begin_live_meeting('stale', 'other-host:1', self.test_db_path)
+
+        claimed = claim_orphaned_meetings('host:3', lambda owner: True, -1, self.test_db_path)
+
+        self.assertEqual(claimed, ['stale'])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
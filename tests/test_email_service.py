@@ -1,13 +1,20 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from email_service import send_meeting_summary
-from config import EMAIL_USER, EMAIL_PASSWORD, EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT
+import smtplib
+from email_service import send_meeting_summary, SMTPSession, build_message
+from config import Settings
 
 class TestEmailService(unittest.TestCase):
     def setUp(self):
         # Test data
         self.test_participants = ["test1@example.com", "test2@example.com"]
         self.test_summary = "Test meeting summary"
+        self.settings = Settings(
+            email_user="sender@example.com",
+            email_password="secret",
+            email_smtp_server="smtp.example.com",
+            email_smtp_port=2525
+        )
 
     @patch('smtplib.SMTP')
     def test_send_meeting_summary_success(self, mock_smtp):
@@ -16,16 +23,16 @@ class TestEmailService(unittest.TestCase):
         mock_smtp.return_value.__enter__.return_value = mock_smtp_instance
         
         # Send email
-        success, message = send_meeting_summary(self.test_participants, self.test_summary)
+        success, message = send_meeting_summary(self.test_participants, self.test_summary, self.settings)
         
         # Verify results
         self.assertTrue(success)
         self.assertEqual(message, "Email sent successfully")
         
         # Verify SMTP calls
-        mock_smtp.assert_called_once_with(EMAIL_SMTP_SERVER, int(EMAIL_SMTP_PORT))
+        mock_smtp.assert_called_once_with("smtp.example.com", 2525)
         mock_smtp_instance.starttls.assert_called_once()
-        mock_smtp_instance.login.assert_called_once_with(EMAIL_USER, EMAIL_PASSWORD)
+        mock_smtp_instance.login.assert_called_once_with("sender@example.com", "secret")
         mock_smtp_instance.send_message.assert_called_once()
 
     @patch('smtplib.SMTP')
@@ -56,5 +63,46 @@ class TestEmailService(unittest.TestCase):
         self.assertFalse(success)
         self.assertEqual(message, "No summary content provided")
 
+    @patch('smtplib.SMTP')
+    def test_session_reuses_connection(self, mock_smtp):
+        # Send two messages over one session
+        session = SMTPSession(settings=self.settings)
+        session.send(build_message(self.test_participants, "Subject", "Body"))
+        session.send(build_message(self.test_participants, "Subject", "Body"))
+        
+        # Verify a single connect and login with the session's settings
+        mock_smtp.assert_called_once_with("smtp.example.com", 2525, timeout=self.settings.smtp_timeout_seconds)
+        mock_smtp.return_value.login.assert_called_once_with("sender@example.com", "secret")
+        self.assertEqual(mock_smtp.return_value.send_message.call_count, 2)
+
+    @patch('smtplib.SMTP')
+    def test_session_reconnects_after_disconnect(self, mock_smtp):
+        # Configure the first connection to have been dropped by the server
+        dropped = MagicMock()
+        dropped.send_message.side_effect = smtplib.SMTPServerDisconnected("Connection closed")
+        fresh = MagicMock()
+        mock_smtp.side_effect = [dropped, fresh]
+        session = SMTPSession()
+        
+        session.send(build_message(self.test_participants, "Subject", "Body"))
+        
+        self.assertEqual(mock_smtp.call_count, 2)
+        fresh.send_message.assert_called_once()
+
+    @patch('smtplib.SMTP')
+    def test_session_closes_when_idle(self, mock_smtp):
+        session = SMTPSession(idle_timeout=0)
+        session.send(build_message(self.test_participants, "Subject", "Body"))
+        
+        session.close_if_idle()
+        
+        mock_smtp.return_value.quit.assert_called_once()
+
+    def test_build_message_from_sender(self):
+        msg = build_message(self.test_participants, "Subject", "Body", "sender@example.com")
+        
+        self.assertEqual(msg['From'], "sender@example.com")
+        self.assertEqual(msg['To'], ", ".join(self.test_participants))
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import MagicMock
+from jobs import JobQueue, SUCCEEDED, FAILED
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.on_complete = MagicMock()
+        self.queue = JobQueue(max_workers=2, on_complete=self.on_complete)
+
+    def tearDown(self):
+        self.queue.shutdown()
+
+    def test_job_succeeds(self):
+        """Test that a job's return value becomes its result."""
+        def work(job, value):
+            job.set_stage('working')
+            return value * 2
+
+        job = self.queue.submit('double', work, 21, meeting_id='meeting-1')
+        self.queue.wait(job.id, timeout=5)
+
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual(job.result, 42)
+        self.assertEqual(job.stage, 'working')
+        self.assertEqual(job.to_dict()['meeting_id'], 'meeting-1')
+        self.on_complete.assert_called_once_with(job)
+
+    def test_job_fails(self):
+        """Test that an exception marks the job as failed."""
+        def work(job):
+            raise ValueError("Summary failed")
+
+        job = self.queue.submit('fail', work)
+        self.queue.wait(job.id, timeout=5)
+
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "Summary failed")
+        self.on_complete.assert_called_once_with(job)
+
+    def test_get_unknown_job(self):
+        """Test looking up a job that does not exist."""
+        self.assertIsNone(self.queue.get('missing'))
+
+    def test_finished_jobs_expire(self):
+        """Test that finished jobs are pruned after the retention window."""
+        self.queue.retention_seconds = 0
+        job = self.queue.submit('noop', lambda job: None)
+        self.queue.wait(job.id, timeout=5)
+        job.finished_at -= 1
+
+        self.queue.submit('noop', lambda job: None)
+        self.assertIsNone(self.queue.get(job.id))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock
+from meeting_registry import MeetingRegistry, MeetingLimitReached
+
+class TestMeetingRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MeetingRegistry(max_meetings=2, idle_timeout=60)
+
+    def make_transcriber(self, meeting_id):
+        transcriber = MagicMock()
+        transcriber.meeting_id = meeting_id
+        transcriber.last_activity = 1000.0
+        return transcriber
+
+    def test_start_meeting_registers_transcriber(self):
+        """Test that started meetings are registered under distinct ids."""
+        first_id, first = self.registry.start_meeting(self.make_transcriber)
+        second_id, second = self.registry.start_meeting(self.make_transcriber)
+
+        self.assertNotEqual(first_id, second_id)
+        self.assertIs(self.registry.get(first_id), first)
+        self.assertIs(self.registry.get(second_id), second)
+        first.start_recording.assert_called_once()
+        self.assertEqual(len(self.registry), 2)
+
+    def test_start_meeting_limit(self):
+        """Test that the concurrent meeting cap is enforced."""
+        self.registry.start_meeting(self.make_transcriber)
+        self.registry.start_meeting(self.make_transcriber)
+
+        with self.assertRaises(MeetingLimitReached):
+            self.registry.start_meeting(self.make_transcriber)
+
+    def test_failed_start_releases_slot(self):
+        """Test that a transcriber failing to start does not consume a slot."""
+        def failing_factory(meeting_id):
+            transcriber = self.make_transcriber(meeting_id)
+            transcriber.start_recording.side_effect = Exception("No microphone")
+            return transcriber
+
+        with self.assertRaises(Exception):
+            self.registry.start_meeting(failing_factory)
+        self.assertEqual(len(self.registry), 0)
+        self.registry.start_meeting(self.make_transcriber)
+        self.registry.start_meeting(self.make_transcriber)
+
+    def test_pop_and_pop_only(self):
+        """Test unregistering meetings by id and the single-meeting fallback."""
+        meeting_id, transcriber = self.registry.start_meeting(self.make_transcriber)
+        self.assertEqual(self.registry.pop_only(), (meeting_id, transcriber))
+        self.assertIsNone(self.registry.pop(meeting_id))
+
+        self.registry.start_meeting(self.make_transcriber)
+        self.registry.start_meeting(self.make_transcriber)
+        self.assertEqual(self.registry.pop_only(), (None, None))
+
+    def test_reap_idle(self):
+        """Test that only idle meetings are reaped and handed to on_reap."""
+        on_reap = MagicMock()
+        self.registry.on_reap = on_reap
+        idle_id, idle = self.registry.start_meeting(self.make_transcriber)
+        active_id, active = self.registry.start_meeting(self.make_transcriber)
+        active.last_activity = 1050.0
+
+        reaped = self.registry.reap_idle(now=1070.0)
+
+        self.assertEqual(reaped, [idle_id])
+        on_reap.assert_called_once_with(idle_id, idle)
+        self.assertIsNone(self.registry.get(idle_id))
+        self.assertIs(self.registry.get(active_id), active)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from metrics import MetricsRegistry, timed, percentiles
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_render(self):
+        """Test counter values per label set in exposition format."""
+        counter = self.registry.counter('tokens_total', 'Tokens used', ('type',))
+        counter.inc(10, type='prompt')
+        counter.inc(5, type='prompt')
+        counter.inc(3, type='completion')
+
+        output = self.registry.render()
+
+        self.assertIn('# TYPE tokens_total counter', output)
+        self.assertIn('tokens_total{type="prompt"} 15', output)
+        self.assertIn('tokens_total{type="completion"} 3', output)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram bucket counts, sum and count."""
+        histogram = self.registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 2.0):
+            histogram.observe(value)
+
+        output = self.registry.render()
+
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', output)
+        self.assertIn('latency_seconds_bucket{le="1"} 3', output)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', output)
+        self.assertIn('latency_seconds_sum 3.05', output)
+        self.assertIn('latency_seconds_count 4', output)
+
+    def test_timed_decorator(self):
+        """Test that the timed decorator records one observation per call."""
+        histogram = self.registry.histogram('call_seconds', 'Call time', ('function',))
+
+        @timed(histogram, function='work')
+        def work():
+            return 'done'
+
+        self.assertEqual(work(), 'done')
+        self.assertEqual(histogram.count(function='work'), 1)
+
+    def test_gauge_function_and_label_escaping(self):
+        """Test callback gauges and escaping of label values."""
+        self.registry.gauge('active', 'Active things', function=lambda: 3)
+        gauge = self.registry.gauge('labelled', 'Labelled gauge', ('name',))
+        gauge.set(1, name='say "hi"\n')
+
+        output = self.registry.render()
+
+        self.assertIn('active 3', output)
+        self.assertIn('labelled{name="say \\"hi\\"\\n"} 1', output)
+
+    def test_register_returns_existing_metric(self):
+        """Test that registering a name twice returns the original metric."""
+        first = self.registry.counter('events_total', 'Events')
+        second = self.registry.counter('events_total', 'Events')
+        self.assertIs(first, second)
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles in milliseconds."""
+        result = percentiles([i / 1000 for i in range(1, 101)])
+        self.assertEqual(result['count'], 100)
+        self.assertEqual(result['p50'], 50)
+        self.assertEqual(result['p99'], 99)
+        self.assertEqual(percentiles([]), {'count': 0})
+
+if __name__ == '__main__':
+    unittest.main()
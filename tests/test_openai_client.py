@@ -0,0 +1,194 @@
+import time
+import threading
+import unittest
+from unittest.mock import MagicMock
+import openai
+from openai_client import (
+    ResilientOpenAI, RateLimiter, CircuitBreaker, CircuitOpenError, DeadlineExceeded,
+    failure_reason, retry_after
+)
+
+def make_status_error(cls, status_code, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return cls("API error", response=response, body=None)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_failure_reason(self):
+        """Test which errors are retried."""
+        self.assertEqual(failure_reason(make_status_error(openai.RateLimitError, 429)), 'rate_limited')
+        self.assertEqual(failure_reason(make_status_error(openai.InternalServerError, 503)), 'server_error')
+        self.assertIsNone(failure_reason(make_status_error(openai.BadRequestError, 400)))
+        self.assertIsNone(failure_reason(ValueError("not an API error")))
+
+    def test_retry_after(self):
+        """Test that Retry-After is read in milliseconds, seconds or as an HTTP date."""
+        def wait(headers):
+            return retry_after(make_status_error(openai.RateLimitError, 429, headers))
+
+        self.assertEqual(wait({'retry-after-ms': '1500'}), 1.5)
+        self.assertEqual(wait({'retry-after': '7'}), 7.0)
+        self.assertEqual(wait({'retry-after': 'Thu, 01 Jan 1970 00:00:00 GMT'}), 0.0)
+        self.assertIsNone(wait({}))
+        self.assertIsNone(wait({'retry-after': 'soon'}))
+
+class TestRateLimiter(unittest.TestCase):
+    def test_request_limit(self):
+        """Test that requests beyond the burst wait for the bucket to refill."""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=6, clock=clock)
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertFalse(limiter.try_acquire())
+        with self.assertRaises(DeadlineExceeded):
+            limiter.acquire(deadline=clock.now + 1)
+        clock.now += 10
+        self.assertTrue(limiter.try_acquire())
+
+    def test_token_limit_and_pause(self):
+        """Test the token bucket, oversized requests and a Retry-After pause."""
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=600, clock=clock)
+        self.assertTrue(limiter.try_acquire(400))
+        self.assertFalse(limiter.try_acquire(400))
+        clock.now += 60
+        # A request larger than the bucket waits for a full bucket rather than forever
+        self.assertTrue(limiter.try_acquire(5000))
+        clock.now += 60
+        limiter.pause(5)
+        self.assertFalse(limiter.try_acquire(1))
+        clock.now += 5
+        self.assertTrue(limiter.try_acquire(1))
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_recovers(self):
+        """Test that failures open the circuit and a successful trial closes it."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=clock)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        clock.now += 30
+        breaker.before_call()
+        # Only one trial request while half-open
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+        breaker.before_call()
+
+class TestResilientOpenAI(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.sleeps = []
+        self.limiter = RateLimiter()
+
+    def make_completions(self, **kwargs):
+        options = dict(
+            limiter=self.limiter, breaker=CircuitBreaker(failure_threshold=3), max_retries=2,
+            deadline_seconds=60, request_timeout=30, hedge_after=0, sleep=self.sleeps.append
+        )
+        options.update(kwargs)
+        return ResilientOpenAI(lambda: self.client, **options)
+
+    def test_retries_rate_limited_request(self):
+        """Test that a 429 is retried after the Retry-After it asked for."""
+        response = MagicMock()
+        self.client.chat.completions.create.side_effect = [
+            make_status_error(openai.RateLimitError, 429, {'retry-after-ms': '50'}), response
+        ]
+
+        start = time.monotonic()
+        self.assertIs(self.make_completions().create(model='test', messages=[]), response)
+        # The wait happens in the shared limiter, so other callers hold off too
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(self.sleeps, [])
+        self.assertLessEqual(self.client.chat.completions.create.call_args.kwargs['timeout'], 30)
+
+    def test_backs_off_on_server_error(self):
+        """Test that a server error without Retry-After is retried after a jittered backoff."""
+        response = MagicMock()
+        self.client.chat.completions.create.side_effect = [
+            make_status_error(openai.InternalServerError, 503), response
+        ]
+        self.assertIs(self.make_completions().create(model='test', messages=[]), response)
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_does_not_retry_client_errors(self):
+        """Test that a bad request is raised at once."""
+        self.client.chat.completions.create.side_effect = make_status_error(openai.BadRequestError, 400)
+        with self.assertRaises(openai.BadRequestError):
+            self.make_completions().create(model='test', messages=[])
+        self.assertEqual(self.client.chat.completions.create.call_count, 1)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that server errors are retried max_retries times and open the circuit."""
+        self.client.chat.completions.create.side_effect = make_status_error(openai.InternalServerError, 500)
+        completions = self.make_completions()
+        with self.assertRaises(openai.InternalServerError):
+            completions.create(model='test', messages=[])
+        self.assertEqual(self.client.chat.completions.create.call_count, 3)
+        self.assertTrue(completions.breaker.is_open)
+        with self.assertRaises(CircuitOpenError):
+            completions.create(model='test', messages=[])
+
+    def test_backoff_past_deadline(self):
+        """Test that a retry that cannot finish within the deadline is not attempted."""
+        self.client.chat.completions.create.side_effect = make_status_error(
+            openai.RateLimitError, 429, {'retry-after': '120'}
+        )
+        with self.assertRaises(DeadlineExceeded):
+            self.make_completions(deadline_seconds=10).create(model='test', messages=[])
+        self.assertEqual(self.sleeps, [])
+
+    def test_deadline_before_send_keeps_trial_slot(self):
+        """Test that a request whose deadline passes in the limiter does not take the half-open trial."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        limiter = MagicMock()
+        limiter.acquire.side_effect = lambda tokens, deadline: time.sleep(0.02)
+        with self.assertRaises(DeadlineExceeded):
+            self.make_completions(limiter=limiter, breaker=breaker, deadline_seconds=0.01).create(model='test', messages=[])
+
+        # The trial request can still go out
+        breaker.before_call()
+        self.client.chat.completions.create.assert_not_called()
+
+    def test_hedged_request(self):
+        """Test that a slow request is hedged and the first answer wins."""
+        calls = []
+        lock = threading.Lock()
+
+        def create(**kwargs):
+            with lock:
+                calls.append(kwargs['timeout'])
+                first = len(calls) == 1
+            if first:
+                time.sleep(0.5)
+                return 'slow'
+            return 'fast'
+        self.client.chat.completions.create.side_effect = create
+
+        result = self.make_completions(hedge_after=0.05).create(model='test', messages=[])
+        self.assertEqual(result, 'fast')
+        self.assertEqual(len(calls), 2)
+
+    def test_streams_are_not_hedged(self):
+        """Test that streamed requests run once even when slow."""
+        self.client.chat.completions.create.side_effect = lambda **kwargs: time.sleep(0.1) or 'stream'
+        result = self.make_completions(hedge_after=0.01).create(model='test', messages=[], stream=True)
+        self.assertEqual(result, 'stream')
+        self.assertEqual(self.client.chat.completions.create.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
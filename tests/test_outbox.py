@@ -0,0 +1,159 @@
+import os
+import datetime
+import unittest
+import smtplib
+import sqlite3
+import tempfile
+import shutil
+from unittest.mock import MagicMock, patch
+from config import Settings
+from database import init_db, get_outbox_message, claim_due_emails, requeue_sending_emails
+from outbox import OutboxSender, retry_delay
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_db_path = os.path.join(self.test_dir, 'test_meetings.db')
+        init_db(self.test_db_path)
+        self.session = MagicMock()
+        self.statuses = []
+        self.outbox = OutboxSender(
+            db_path=self.test_db_path,
+            batch_size=2,
+            max_attempts=2,
+            session=self.session,
+            on_status=lambda message_id, status, error, meeting_id: self.statuses.append((message_id, status))
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_batch_shares_session(self):
+        """Test that every due message is sent through the same session."""
+        ids = [self.outbox.enqueue([f"user{i}@example.com"], "Subject", "Body") for i in range(3)]
+
+        self.assertEqual(self.outbox.send_due(), 3)
+
+        self.assertEqual(self.session.send.call_count, 3)
+        self.assertEqual(self.statuses, [(message_id, 'sent') for message_id in ids])
+        self.assertEqual(self.session.send.call_args.args[0]['To'], "user2@example.com")
+        self.assertEqual(get_outbox_message(ids[0], self.test_db_path)['status'], 'sent')
+
+    def test_transient_failure_retried_later(self):
+        """Test that a failed delivery is requeued with a backoff and not retried immediately."""
+        self.session.send.side_effect = smtplib.SMTPServerDisconnected("Connection lost")
+        message_id = self.outbox.enqueue(["user@example.com"], "Subject", "Body")
+
+        self.outbox.send_due()
+        self.outbox.send_due()
+
+        message = get_outbox_message(message_id, self.test_db_path)
+        self.assertEqual(message['status'], 'queued')
+        self.assertEqual(message['attempts'], 1)
+        self.assertIn("Connection lost", message['last_error'])
+        self.assertEqual(self.session.send.call_count, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that the last allowed attempt marks the message failed."""
+        self.session.send.side_effect = smtplib.SMTPServerDisconnected("Connection lost")
+        message_id = self.outbox.enqueue(["user@example.com"], "Subject", "Body")
+        self.outbox.send_due()
+        # Make the retry due now
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute("UPDATE outbox SET next_attempt_at = created_at")
+        conn.commit()
+        conn.close()
+
+        self.outbox.send_due()
+
+        self.assertEqual(get_outbox_message(message_id, self.test_db_path)['status'], 'failed')
+        self.assertEqual(self.statuses, [(message_id, 'queued'), (message_id, 'failed')])
+
+    def test_permanent_failure_not_retried(self):
+        """Test that a 5xx reply fails the message on the first attempt."""
+        self.session.send.side_effect = smtplib.SMTPAuthenticationError(535, b"Bad credentials")
+        message_id = self.outbox.enqueue(["user@example.com"], "Subject", "Body")
+
+        self.outbox.send_due()
+
+        message = get_outbox_message(message_id, self.test_db_path)
+        self.assertEqual(message['status'], 'failed')
+        self.assertTrue(message['last_error'].startswith("Authentication failed"))
+
+    def test_interrupted_messages_requeued(self):
+        """Test that messages claimed by a stopped sender are queued again."""
+        message_id = self.outbox.enqueue(["user@example.com"], "Subject", "Body")
+        claim_due_emails(10, self.test_db_path, owner='host:1')
+
+        self.assertEqual(requeue_sending_emails('host:2', lambda owner: False, 600, self.test_db_path), 1)
+        self.assertEqual(get_outbox_message(message_id, self.test_db_path)['status'], 'queued')
+
+    def test_live_senders_messages_not_requeued(self):
+        """Test that a starting worker leaves messages another live worker is sending."""
+        message_id = self.outbox.enqueue(["user@example.com"], "Subject", "Body")
+        claim_due_emails(10, self.test_db_path, owner='host:1')
+
+        self.assertEqual(requeue_sending_emails('host:2', lambda owner: True, 600, self.test_db_path), 0)
+        self.assertEqual(get_outbox_message(message_id, self.test_db_path)['status'], 'sending')
+        # Its own claims, and claims gone stale, are requeued
+        self.assertEqual(requeue_sending_emails('host:1', lambda owner: True, 600, self.test_db_path), 1)
+        claim_due_emails(10, self.test_db_path, owner='host:1')
+        self.assertEqual(requeue_sending_emails('host:2', lambda owner: True, 0, self.test_db_path), 1)
+
+    def test_outbox_columns_added_to_old_database(self):
+        """Test that init_db adds the claim and meeting columns to an outbox created before them."""
+        path = os.path.join(self.test_dir, 'old.db')
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, recipients TEXT NOT NULL, "
+            "subject TEXT NOT NULL, body TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'queued', "
+            "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, created_at DATETIME NOT NULL, "
+            "next_attempt_at DATETIME NOT NULL, sent_at DATETIME)"
+        )
+        conn.close()
+
+        init_db(path)
+
+        columns = {row[1] for row in sqlite3.connect(path).execute("PRAGMA table_info(outbox)")}
+        self.assertTrue({'owner', 'claimed_at', 'meeting_id'} <= columns)
+
+    def test_status_names_meeting(self):
+        """Test that delivery status reports the meeting an email was queued for."""
+        statuses = []
+        self.outbox.on_status = lambda *args: statuses.append(args)
+        message_id = self.outbox.enqueue(["user@example.com"], "Subject", "Body", meeting_id='meeting-1')
+
+        self.outbox.send_due()
+
+        self.assertEqual(statuses, [(message_id, 'sent', None, 'meeting-1')])
+
+    def test_retry_delay_backs_off(self):
+        """Test exponential backoff with a cap."""
+        self.assertEqual(retry_delay(1, base=10, maximum=100), 10)
+        self.assertEqual(retry_delay(3, base=10, maximum=100), 40)
+        self.assertEqual(retry_delay(5, base=10, maximum=100), 100)
+
+    @patch('smtplib.SMTP')
+    def test_settings_reach_session_and_backoff(self, mock_smtp):
+        """Test that the sender's settings configure its SMTP session, sender address and retries."""
+        settings = Settings(
+            email_user="sender@example.com", email_password="secret", email_smtp_server="smtp.example.com",
+            email_smtp_port=2525, outbox_max_attempts=3, outbox_retry_base_seconds=7
+        )
+        outbox = OutboxSender(db_path=self.test_db_path, settings=settings)
+        mock_smtp.return_value.send_message.side_effect = smtplib.SMTPServerDisconnected("Closed")
+        message_id = outbox.enqueue(["user@example.com"], "Subject", "Body")
+
+        before = datetime.datetime.now()
+        outbox.send_due()
+
+        self.assertEqual(mock_smtp.call_args.args, ("smtp.example.com", 2525))
+        mock_smtp.return_value.login.assert_called_with("sender@example.com", "secret")
+        self.assertEqual(mock_smtp.return_value.send_message.call_args.args[0]['From'], "sender@example.com")
+        message = get_outbox_message(message_id, self.test_db_path)
+        self.assertEqual(message['status'], 'queued')
+        retry_at = datetime.datetime.fromisoformat(str(message['next_attempt_at']))
+        self.assertAlmostEqual((retry_at - before).total_seconds(), 7, delta=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from audio_stream import negotiate_audio_format
+from config import Settings
+from benchmarks.stubs import FakeConnection
+from recognizer_pool import RecognizerPool, CONNECTED, OPENING, DISCONNECTED
+
+
+class SilentConnection(FakeConnection):
+    """Connection that stays opening until the test says otherwise."""
+
+    def open(self, for_continuous_recognition):
+        pass
+
+
+class TestRecognizerPool(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.audio_format = negotiate_audio_format()
+        self.pool = RecognizerPool(self.audio_format, size=2, max_idle=60, clock=lambda: self.now)
+        self.recognizer = patch('recognizer_pool.speechsdk.SpeechRecognizer',
+                                side_effect=lambda **kwargs: MagicMock(session_id='s'))
+        self.connection = patch('recognizer_pool.speechsdk.Connection', FakeConnection)
+        self.speech_config = patch('recognizer_pool.get_speech_config', return_value=MagicMock())
+        for patcher in (self.recognizer, self.connection, self.speech_config):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_check_fills_pool_with_connected_recognizers(self):
+        """Test that check builds up to size and opens each connection."""
+        self.pool.check()
+
+        self.assertEqual(len(self.pool), 2)
+        self.assertTrue(all(warm.state == CONNECTED for warm in self.pool._idle))
+
+    def test_acquire_prefers_connected(self):
+        """Test that a connected recognizer is handed out before one still connecting."""
+        with patch('recognizer_pool.speechsdk.Connection', SilentConnection):
+            self.pool.check()
+        opening, connected = self.pool._idle
+        connected.state = CONNECTED
+
+        self.assertIs(self.pool.acquire(self.audio_format), connected)
+        self.assertIs(self.pool.acquire(self.audio_format), opening)
+        self.assertEqual(opening.state, OPENING)
+        self.assertIsNone(self.pool.acquire(self.audio_format))
+
+    def test_acquire_other_format_misses(self):
+        """Test that a meeting in another audio format does not take a pooled recognizer."""
+        self.pool.check()
+
+        other = negotiate_audio_format({'sample_rate': 8000}, Settings(audio_sample_rates=(16000, 8000)))
+        self.assertIsNone(self.pool.acquire(other))
+        self.assertEqual(len(self.pool), 2)
+
+    def test_check_replaces_disconnected_and_stale(self):
+        """Test that dropped and long-idle recognizers are closed and replaced."""
+        self.pool.check()
+        dropped, stale = self.pool._idle
+        dropped.state = DISCONNECTED
+        stale.connection.close = MagicMock()
+        self.now = 30
+
+        self.pool.check()
+        self.assertNotIn(dropped, self.pool._idle)
+        self.assertIn(stale, self.pool._idle)
+
+        self.now = 60
+        self.pool.check()
+        self.assertNotIn(stale, self.pool._idle)
+        stale.connection.close.assert_called_once()
+        self.assertEqual(len(self.pool), 2)
+
+    def test_stop_closes_idle_recognizers(self):
+        """Test that stopping the pool closes the connections it still holds."""
+        self.pool.check()
+        idle = list(self.pool._idle)
+
+        self.pool.stop()
+
+        self.assertEqual(len(self.pool), 0)
+        self.assertTrue(all(warm.state == DISCONNECTED for warm in idle))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from replay import RecognitionRecorder, ReplayClock, read_capture, replay, result_words, main
+from transcriber import MeetingTranscriber
+
+def make_result(text, offset, words=()):
+    detailed = {'NBest': [{'Words': [{'Word': w, 'Offset': offset, 'Duration': 100} for w in words]}]}
+    return SimpleNamespace(result=SimpleNamespace(text=text, offset=offset, duration=500, json=json.dumps(detailed)))
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.capture = os.path.join(self.test_dir, 'captures', 'meeting.jsonl.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_capture(self, events):
+        os.makedirs(os.path.dirname(self.capture), exist_ok=True)
+        with gzip.open(self.capture, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'version': 1, 'meeting_id': 'm1', 'started_at': 1000.0}) + "\n")
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+    def test_recorder_round_trip(self):
+        """Test that recorded events are read back with their word timings."""
+        recorder = RecognitionRecorder(self.capture, meeting_id='m1')
+        recorder.record(make_result("hello there", 10, words=("hello", "there")))
+        recorder.record(make_result("second", 20))
+        recorder.close()
+
+        header, events = read_capture(self.capture)
+
+        self.assertEqual(header['meeting_id'], 'm1')
+        self.assertEqual([e['text'] for e in events], ["hello there", "second"])
+        self.assertEqual(events[0]['words'], [['hello', 10, 100], ['there', 10, 100]])
+        self.assertEqual(events[1]['offset'], 20)
+
+    def test_result_words_without_detailed_result(self):
+        """Test that results without detailed JSON have no word timings."""
+        self.assertEqual(result_words(SimpleNamespace(json='')), [])
+
+    def test_replay_keeps_recorded_speaker_gaps(self):
+        """Test that speaker changes follow the captured timing at any speed."""
+        events = [
+            {'t': 0.5, 'text': 'one', 'offset': 0, 'duration': 1, 'words': []},
+            {'t': 1.0, 'text': 'two', 'offset': 1, 'duration': 1, 'words': []},
+            {'t': 4.0, 'text': 'three', 'offset': 2, 'duration': 1, 'words': []}
+        ]
+        clock = ReplayClock(1000.0)
+        transcriber = MeetingTranscriber(meeting_id='m1', clock=clock)
+
+        stats = replay(events, transcriber, speed=None, clock=clock)
+
+        self.assertEqual(stats['events'], 3)
+        self.assertEqual(stats['handle_result_ms']['count'], 3)
+        self.assertEqual(
+            [entry['speaker_id'] for entry in transcriber.speaker_transcript], [1, 1, 2]
+        )
+
+    def test_cli_replays_with_persistence_and_profiles(self):
+        """Test the replay CLI end to end with persistence and both profile outputs."""
+        self.write_capture([
+            {'t': i * 0.01, 'text': f'segment {i}', 'offset': i, 'duration': 1, 'words': []}
+            for i in range(20)
+        ])
+        profile = os.path.join(self.test_dir, 'replay.prof')
+        folded = os.path.join(self.test_dir, 'replay.folded')
+        with patch('sys.stdout'), patch('sys.stderr'):
+            result = main([
+                self.capture, '--speed', 'max', '--persist', '--no-emit',
+                '--db', os.path.join(self.test_dir, 'replay.db'),
+                '--profile', profile, '--folded', folded
+            ])
+        self.assertEqual(result, 0)
+        self.assertTrue(os.path.getsize(profile))
+        self.assertTrue(os.path.exists(folded))
+
+if __name__ == '__main__':
+    unittest.main()
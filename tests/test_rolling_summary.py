@@ -0,0 +1,79 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from rolling_summary import RollingSummary
+
+class TestRollingSummary(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.calls = []
+        self.updates = []
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def update(self, previous, window):
+        self.calls.append((previous, window))
+        return f"summary {len(self.calls)}"
+
+    def make_rolling(self, update=None, **kwargs):
+        options = dict(window_tokens=10, interval=300)
+        options.update(kwargs)
+        return RollingSummary(update or self.update, self.executor, on_update=self.updates.append, **options)
+
+    def test_windows_folded_into_summary(self):
+        """Test that full windows are summarized with the previous summary."""
+        rolling = self.make_rolling()
+        rolling.add("A" * 40, 0)
+        rolling._future.result(5)
+        rolling.add("B" * 40, 1)
+        rolling._future.result(5)
+        rolling.add("tail", 2)
+
+        self.assertEqual(rolling.finish(5), ("summary 2", "tail"))
+        self.assertEqual(self.calls, [(None, "A" * 40), ("summary 1", "B" * 40)])
+        self.assertEqual(rolling.windows, 2)
+        self.assertEqual(len(self.updates), 2)
+
+    def test_window_closed_by_interval(self):
+        """Test that a window is closed once it has been open for interval seconds."""
+        rolling = self.make_rolling(window_tokens=1000, interval=60)
+        rolling.add("first", 0)
+        rolling.add("second", 30)
+        self.assertIsNone(rolling._future)
+        rolling.add("third", 60)
+
+        self.assertEqual(rolling.finish(5), ("summary 1", ""))
+        self.assertEqual(self.calls, [(None, "first\nsecond\nthird")])
+
+    def test_failed_window_kept_for_tail(self):
+        """Test that the lines of a window whose update failed are not lost."""
+        def fail(previous, window):
+            raise RuntimeError("Rate limited")
+        rolling = self.make_rolling(update=fail)
+        rolling.add("A" * 40, 0)
+        rolling._future.result(5)
+        rolling.add("later", 1)
+
+        self.assertEqual(rolling.finish(5), (None, "A" * 40 + "\nlater"))
+
+    def test_finish_does_not_wait_for_slow_window(self):
+        """Test that a window still being summarized after the timeout goes into the tail."""
+        release = threading.Event()
+        def slow(previous, window):
+            release.wait(5)
+            return "late summary"
+        rolling = self.make_rolling(update=slow)
+        rolling.add("A" * 40, 0)
+        rolling.add("next", 1)
+
+        self.assertEqual(rolling.finish(0.05), (None, "A" * 40 + "\nnext"))
+        release.set()
+        rolling._future.result(5)
+        # The late result does not change what finish() handed on
+        self.assertIsNone(rolling.summary)
+        rolling.add("ignored", 2)
+        self.assertEqual(rolling.finish(0), (None, ""))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import unittest
+import sqlite3
+import tempfile
+import shutil
+from database import init_db, get_live_transcript
+from segment_writer import SegmentWriter, PROCESS_OWNER, is_owner_alive
+
+class TestSegmentWriter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_db_path = os.path.join(self.test_dir, 'test_meetings.db')
+        init_db(self.test_db_path)
+        self.writer = SegmentWriter(db_path=self.test_db_path, batch_size=2, flush_interval=0.05)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def make_entry(self, text):
+        return {'text': text, 'speaker': 'Speaker 1', 'timestamp': '10:00:00', 'speaker_id': 1}
+
+    def test_segments_written_in_order(self):
+        """Test that queued segments are persisted and read back in order."""
+        self.writer.begin_meeting('meeting-1')
+        for seq, text in enumerate(["First", "Second", "Third"]):
+            self.writer.append('meeting-1', seq, self.make_entry(text))
+
+        self.assertTrue(self.writer.flush())
+
+        self.assertEqual(
+            get_live_transcript('meeting-1', self.test_db_path),
+            "[10:00:00] Speaker 1: First\n[10:00:00] Speaker 1: Second\n[10:00:00] Speaker 1: Third"
+        )
+
+    def test_begin_meeting_records_owner(self):
+        """Test that starting a meeting creates its live record owned by this process."""
+        self.writer.begin_meeting('meeting-1')
+
+        conn = sqlite3.connect(self.test_db_path)
+        row = conn.execute("SELECT owner, status FROM live_meetings WHERE meeting_id = 'meeting-1'").fetchone()
+        conn.close()
+        self.assertEqual(row, (PROCESS_OWNER, 'recording'))
+
+    def test_duplicate_segments_ignored(self):
+        """Test that re-sending a segment does not duplicate it."""
+        self.writer.begin_meeting('meeting-1')
+        self.writer.append('meeting-1', 0, self.make_entry("Once"))
+        self.writer.append('meeting-1', 0, self.make_entry("Once"))
+        self.writer.flush()
+
+        self.assertEqual(get_live_transcript('meeting-1', self.test_db_path), "[10:00:00] Speaker 1: Once")
+
+    def test_is_owner_alive(self):
+        """Test owner liveness checks for this process and a dead local process."""
+        self.assertTrue(is_owner_alive(PROCESS_OWNER))
+        host = PROCESS_OWNER.rpartition(':')[0]
+        self.assertFalse(is_owner_alive(f"{host}:999999999"))
+        self.assertTrue(is_owner_alive("other-host:1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import time
+import unittest
+from segments import SegmentStore, format_segment
+
+class TestSegmentStore(unittest.TestCase):
+    def setUp(self):
+        self.now = time.time()
+
+    def test_entries_and_formatting(self):
+        """Test that segments read back as entries and formatted lines."""
+        store = SegmentStore()
+        self.assertEqual(store.append("Hello", "Speaker 1", 1, self.now, offset=100), 0)
+        self.assertEqual(store.append("Hi", "Speaker 2", 2, self.now + 3), 1)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.texts(), ["Hello", "Hi"])
+        self.assertEqual(store.offsets(), [100, 0])
+        self.assertEqual(store.entry(1)['speaker'], "Speaker 2")
+        self.assertEqual(store.entry(1)['speaker_id'], 2)
+        self.assertEqual(store.formatted(), "\n".join([
+            format_segment(self.now, "Speaker 1", "Hello"),
+            format_segment(self.now + 3, "Speaker 2", "Hi")
+        ]))
+
+    def test_formatted_view_is_extended_incrementally(self):
+        """Test that formatted() only formats segments appended since the last call."""
+        store = SegmentStore()
+        store.append("one", "Speaker 1", 1, self.now)
+        first = store.formatted()
+        self.assertIs(store.formatted(), first)
+
+        store.append("two", "Speaker 1", 1, self.now)
+        self.assertEqual(store.formatted(), first + "\n" + format_segment(self.now, "Speaker 1", "two"))
+
+    def test_speaker_labels_are_interned(self):
+        """Test that every segment of a speaker shares one label string."""
+        store = SegmentStore()
+        store.append("a", "".join(["Speaker ", "1"]), 1, self.now)
+        store.append("b", "".join(["Speaker ", "1"]), 1, self.now)
+        self.assertIs(store.entry(0)['speaker'], store.entry(1)['speaker'])
+
+    def test_max_segments_keeps_newest(self):
+        """Test that a bounded store keeps only the newest segments."""
+        store = SegmentStore(max_segments=3)
+        for i in range(10):
+            store.append(f"text {i}", "Speaker 1", 1, self.now)
+            if i == 4:
+                store.formatted()
+
+        self.assertEqual(store.total, 10)
+        self.assertEqual(store.texts(), ["text 7", "text 8", "text 9"])
+        self.assertEqual([line.split(": ")[1] for line in store.formatted().splitlines()],
+                         ["text 7", "text 8", "text 9"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from shared_state import LocalRedis, SharedState, CommandTimeout, ThreadLocalRedis
+
+class TestLocalRedis(unittest.TestCase):
+    def test_set_nx_and_expiry(self):
+        """Test that nx keeps an existing value and ex expires it."""
+        client = LocalRedis()
+        self.assertTrue(client.set('key', 'first', ex=0.05))
+        self.assertIsNone(client.set('key', 'second', nx=True))
+        self.assertEqual(client.get('key'), 'first')
+        time.sleep(0.1)
+        self.assertIsNone(client.get('key'))
+        self.assertTrue(client.set('key', 'second', nx=True))
+
+    def test_blpop(self):
+        """Test that blpop pops in order and times out on an empty list."""
+        client = LocalRedis()
+        client.rpush('list', 'a', 'b')
+        self.assertEqual(client.blpop(['list'], timeout=1), ('list', 'a'))
+        self.assertEqual(client.blpop('list', timeout=1), ('list', 'b'))
+        self.assertIsNone(client.blpop(['list'], timeout=0.05))
+
+    def test_thread_local_method_uses_calling_thread(self):
+        """Test that a ThreadLocalRedis method called on another thread uses that thread's client."""
+        clients = []
+        client = ThreadLocalRedis(lambda: clients.append(LocalRedis()) or clients[-1])
+        with patch('concurrency.sockets_patched', return_value=True):
+            client.set('key', 'main')
+            get = client.get
+            values = []
+            thread = threading.Thread(target=lambda: values.append(get('key')))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(len(clients), 2)
+        self.assertEqual(values, [None])
+        self.assertEqual(clients[0].get('key'), 'main')
+
+class TestSharedState(unittest.TestCase):
+    def setUp(self):
+        self.client = LocalRedis()
+        self.state = SharedState(self.client, 'worker-a')
+        self.other = SharedState(self.client, 'worker-b')
+
+    def tearDown(self):
+        self.state.stop()
+        self.other.stop()
+
+    def test_meeting_ownership(self):
+        """Test that every worker sees which worker owns a meeting."""
+        self.state.claim_meeting('meeting-1')
+        self.assertEqual(self.other.meeting_owner('meeting-1'), 'worker-a')
+        self.state.release_meeting('meeting-1')
+        self.assertIsNone(self.other.meeting_owner('meeting-1'))
+
+    def test_meeting_ownership_expires_without_heartbeat(self):
+        """Test that a claim lapses when its owner stops refreshing it."""
+        state = SharedState(self.client, 'worker-a', owner_ttl=0.1)
+        state.claim_meeting('meeting-1')
+        time.sleep(0.2)
+        self.assertIsNone(self.other.meeting_owner('meeting-1'))
+
+    def test_heartbeat_keeps_ownership(self):
+        """Test that a serving worker keeps its meetings until it releases them."""
+        state = SharedState(self.client, 'worker-a', owner_ttl=0.3)
+        self.addCleanup(state.stop)
+        state.serve({}, poll_timeout=0.02)
+        state.claim_meeting('meeting-1')
+        time.sleep(0.6)
+        self.assertEqual(self.other.meeting_owner('meeting-1'), 'worker-a')
+
+        state.release_meeting('meeting-1')
+        time.sleep(0.15)
+        self.assertIsNone(self.other.meeting_owner('meeting-1'))
+
+    def test_job_status(self):
+        """Test that a job saved by one worker loads on another."""
+        self.state.save_job({'job_id': 'job-1', 'status': 'running'})
+        self.assertEqual(self.other.load_job('job-1'), {'job_id': 'job-1', 'status': 'running'})
+        self.assertIsNone(self.other.load_job('missing'))
+
+    def test_command_round_trip(self):
+        """Test that a command runs on the target worker and its reply comes back."""
+        received = []
+        self.other.serve({
+            'echo': lambda payload: {'status_code': 200, 'body': payload},
+            'note': received.append
+        }, poll_timeout=0.05)
+
+        reply = self.state.send('worker-b', 'echo', {'value': 1}, reply_timeout=2)
+        self.assertEqual(reply, {'status_code': 200, 'body': {'value': 1}})
+        self.assertIsNone(self.state.send('worker-b', 'note', {'value': 2}))
+        self.assertEqual(self.state.send('worker-b', 'missing', {}, reply_timeout=2)['status_code'], 500)
+        self.assertEqual(received, [{'value': 2}])
+
+    def test_command_timeout(self):
+        """Test that a command to a worker that is not serving times out."""
+        with self.assertRaises(CommandTimeout):
+            self.state.send('worker-c', 'echo', {}, reply_timeout=0.1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import unittest
+import sqlite3
+import tempfile
+import shutil
+from unittest.mock import patch
+from database import init_db
+from summary_cache import SummaryCache, summary_cache_key, normalize_transcript
+
+class TestSummaryCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_db_path = os.path.join(self.test_dir, 'test_meetings.db')
+        init_db(self.test_db_path)
+        self.cache = SummaryCache(db_path=self.test_db_path, max_memory_entries=2, max_db_entries=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_key_ignores_formatting_differences(self):
+        """Test that whitespace-only differences produce the same key."""
+        self.assertEqual(
+            summary_cache_key("[10:00:00] Speaker 1:  Hello\n\n", deployment='gpt'),
+            summary_cache_key("[10:00:00] Speaker 1: Hello", deployment='gpt')
+        )
+        self.assertEqual(normalize_transcript(" a \t b \n\n c "), "a b\nc")
+
+    def test_key_depends_on_parameters(self):
+        """Test that generation parameters are part of the key."""
+        self.assertNotEqual(
+            summary_cache_key("Hello", deployment='gpt', temperature=0.7),
+            summary_cache_key("Hello", deployment='gpt', temperature=0.2)
+        )
+
+    def test_memory_hit_after_put(self):
+        """Test that a stored summary is served from memory."""
+        self.assertIsNone(self.cache.get('key-1'))
+        self.cache.put('key-1', "Summary")
+
+        self.assertEqual(self.cache.get('key-1'), "Summary")
+        stats = self.cache.stats()
+        self.assertEqual(stats['memory_hit'], 1)
+        self.assertEqual(stats['miss'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_database_tier_survives_new_cache(self):
+        """Test that a fresh cache finds summaries stored by another instance."""
+        self.cache.put('key-1', "Summary")
+        other = SummaryCache(db_path=self.test_db_path)
+
+        self.assertEqual(other.get('key-1'), "Summary")
+        self.assertEqual(other.get('key-1'), "Summary")
+        stats = other.stats()
+        self.assertEqual((stats['db_hit'], stats['memory_hit']), (1, 1))
+
+    def test_least_recently_used_entries_evicted(self):
+        """Test that both tiers stay within their size bounds, oldest first."""
+        for i in range(4):
+            self.cache.put(f'key-{i}', f"Summary {i}")
+
+        self.assertEqual(self.cache.stats()['memory_entries'], 2)
+        conn = sqlite3.connect(self.test_db_path)
+        keys = {row[0] for row in conn.execute("SELECT key FROM summary_cache")}
+        conn.close()
+        self.assertEqual(keys, {'key-1', 'key-2', 'key-3'})
+        self.assertEqual(self.cache.stats()['db_evictions'], 1)
+
+    def test_get_or_compute_only_computes_on_miss(self):
+        """Test that compute runs once for repeated lookups."""
+        calls = []
+        def compute():
+            calls.append(1)
+            return "Computed"
+
+        self.assertEqual(self.cache.get_or_compute('key-1', compute), "Computed")
+        self.assertEqual(self.cache.get_or_compute('key-1', compute), "Computed")
+        self.assertEqual(len(calls), 1)
+
+    def test_database_errors_are_misses(self):
+        """Test that a failing database does not break lookups or writes."""
+        with patch('summary_cache.get_cached_summary', side_effect=sqlite3.OperationalError("locked")), \
+                patch('summary_cache.put_cached_summary', side_effect=sqlite3.OperationalError("locked")):
+            self.assertIsNone(self.cache.get('key-1'))
+            self.cache.put('key-1', "Summary")
+            self.assertEqual(self.cache.get('key-1'), "Summary")
+
+if __name__ == '__main__':
+    unittest.main()
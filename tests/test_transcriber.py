@@ -1,84 +1,371 @@
+import time
 import unittest
 from unittest.mock import patch, MagicMock
-from transcriber import MeetingTranscriber
+from transcriber import MeetingTranscriber, chunk_transcript, estimate_tokens, get_speech_config
+from summary_cache import SummaryCache
+from config import Settings
 import azure.cognitiveservices.speech as speechsdk
 
+def make_stream_chunk(content):
+    chunk = MagicMock()
+    chunk.choices = [MagicMock()]
+    chunk.choices[0].delta.content = content
+    return chunk
+
 class TestTranscriber(unittest.TestCase):
     def setUp(self):
         # Create mock socketio
         self.mock_socketio = MagicMock()
         self.transcriber = MeetingTranscriber(self.mock_socketio)
 
+    @patch('transcriber.get_speech_config')
+    @patch('transcriber.speechsdk.audio.AudioConfig')
     @patch('azure.cognitiveservices.speech.SpeechRecognizer')
-    def test_start_recording(self, mock_speech_recognizer):
+    def test_start_recording(self, mock_speech_recognizer, mock_audio_config, mock_get_speech_config):
         # Configure mock
         mock_recognizer = MagicMock()
         mock_speech_recognizer.return_value = mock_recognizer
+        audio_stream = MagicMock()
+        transcriber = MeetingTranscriber(self.mock_socketio, audio_stream=audio_stream, rolling_summary=False)
         
         # Start recording
-        self.transcriber.start_recording()
+        transcriber.start_recording()
         
-        # Verify results
-        self.assertTrue(self.transcriber.is_recording)
-        self.assertEqual(self.transcriber.transcript, [])
+        # Verify the recognizer reads the browser audio and the server microphone is never opened
+        self.assertEqual(transcriber.transcript, [])
+        self.assertIs(mock_speech_recognizer.call_args.kwargs['audio_config'], audio_stream.audio_config.return_value)
+        mock_audio_config.assert_not_called()
+        audio_stream.start.assert_called_once()
         mock_recognizer.start_continuous_recognition.assert_called_once()
 
+    @patch('transcriber.get_speech_config')
     @patch('azure.cognitiveservices.speech.SpeechRecognizer')
-    def test_stop_recording(self, mock_speech_recognizer):
+    def test_stop_recording(self, mock_speech_recognizer, mock_get_speech_config):
         # Configure mock
         mock_recognizer = MagicMock()
         mock_speech_recognizer.return_value = mock_recognizer
+        audio_stream = MagicMock()
+        transcriber = MeetingTranscriber(self.mock_socketio, audio_stream=audio_stream, rolling_summary=False)
         
         # Start recording first
-        self.transcriber.start_recording()
+        transcriber.start_recording()
         
         # Stop recording
-        self.transcriber.stop_recording()
+        self.assertEqual(transcriber.stop_recording(), "")
         
-        # Verify results
-        self.assertFalse(self.transcriber.is_recording)
+        # Verify the buffered audio is handed over before recognition stops
+        audio_stream.close.assert_called_once()
         mock_recognizer.stop_continuous_recognition.assert_called_once()
 
-    @patch('requests.post')
-    def test_generate_summary_success(self, mock_post):
-        # Configure mock response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            'choices': [{'message': {'content': 'Test summary'}}]
-        }
-        mock_post.return_value = mock_response
-        
-        # Set test transcript
-        self.transcriber.transcript = ["Test transcript"]
+    @patch('azure.cognitiveservices.speech.SpeechRecognizer')
+    def test_recording_on_warm_recognizer(self, mock_speech_recognizer):
+        """Test that a pooled recognizer is used as is and its connection closed when recording stops."""
+        warm = MagicMock()
+        transcriber = MeetingTranscriber(
+            self.mock_socketio, audio_stream=MagicMock(), rolling_summary=False, warm_recognizer=warm
+        )
+
+        transcriber.start_recording()
+        transcriber.stop_recording()
+
+        mock_speech_recognizer.assert_not_called()
+        warm.recognizer.start_continuous_recognition.assert_called_once()
+        warm.recognizer.stop_continuous_recognition.assert_called_once()
+        warm.close.assert_called_once()
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_success(self, mock_get_client):
+        # Configure mock stream
+        mock_client = mock_get_client.return_value
+        mock_client.chat.completions.create.return_value = [make_stream_chunk('Test summary')]
         
-        # Generate summary
+        # Summarize the recorded segments
+        self.transcriber.segments.append("Test transcript", "Guest-1", 1, 0.0)
         summary = self.transcriber.generate_summary()
         
         # Verify results
         self.assertEqual(summary, 'Test summary')
-        mock_post.assert_called_once()
+        mock_client.chat.completions.create.assert_called_once()
+        prompt = mock_client.chat.completions.create.call_args.kwargs['messages'][-1]['content']
+        self.assertIn("Test transcript", prompt)
 
-    @patch('requests.post')
-    def test_generate_summary_error(self, mock_post):
+    @patch('transcriber.get_client')
+    def test_generate_summary_error(self, mock_get_client):
+        mock_client = mock_get_client.return_value
         # Configure mock to raise exception
-        mock_post.side_effect = Exception("API Error")
+        mock_client.chat.completions.create.side_effect = Exception("API Error")
         
-        # Set test transcript
-        self.transcriber.transcript = ["Test transcript"]
+        # The error is raised instead of being returned as the summary
+        with self.assertRaisesRegex(Exception, "API Error"):
+            self.transcriber.generate_summary("[10:00:00] Speaker 1: Hello")
         
-        # Generate summary
-        summary = self.transcriber.generate_summary()
-        
-        # Verify results
-        self.assertIn("Error generating summary", summary)
-        self.assertIn("API Error", summary)
+        # Verify clients were told
+        self.assertEqual(self.mock_socketio.emit.call_args.args, ('summary', {
+            'status': 'error',
+            'meeting_id': None,
+            'message': 'API Error'
+        }))
 
-    def test_generate_summary_empty_transcript(self):
+    @patch('transcriber.get_client')
+    def test_generate_summary_empty_transcript(self, mock_get_client):
         # Test with empty transcript
         summary = self.transcriber.generate_summary()
         
-        # Verify results
-        self.assertEqual(summary, "No transcript available to generate summary.")
+        # Verify results without a model call or a summary event
+        self.assertEqual(summary, "No transcript available to summarize.")
+        mock_get_client.return_value.chat.completions.create.assert_not_called()
+        self.mock_socketio.emit.assert_not_called()
+
+    def test_chunk_transcript_on_speaker_turns(self):
+        # Each line is one speaker turn of roughly 10 tokens
+        lines = [f"[10:00:{i:02d}] Speaker {i % 2 + 1}: {'word ' * 7}" for i in range(10)]
+        transcript = "\n".join(lines)
+        
+        chunks = chunk_transcript(transcript, max_tokens=40)
+        
+        # Verify no turn is split and every chunk stays within budget
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("\n".join(chunks).splitlines(), lines)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 40 + len(chunk.splitlines()))
+
+    def test_chunk_transcript_splits_long_turn(self):
+        transcript = "[10:00:00] Speaker 1: " + "word " * 200
+        
+        chunks = chunk_transcript(transcript, max_tokens=50)
+        
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(" ".join(chunks).split(), transcript.split())
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_map_reduce(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        # Configure mock to echo which prompt it received
+        def create(**kwargs):
+            prompt = kwargs['messages'][-1]['content']
+            content = 'Merged summary' if prompt.startswith('The following are summaries') else 'Part summary'
+            if kwargs.get('stream'):
+                return [make_stream_chunk(content)]
+            response = MagicMock()
+            response.choices[0].message.content = content
+            return response
+        mock_client.chat.completions.create.side_effect = create
+        
+        transcript = "\n".join(f"[10:00:{i:02d}] Speaker 1: {'word ' * 7}" for i in range(10))
+        transcriber = MeetingTranscriber(
+            self.mock_socketio, settings=Settings(summary_compaction_enabled=False, summary_chunk_tokens=40)
+        )
+        
+        summary = transcriber.generate_summary(transcript)
+        
+        # One call per chunk plus the reduce pass
+        chunk_count = len(chunk_transcript(transcript, max_tokens=40))
+        self.assertEqual(summary, 'Merged summary')
+        self.assertEqual(mock_client.chat.completions.create.call_count, chunk_count + 1)
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_sends_compacted_transcript(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        mock_client.chat.completions.create.return_value = [make_stream_chunk('Summary')]
+        transcript = "[10:00:00] Speaker 1: Um, hello.\n[10:00:01] Speaker 1: Let's begin."
+        
+        self.transcriber.generate_summary(transcript)
+        
+        prompt = mock_client.chat.completions.create.call_args.kwargs['messages'][-1]['content']
+        self.assertIn("Speaker 1: Hello. Let's begin.", prompt)
+        self.assertNotIn("[10:00:00]", prompt)
+        self.assertEqual(self.transcriber.compaction.turns_after, 1)
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_uses_given_settings(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        mock_client.chat.completions.create.return_value = [make_stream_chunk('Summary')]
+        settings = Settings(azure_openai_deployment='summaries', summary_max_tokens=321, summary_temperature=0.2)
+        transcriber = MeetingTranscriber(self.mock_socketio, rolling_summary=False, settings=settings)
+        
+        transcriber.generate_summary("[10:00:00] Speaker 1: Hello")
+        
+        # The request goes through the client built for these settings, with their model parameters
+        mock_get_client.assert_called_with(settings)
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        self.assertEqual((kwargs['model'], kwargs['max_tokens'], kwargs['temperature']), ('summaries', 321, 0.2))
+
+    @patch('transcriber.speechsdk.SpeechConfig')
+    def test_speech_config_built_from_settings(self, mock_speech_config):
+        settings = Settings(azure_speech_key='speech-key', azure_speech_region='westeurope')
+        
+        self.assertIs(get_speech_config(settings), get_speech_config(settings))
+        mock_speech_config.assert_called_once_with(subscription='speech-key', region='westeurope')
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_streams_deltas(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        # Configure mock stream: a content-filter chunk without choices, then two deltas
+        filter_chunk = MagicMock()
+        filter_chunk.choices = []
+        mock_client.chat.completions.create.return_value = [
+            filter_chunk,
+            make_stream_chunk('Streamed '),
+            make_stream_chunk('summary')
+        ]
+        self.transcriber.meeting_id = 'meeting-1'
+        
+        summary = self.transcriber.generate_summary("[10:00:00] Speaker 1: Hello")
+        
+        # Verify the full text is returned and pushed to clients
+        self.assertEqual(summary, 'Streamed summary')
+        self.assertTrue(mock_client.chat.completions.create.call_args.kwargs['stream'])
+        emitted = [call.args for call in self.mock_socketio.emit.call_args_list]
+        deltas = "".join(payload['delta'] for event, payload in emitted if event == 'summary_delta')
+        self.assertEqual(deltas, 'Streamed summary')
+        self.assertEqual(emitted[-1], ('summary', {
+            'status': 'success',
+            'meeting_id': 'meeting-1',
+            'summary': 'Streamed summary'
+        }))
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_finishes_rolling_summary(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        # Configure mock: rolling windows are not streamed, the final merge is
+        def create(**kwargs):
+            if kwargs.get('stream'):
+                return [make_stream_chunk('Final summary')]
+            response = MagicMock()
+            response.choices[0].message.content = 'Running summary'
+            return response
+        mock_client.chat.completions.create.side_effect = create
+        mock_event = MagicMock()
+        mock_event.result.text = "Let's review the launch plan in detail today."
+        
+        transcriber = MeetingTranscriber(
+            self.mock_socketio, meeting_id='meeting-1', settings=Settings(rolling_summary_enabled=True, rolling_summary_window_tokens=20)
+        )
+        transcriber.handle_result(mock_event)
+        transcriber.handle_result(mock_event)
+        transcriber.rolling._future.result(5)
+        mock_event.result.text = "Dana will send the notes."
+        transcriber.handle_result(mock_event)
+        
+        # Only the running summary and the tail go into the final request
+        self.assertEqual(transcriber.generate_summary(transcriber.format_transcript()), 'Final summary')
+        prompt = mock_client.chat.completions.create.call_args.kwargs['messages'][-1]['content']
+        self.assertIn('Running summary', prompt)
+        self.assertIn('Dana will send the notes.', prompt)
+        self.assertNotIn('launch plan', prompt)
+        emitted = [call.args for call in self.mock_socketio.emit.call_args_list]
+        self.assertIn(('summary_progress', {'meeting_id': 'meeting-1', 'summary': 'Running summary', 'windows': 1}), emitted)
+
+    @patch('transcriber.get_client')
+    def test_rolling_summary_reports_compaction(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        # Configure mock: rolling windows are not streamed, the final merge is
+        def create(**kwargs):
+            if kwargs.get('stream'):
+                return [make_stream_chunk('Final summary')]
+            response = MagicMock()
+            response.choices[0].message.content = 'Running summary'
+            return response
+        mock_client.chat.completions.create.side_effect = create
+        mock_event = MagicMock()
+        mock_event.result.text = "Um, let's review the the launch plan today."
+        
+        transcriber = MeetingTranscriber(
+            self.mock_socketio, meeting_id='meeting-1', settings=Settings(rolling_summary_enabled=True, rolling_summary_window_tokens=20)
+        )
+        transcriber.handle_result(mock_event)
+        transcriber.handle_result(mock_event)
+        transcriber.rolling._future.result(5)
+        mock_event.result.text = "Uh, Dana will send the notes."
+        transcriber.handle_result(mock_event)
+        transcriber.generate_summary(transcriber.format_transcript())
+        
+        # The window and the tail are both counted
+        self.assertEqual(transcriber.compaction.turns_before, 3)
+        self.assertEqual(transcriber.compaction.turns_after, 2)
+        self.assertGreater(transcriber.compaction.tokens_saved, 0)
+
+    @patch('transcriber.get_client')
+    def test_long_rolling_tail_is_chunked(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        # Configure mock: chunk summaries are not streamed, the final merge is
+        def create(**kwargs):
+            if kwargs.get('stream'):
+                return [make_stream_chunk('Final summary')]
+            response = MagicMock()
+            response.choices[0].message.content = 'Part summary'
+            return response
+        mock_client.chat.completions.create.side_effect = create
+        transcriber = MeetingTranscriber(
+            self.mock_socketio, meeting_id='meeting-1', settings=Settings(summary_chunk_tokens=100)
+        )
+        transcriber.rolling = MagicMock()
+        transcriber.rolling.finish.return_value = ('Running summary', "\n".join(
+            f"[10:00:{i:02d}] Speaker {i % 2 + 1}: Item {i} needs an owner before the launch." for i in range(40)
+        ))
+        
+        self.assertEqual(transcriber.generate_summary("transcript"), 'Final summary')
+        
+        # The running summary is merged in as the first part, ahead of the tail's chunks
+        prompts = [call.kwargs['messages'][-1]['content'] for call in mock_client.chat.completions.create.call_args_list]
+        self.assertTrue(any('part 1 of' in prompt for prompt in prompts))
+        self.assertTrue(all(estimate_tokens(prompt) < 400 for prompt in prompts if 'part ' in prompt))
+        self.assertIn('Part 1:\nRunning summary', prompts[-1])
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_uses_cache(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        # Configure mock stream and an in-memory cache
+        mock_client.chat.completions.create.side_effect = lambda **kwargs: [make_stream_chunk('Cached summary')]
+        cache = SummaryCache(persist=False)
+        first = MeetingTranscriber(self.mock_socketio, meeting_id='meeting-1', summary_cache=cache)
+        second = MeetingTranscriber(self.mock_socketio, meeting_id='meeting-2', summary_cache=cache)
+        
+        self.assertEqual(first.generate_summary("[10:00:00] Speaker 1: Hello"), 'Cached summary')
+        self.assertEqual(second.generate_summary("[10:00:00] Speaker 1:  Hello\n"), 'Cached summary')
+        
+        # Verify the model was called once and the hit still notified clients
+        self.assertEqual(mock_client.chat.completions.create.call_count, 1)
+        self.assertEqual(self.mock_socketio.emit.call_args.args, ('summary', {
+            'status': 'success',
+            'meeting_id': 'meeting-2',
+            'summary': 'Cached summary'
+        }))
+
+    @patch('transcriber.get_client')
+    def test_generate_summary_errors_not_cached(self, mock_get_client):
+        mock_client = mock_get_client.return_value
+        mock_client.chat.completions.create.side_effect = [Exception("API Error"), [make_stream_chunk('Summary')]]
+        cache = SummaryCache(persist=False)
+        transcriber = MeetingTranscriber(self.mock_socketio, summary_cache=cache)
+        
+        with self.assertRaises(Exception):
+            transcriber.generate_summary("[10:00:00] Speaker 1: Hello")
+        
+        self.assertEqual(transcriber.generate_summary("[10:00:00] Speaker 1: Hello"), 'Summary')
+
+    def test_segments_persisted_with_bounded_tail(self):
+        # Configure a segment writer stand-in
+        mock_writer = MagicMock()
+        mock_event = MagicMock()
+        mock_event.result.text = "Test recognition"
+        
+        transcriber = MeetingTranscriber(
+            self.mock_socketio, meeting_id='meeting-1', segment_writer=mock_writer,
+            settings=Settings(segment_memory_tail=2)
+        )
+        for _ in range(3):
+            transcriber.handle_result(mock_event)
+        
+        # Every segment is handed to the writer, only the tail stays in memory
+        self.assertEqual(mock_writer.append.call_count, 3)
+        self.assertEqual([c.args[1] for c in mock_writer.append.call_args_list], [0, 1, 2])
+        self.assertEqual(len(transcriber.speaker_transcript), 2)
+        
+        with patch('transcriber.get_live_transcript', return_value="Stored transcript") as mock_get:
+            self.assertEqual(transcriber.format_transcript(), "Stored transcript")
+        mock_writer.flush.assert_called_once()
+        mock_get.assert_called_once_with('meeting-1', mock_writer.db_path)
 
     def test_handle_result(self):
         # Create a mock event
@@ -90,10 +377,54 @@ class TestTranscriber(unittest.TestCase):
         
         # Verify results
         self.assertEqual(self.transcriber.transcript, ["Test recognition"])
-        self.mock_socketio.emit.assert_called_once_with(
-            'transcript_update',
-            {'text': "Test recognition"}
+        self.assertEqual(self.transcriber.speaker_transcript[0]['text'], "Test recognition")
+        
+        # The callback only queues the entry; it never emits on the SDK thread
+        self.mock_socketio.emit.assert_not_called()
+        self.transcriber.emitter._emit(list(self.transcriber.emitter._queue.queue))
+        self.mock_socketio.emit.assert_called_once_with('transcript_batch', {
+            'meeting_id': None,
+            'entries': [self.transcriber.speaker_transcript[0]]
+        }, to='meeting:None')
+
+    def test_handle_result_stamps_event_time(self):
+        """Test that the entry carries the time the callback received it, before any of its work."""
+        recorded_at = []
+        recorder = MagicMock()
+        recorder.record.side_effect = lambda evt: recorded_at.append(time.monotonic())
+        transcriber = MeetingTranscriber(self.mock_socketio, recorder=recorder, rolling_summary=False)
+        transcriber.emitter = MagicMock()
+        mock_event = MagicMock()
+        mock_event.result.text = "Test recognition"
+        
+        before = time.monotonic()
+        transcriber.handle_result(mock_event)
+        
+        event_time = transcriber.emitter.publish.call_args.args[2]
+        self.assertTrue(before <= event_time <= recorded_at[0])
+
+    def test_handle_partial(self):
+        # Create a mock interim event
+        mock_event = MagicMock()
+        mock_event.result.text = "Test recog"
+        self.transcriber.emitter = MagicMock()
+        
+        self.transcriber.handle_partial(mock_event)
+        
+        self.transcriber.emitter.publish_partial.assert_called_once_with(
+            None, {'text': "Test recog", 'speaker': "Speaker 1"}
         )
 
+    def test_results_report_recognized_audio(self):
+        """Test that partial, final and empty results tell the audio stream how far recognition got."""
+        self.transcriber.audio_stream = MagicMock()
+        for handle, text, offset in ((self.transcriber.handle_partial, "Test", 100),
+                                     (self.transcriber.handle_result, "Test recognition", 200),
+                                     (self.transcriber.handle_result, "", 300)):
+            handle(MagicMock(result=MagicMock(text=text, offset=offset, duration=50)))
+
+        self.assertEqual([call.args for call in self.transcriber.audio_stream.recognized_until.call_args_list],
+                         [(150,), (250,), (350,)])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,80 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from transcript_emitter import TranscriptEmitter
+
+class TestTranscriptEmitter(unittest.TestCase):
+    def setUp(self):
+        self.mock_socketio = MagicMock()
+        self.emitter = TranscriptEmitter(self.mock_socketio, window=0.05, partial_interval=10)
+
+    def make_entry(self, text):
+        return {'text': text, 'speaker': 'Speaker 1', 'timestamp': '10:00:00', 'speaker_id': 1}
+
+    def emitted(self):
+        return [call.args for call in self.mock_socketio.emit.call_args_list]
+
+    def test_entries_coalesced_per_meeting(self):
+        """Test that entries queued together go out as one batch per meeting."""
+        items = [
+            ('final', 'meeting-1', self.make_entry("One"), 0),
+            ('final', 'meeting-2', self.make_entry("Other"), 0),
+            ('final', 'meeting-1', self.make_entry("Two"), 0)
+        ]
+
+        self.emitter._emit(items)
+
+        self.assertEqual(self.emitted(), [
+            ('transcript_batch', {'meeting_id': 'meeting-1', 'entries': [self.make_entry("One"), self.make_entry("Two")]}),
+            ('transcript_batch', {'meeting_id': 'meeting-2', 'entries': [self.make_entry("Other")]})
+        ])
+        rooms = [call.kwargs['to'] for call in self.mock_socketio.emit.call_args_list]
+        self.assertEqual(rooms, ['meeting:meeting-1', 'meeting:meeting-2'])
+
+    def test_partials_throttled(self):
+        """Test that only the latest partial is sent and repeats wait for the interval."""
+        self.emitter._emit([
+            ('partial', 'meeting-1', {'text': 'hel', 'speaker': 'Speaker 1'}, 0),
+            ('partial', 'meeting-1', {'text': 'hello', 'speaker': 'Speaker 1'}, 0)
+        ])
+        self.emitter._emit([('partial', 'meeting-1', {'text': 'hello wor', 'speaker': 'Speaker 1'}, 0)])
+
+        self.assertEqual(self.emitted(), [
+            ('transcript_partial', {'text': 'hello', 'speaker': 'Speaker 1', 'meeting_id': 'meeting-1'})
+        ])
+
+    def test_final_supersedes_pending_partial(self):
+        """Test that a final result drops a partial that was waiting on the throttle."""
+        self.emitter._emit([('partial', 'meeting-1', {'text': 'hel', 'speaker': 'Speaker 1'}, 0)])
+        self.emitter._emit([('partial', 'meeting-1', {'text': 'hello', 'speaker': 'Speaker 1'}, 0)])
+        self.emitter._emit([('final', 'meeting-1', self.make_entry("Hello."), 0)])
+        self.emitter.partial_interval = 0
+        self.emitter._emit([])
+
+        events = [event for event, _ in self.emitted()]
+        self.assertEqual(events, ['transcript_partial', 'transcript_batch'])
+
+    @patch('transcript_emitter.TRANSCRIPT_EMIT_LATENCY')
+    def test_latency_measured_from_event_time(self, mock_latency):
+        """Test that emit latency counts from when the recognizer callback stamped the entry."""
+        self.emitter.publish('meeting-1', self.make_entry("Late"), time.monotonic() - 5)
+
+        self.emitter._emit(list(self.emitter._queue.queue))
+
+        self.assertGreaterEqual(mock_latency.observe.call_args.args[0], 5)
+
+    def test_background_thread_emits(self):
+        """Test that published entries are delivered by the emitter thread."""
+        self.emitter.start()
+        self.emitter.publish('meeting-1', self.make_entry("Threaded"))
+
+        for _ in range(100):
+            if self.mock_socketio.emit.called:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.emitted(), [
+            ('transcript_batch', {'meeting_id': 'meeting-1', 'entries': [self.make_entry("Threaded")]})
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,15 +2,19 @@ import azure.cognitiveservices.speech as speechsdk
 import requests
 import traceback
 import time
-from config import (
-    AZURE_SPEECH_KEY,
-    AZURE_SPEECH_REGION,
-    AZURE_OPENAI_API_KEY,
-    AZURE_OPENAI_ENDPOINT,
-    AZURE_OPENAI_API_VERSION,
-    AZURE_OPENAI_DEPLOYMENT
-)
-from database import save_meeting
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import config
+from database import save_meeting, get_live_transcript
+from transcript_emitter import TranscriptEmitter
+from segments import SegmentStore, format_segment
+from rolling_summary import RollingSummary
+from rooms import meeting_room
+from compaction import compact_transcript, combine_compactions
+from metrics import registry, OPENAI_REQUEST_DURATION, OPENAI_TOKENS
+from openai_client import ResilientOpenAI, build_http_client
+from summary_cache import summary_cache_key
+from concurrency import ThreadBound
 from flask_socketio import SocketIO
 from openai import AzureOpenAI
 import logging
@@ -20,88 +24,306 @@ import json
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Configure OpenAI client
-client = AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    api_version=AZURE_OPENAI_API_VERSION,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT
+# Clients and pools shared by every meeting with the same Settings, keyed by (settings, name).
+# They are created on first use, so importing this module needs no credentials.
+_shared = {}
+_shared_lock = threading.Lock()
+
+def _get_shared(settings, name, build):
+    key = (settings, name)
+    value = _shared.get(key)
+    if value is None:
+        with _shared_lock:
+            value = _shared.get(key)
+            if value is None:
+                value = _shared[key] = build(settings)
+    return value
+
+def build_client(settings):
+    """Create an Azure OpenAI client for settings."""
+    return AzureOpenAI(
+        api_key=settings.azure_openai_api_key,
+        api_version=settings.azure_openai_api_version,
+        azure_endpoint=settings.azure_openai_endpoint,
+        http_client=build_http_client(settings),
+        # Retries are handled by completions, which honors Retry-After and the deadline
+        max_retries=0
+    )
+
+def get_client(settings=None):
+    """Return the Azure OpenAI client for settings (config.settings by default).
+
+    Every thread shares one client, and so one connection pool, unless gevent
+    patched sockets; then each thread has its own (see concurrency.ThreadBound).
+    """
+    settings = settings or config.settings
+    return _get_shared(settings, 'client', lambda settings: ThreadBound(lambda: build_client(settings))).current()
+
+def get_completions(settings=None):
+    """Return the chat completions with deadlines, retries, rate limiting and a circuit breaker
+    shared by every meeting with settings (config.settings by default)."""
+    settings = settings or config.settings
+    return _get_shared(settings, 'completions', lambda settings: ResilientOpenAI(
+        lambda: get_client(settings), settings=settings
+    ))
+
+def get_summary_pool(settings=None):
+    """Return the pool for summarizing transcript chunks; it bounds concurrent OpenAI calls per process."""
+    return _get_shared(settings or config.settings, 'summary_pool', lambda settings: ThreadPoolExecutor(
+        max_workers=settings.summary_max_workers, thread_name_prefix='summary'
+    ))
+
+registry.gauge(
+    'openai_circuit_open', '1 while the Azure OpenAI circuit breaker is failing calls fast',
+    function=lambda: int(any(
+        value.breaker.is_open for (_, name), value in list(_shared.items()) if name == 'completions'
+    ))
 )
 
+# Bump when the prompts below change so cached summaries are not reused
+SUMMARY_PROMPT_VERSION = 2
+
+SUMMARY_SYSTEM_PROMPT = """You are a helpful assistant that summarizes meeting transcripts. 
+                    Your response should be structured in three parts:
+                    1. A concise summary of the main points discussed
+                    2. A list of action items, organized by speaker
+                    3. A general list of action items that aren't speaker-specific
+                    
+                    For speaker-specific action items, use the format:
+                    [Speaker Name]'s Action Items:
+                    - Item 1
+                    - Item 2
+                    
+                    For general action items, use the format:
+                    General Action Items:
+                    - Item 1
+                    - Item 2"""
+
+SUMMARY_INSTRUCTIONS = """Please structure your response as follows:
+1. First, provide a concise summary of the main points discussed
+2. Then, list all action items organized by speaker (if any speaker-specific items are identified)
+3. Finally, list any general action items that aren't specific to a particular speaker
+4. Format all action items as bulleted lists"""
+
+def estimate_tokens(text):
+    """Roughly estimate the number of model tokens in text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+def request_tokens(messages, max_tokens):
+    """Estimate the tokens a completion request of up to max_tokens counts against the deployment's quota."""
+    return sum(estimate_tokens(m['content']) for m in messages) + max_tokens
+
+def chunk_transcript(transcript, max_tokens=None):
+    """Split a formatted transcript into chunks of at most max_tokens on speaker-turn boundaries.
+
+    Each line of the formatted transcript is one speaker turn. Turns are packed
+    greedily; a single turn longer than max_tokens is split on whitespace.
+    max_tokens defaults to summary_chunk_tokens of config.settings.
+    """
+    max_tokens = max_tokens or config.settings.summary_chunk_tokens
+    chunks = []
+    current = []
+    current_tokens = 0
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        pieces = [line]
+        if estimate_tokens(line) > max_tokens:
+            pieces = []
+            words = line.split()
+            piece = []
+            for word in words:
+                if piece and estimate_tokens(" ".join(piece + [word])) > max_tokens:
+                    pieces.append(" ".join(piece))
+                    piece = []
+                piece.append(word)
+            if piece:
+                pieces.append(" ".join(piece))
+
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def build_speech_config(settings=None):
+    """Create the SpeechConfig used for meeting recognition."""
+    settings = settings or config.settings
+    speech_config = speechsdk.SpeechConfig(
+        subscription=settings.azure_speech_key,
+        region=settings.azure_speech_region
+    )
+    speech_config.speech_recognition_language = "en-US"
+    
+    # Configure speech recognition settings
+    speech_config.set_property(
+        speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs,
+        "5000"
+    )
+    speech_config.set_property(
+        speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs,
+        "5000"
+    )
+    
+    # Enable word-level timestamps for better speaker tracking
+    speech_config.set_property(
+        speechsdk.PropertyId.SpeechServiceResponse_RequestWordLevelTimestamps,
+        "true"
+    )
+    
+    # Enable detailed results
+    speech_config.set_property(
+        speechsdk.PropertyId.SpeechServiceResponse_RequestDetailedResultTrueFalse,
+        "true"
+    )
+    return speech_config
+
+def get_speech_config(settings=None):
+    """Return the SpeechConfig shared by every recognizer with settings, creating it on first use.
+
+    It is never modified once built.
+    """
+    return _get_shared(settings or config.settings, 'speech_config', build_speech_config)
+
 class MeetingTranscriber:
-    def __init__(self, socketio=None):
-        """Initialize the transcriber with Azure Speech Services configuration."""
-        self.speech_config = speechsdk.SpeechConfig(
-            subscription=AZURE_SPEECH_KEY,
-            region=AZURE_SPEECH_REGION
-        )
-        self.speech_config.speech_recognition_language = "en-US"
-        
-        # Configure speech recognition settings
-        self.speech_config.set_property(
-            speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs,
-            "5000"
-        )
-        self.speech_config.set_property(
-            speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs,
-            "5000"
-        )
-        
-        # Enable word-level timestamps for better speaker tracking
-        self.speech_config.set_property(
-            speechsdk.PropertyId.SpeechServiceResponse_RequestWordLevelTimestamps,
-            "true"
-        )
-        
-        # Enable detailed results
-        self.speech_config.set_property(
-            speechsdk.PropertyId.SpeechServiceResponse_RequestDetailedResultTrueFalse,
-            "true"
-        )
+    def __init__(self, socketio=None, meeting_id=None, segment_writer=None, emitter=None,
+                 summary_cache=None, audio_stream=None, recorder=None, clock=None, rolling_summary=None,
+                 warm_recognizer=None, settings=None):
+        """Initialize the transcriber with Azure Speech Services configuration.
+
+        Speech, OpenAI and summary settings come from settings
+        (config.settings by default). With a segment_writer, each recognized
+        segment is persisted as it arrives and only the last
+        settings.segment_memory_tail segments stay in memory.
+        Live updates go through emitter, which can be shared between meetings.
+        Summaries are looked up in and stored to summary_cache when given.
+        Audio comes from audio_stream when given, otherwise from the default
+        microphone. Recognized events are also handed to recorder when given,
+        and clock (time.time by default) drives the speaker heuristic so
+        replayed events can be timed by their capture. Unless rolling_summary
+        (settings.rolling_summary_enabled by default) is off, recognized text is folded
+        into a running summary while the meeting records. warm_recognizer, a
+        recognizer_pool.WarmRecognizer reading from audio_stream, is used
+        instead of building a recognizer when recording starts.
+        """
+        self.settings = settings or config.settings
+        self.meeting_id = meeting_id
+        self.summary_cache = summary_cache
+        self.segment_writer = segment_writer
+        self.emitter = emitter or (TranscriptEmitter(socketio) if socketio else None)
+        self.recorder = recorder
+        self.clock = clock or time.time
+        # Built when recording starts, so summarizing or replaying needs no speech credentials
+        self.speech_config = None
         
-        self.audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
-        self.transcript = []
-        self.speaker_transcript = []  # Store speaker-specific transcript
+        self.audio_stream = audio_stream
+        self.segments = SegmentStore(max_segments=self.settings.segment_memory_tail if segment_writer else None)
+        # Full transcript read back from the database, with the segment count it covers
+        self._stored_transcript = (None, "")
+        # What compaction saved on the last transcript summarized
+        self.compaction = None
+        # Compactions of the windows folded into the running summary, and of the one being folded
+        self._window_compactions = []
+        self._pending_compaction = None
+        self.completions = get_completions(self.settings)
+        self.summary_pool = get_summary_pool(self.settings)
+        if self.settings.rolling_summary_enabled if rolling_summary is None else rolling_summary:
+            self.rolling = RollingSummary(
+                self._update_rolling_summary, self.summary_pool, on_update=self._window_folded,
+                window_tokens=self.settings.rolling_summary_window_tokens,
+                interval=self.settings.rolling_summary_interval_seconds
+            )
+        else:
+            self.rolling = None
         self.socketio = socketio
+        self.warm_recognizer = warm_recognizer
         self.recognizer = None
         self.current_speaker = None
         self.speaker_count = 0
-        self.last_speaker_time = time.time()
+        self.last_speaker_time = self.clock()
+        self.last_activity = self.last_speaker_time
 
     def handle_result(self, evt):
         """Handle speech recognition results with speaker identification"""
+        # Emit latency is measured from here, including the work below
+        received_at = time.monotonic()
         try:
             result = evt.result
+            if self.audio_stream:
+                self.audio_stream.recognized_until(result.offset + result.duration)
             text = result.text
+            if not text:
+                return
+            if self.recorder:
+                self.recorder.record(evt)
             
             # Simple speaker tracking based on silence duration
-            current_time = time.time()
+            current_time = self.clock()
             if current_time - self.last_speaker_time > 2.0:  # If more than 2 seconds of silence
                 self.speaker_count = (self.speaker_count + 1) % 4  # Cycle through 4 speakers
                 self.current_speaker = f"Speaker {self.speaker_count + 1}"
             
             self.last_speaker_time = current_time
+            self.last_activity = current_time
             
             # Create transcript entry with speaker information
+            speaker = self.current_speaker or "Speaker 1"
+            seq = self.segments.append(text, speaker, self.speaker_count + 1, current_time, int(result.offset))
             transcript_entry = {
                 'text': text,
-                'speaker': self.current_speaker or "Speaker 1",
-                'timestamp': time.strftime('%H:%M:%S'),
+                'speaker': speaker,
+                'timestamp': time.strftime('%H:%M:%S', time.localtime(current_time)),
                 'speaker_id': self.speaker_count + 1
             }
+            if self.segment_writer:
+                self.segment_writer.append(self.meeting_id, seq, transcript_entry)
+            if self.rolling:
+                self.rolling.add(format_segment(current_time, speaker, text), current_time)
             
-            self.transcript.append(text)
-            self.speaker_transcript.append(transcript_entry)
-            
-            # Emit the transcript update through Socket.IO with speaker information
-            if self.socketio:
-                self.socketio.emit('transcript_update', transcript_entry)
-                print(f"Emitted transcript update: {json.dumps(transcript_entry)}")
+            # Hand the entry to the emitter; this runs on the SDK callback thread, so no I/O here
+            if self.emitter:
+                self.emitter.publish(self.meeting_id, transcript_entry, received_at)
                 
         except Exception as e:
             print(f"Error in handle_result: {str(e)}")
             import traceback
             traceback.print_exc()
 
+    @property
+    def transcript(self):
+        """Recognized texts held in memory, oldest first."""
+        return self.segments.texts()
+
+    @property
+    def speaker_transcript(self):
+        """Transcript entries held in memory, oldest first."""
+        return self.segments.entries()
+
+    @property
+    def segment_count(self):
+        """Number of segments recognized in this meeting."""
+        return self.segments.total
+
+    def handle_partial(self, evt):
+        """Handle interim 'recognizing' results"""
+        try:
+            if self.audio_stream:
+                self.audio_stream.recognized_until(evt.result.offset + evt.result.duration)
+            text = evt.result.text
+            if text and self.emitter:
+                self.emitter.publish_partial(self.meeting_id, {
+                    'text': text,
+                    'speaker': self.current_speaker or "Speaker 1"
+                })
+        except Exception as e:
+            print(f"Error in handle_partial: {str(e)}")
+
     def handle_canceled(self, evt):
         """Handle speech recognition cancellation"""
         try:
@@ -138,19 +360,37 @@ class MeetingTranscriber:
             print("Starting recording...")
             print("Configuring audio input...")
             
-            # Create speech recognizer
-            self.recognizer = speechsdk.SpeechRecognizer(
-                speech_config=self.speech_config,
-                audio_config=self.audio_config
-            )
+            if self.warm_recognizer:
+                # Already connected to the service, so no words are lost to session setup
+                self.recognizer = self.warm_recognizer.recognizer
+            else:
+                if self.speech_config is None:
+                    self.speech_config = get_speech_config(self.settings)
+                # The server microphone is only opened for meetings without an audio stream
+                if self.audio_stream:
+                    audio_config = self.audio_stream.audio_config()
+                else:
+                    audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
+                self.recognizer = speechsdk.SpeechRecognizer(
+                    speech_config=self.speech_config,
+                    audio_config=audio_config
+                )
             
             # Connect event handlers
             print("Connecting event handlers...")
             self.recognizer.recognized.connect(self.handle_result)
+            self.recognizer.recognizing.connect(self.handle_partial)
             self.recognizer.canceled.connect(self.handle_canceled)
             self.recognizer.session_started.connect(self.handle_session_started)
             self.recognizer.session_stopped.connect(self.handle_session_stopped)
             
+            if self.segment_writer:
+                self.segment_writer.begin_meeting(self.meeting_id)
+            if self.emitter:
+                self.emitter.start()
+            if self.audio_stream:
+                self.audio_stream.start()
+            
             print("Starting continuous recognition...")
             self.recognizer.start_continuous_recognition()
             print("Recording started successfully")
@@ -164,17 +404,22 @@ class MeetingTranscriber:
         """Stop recording and return the transcript with speaker information."""
         try:
             if self.recognizer:
+                if self.audio_stream:
+                    # Hand buffered audio to the recognizer and signal end of input
+                    self.audio_stream.close()
                 print("Stopping continuous recognition...")
                 self.recognizer.stop_continuous_recognition()
+                if self.warm_recognizer:
+                    self.warm_recognizer.close()
                 
                 # Format the transcript with speaker information
-                formatted_transcript = []
-                for entry in self.speaker_transcript:
-                    formatted_transcript.append(
-                        f"[{entry['timestamp']}] {entry['speaker']}: {entry['text']}"
-                    )
-                
-                full_transcript = "\n".join(formatted_transcript)
+                full_transcript = self.format_transcript()
+                if self.segment_writer:
+                    self.segment_writer.end_meeting(self.meeting_id)
+                if self.emitter:
+                    self.emitter.forget(self.meeting_id)
+                if self.recorder:
+                    self.recorder.close()
                 print(f"Full transcript with speakers: {full_transcript}")
                 return full_transcript
             return ""
@@ -184,63 +429,309 @@ class MeetingTranscriber:
             traceback.print_exc()
             return ""
 
+    def format_transcript(self):
+        """Format the speaker transcript as one "[time] Speaker: text" line per turn.
+
+        When segments are persisted the full transcript is read back from the
+        database, since only a tail is kept in memory. Either way the result is
+        reused until new segments arrive.
+        """
+        if self.segment_writer:
+            count, transcript = self._stored_transcript
+            if count != self.segments.total:
+                self.segment_writer.flush()
+                transcript = get_live_transcript(self.meeting_id, self.segment_writer.db_path)
+                self._stored_transcript = (self.segments.total, transcript)
+            return transcript
+        return self.segments.formatted()
+
+    def _complete(self, messages, operation='summary'):
+        """Run a single chat completion and return the response text."""
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = self.completions.create(
+                tokens=request_tokens(messages, self.settings.summary_max_tokens),
+                model=self.settings.azure_openai_deployment,
+                messages=messages,
+                temperature=self.settings.summary_temperature,
+                max_tokens=self.settings.summary_max_tokens
+            )
+            if response.usage:
+                OPENAI_TOKENS.inc(int(response.usage.prompt_tokens or 0), type='prompt')
+                OPENAI_TOKENS.inc(int(response.usage.completion_tokens or 0), type='completion')
+            outcome = 'success'
+            return response.choices[0].message.content
+        finally:
+            OPENAI_REQUEST_DURATION.observe(time.perf_counter() - start, operation=operation, outcome=outcome)
+
+    def _stream_complete(self, messages, operation='summary'):
+        """Run a streamed chat completion, pushing text deltas to clients as 'summary_delta' events.
+
+        Deltas are coalesced for settings.summary_stream_flush_seconds so clients get a
+        handful of frames per second rather than one per token. Returns the full text.
+        """
+        if not self.socketio:
+            return self._complete(messages, operation)
+
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            text = self._stream_deltas(messages)
+            # Streamed responses carry no usage block, so count estimated tokens
+            OPENAI_TOKENS.inc(sum(estimate_tokens(m['content']) for m in messages), type='prompt')
+            OPENAI_TOKENS.inc(estimate_tokens(text), type='completion')
+            outcome = 'success'
+            return text
+        finally:
+            OPENAI_REQUEST_DURATION.observe(time.perf_counter() - start, operation=operation, outcome=outcome)
+
+    def _stream_deltas(self, messages):
+        response = self.completions.create(
+            tokens=request_tokens(messages, self.settings.summary_max_tokens),
+            model=self.settings.azure_openai_deployment,
+            messages=messages,
+            temperature=self.settings.summary_temperature,
+            max_tokens=self.settings.summary_max_tokens,
+            stream=True
+        )
+        parts = []
+        pending = []
+        last_flush = 0.0
+        for chunk in response:
+            # Azure sends content-filter results in chunks without choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            pending.append(delta)
+            now = time.monotonic()
+            if now - last_flush >= self.settings.summary_stream_flush_seconds:
+                self.socketio.emit('summary_delta', {'meeting_id': self.meeting_id, 'delta': "".join(pending)},
+                                   to=meeting_room(self.meeting_id))
+                pending = []
+                last_flush = now
+        if pending:
+            self.socketio.emit('summary_delta', {'meeting_id': self.meeting_id, 'delta': "".join(pending)},
+                               to=meeting_room(self.meeting_id))
+        return "".join(parts)
+
+    def _cached(self, text, compute, **params):
+        """Return compute(), reusing the summary cached for text and params when available."""
+        if not self.summary_cache:
+            return compute()
+        key = summary_cache_key(
+            text,
+            deployment=self.settings.azure_openai_deployment,
+            prompt_version=SUMMARY_PROMPT_VERSION,
+            temperature=self.settings.summary_temperature,
+            max_tokens=self.settings.summary_max_tokens,
+            chunk_tokens=self.settings.summary_chunk_tokens,
+            **params
+        )
+        return self.summary_cache.get_or_compute(key, compute)
+
+    def _summarize_chunk(self, chunk, index, total):
+        """Map step: summarize one chunk of a long transcript."""
+        return self._cached(chunk, lambda: self._complete(operation='chunk', messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"""This is part {index + 1} of {total} of a meeting transcript. Please provide a summary and action items for this part only:
+
+{chunk}
+
+{SUMMARY_INSTRUCTIONS}"""}
+        ]), operation='chunk', part=index, parts=total)
+
+    def _merge_summaries(self, partial_summaries, stream=False):
+        """Reduce step: merge partial summaries into a single summary and action item list."""
+        combined = "\n\n".join(
+            f"Part {i + 1}:\n{partial}" for i, partial in enumerate(partial_summaries)
+        )
+        complete = self._stream_complete if stream else self._complete
+        return complete(operation='merge', messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"""The following are summaries of consecutive parts of one meeting. Merge them into a single summary of the whole meeting, combining duplicate action items and keeping each action item with the speaker it belongs to:
+
+{combined}
+
+{SUMMARY_INSTRUCTIONS}"""}
+        ])
+
+    def _map_reduce_summary(self, chunks, summary_so_far=None):
+        """Summarize chunks in parallel, then merge the partial summaries.
+
+        If the partial summaries are themselves too long for one request they
+        are chunked and reduced again. summary_so_far, the summary of the
+        meeting before the first chunk, is merged in as the first part.
+        """
+        futures = [
+            self.summary_pool.submit(self._summarize_chunk, chunk, i, len(chunks))
+            for i, chunk in enumerate(chunks)
+        ]
+        partial_summaries = [future.result() for future in futures]
+        if summary_so_far:
+            partial_summaries.insert(0, summary_so_far)
+
+        while estimate_tokens("\n\n".join(partial_summaries)) > self.settings.summary_chunk_tokens and len(partial_summaries) > 1:
+            groups = []
+            group = []
+            for partial in partial_summaries:
+                if group and estimate_tokens("\n\n".join(group + [partial])) > self.settings.summary_chunk_tokens:
+                    groups.append(group)
+                    group = []
+                group.append(partial)
+            groups.append(group)
+            if len(groups) == len(partial_summaries):
+                break
+            futures = [self.summary_pool.submit(self._merge_summaries, group) for group in groups]
+            partial_summaries = [future.result() for future in futures]
+
+        return self._merge_summaries(partial_summaries, stream=True)
+
+    def _summarize(self, transcript):
+        chunks = chunk_transcript(transcript, self.settings.summary_chunk_tokens)
+        if len(chunks) > 1:
+            print(f"Summarizing transcript in {len(chunks)} chunks")
+            return self._map_reduce_summary(chunks)
+        return self._stream_complete([
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"""Please provide a summary and action items for this meeting transcript:
+
+{transcript}
+
+{SUMMARY_INSTRUCTIONS}"""}
+        ])
+
+    def _update_rolling_summary(self, previous, window):
+        """Fold one window of a meeting in progress into its running summary."""
+        if self.settings.summary_compaction_enabled:
+            # Only one window is folded at a time; kept once the fold is accepted
+            self._pending_compaction = compact_transcript(window, settings=self.settings)
+            window = self._pending_compaction.text
+        if previous:
+            prompt = f"""The following is the summary so far of a meeting that is still in progress:
+
+{previous}
+
+Update it with the next part of the transcript, keeping each action item with the speaker it belongs to:
+
+{window}
+
+{SUMMARY_INSTRUCTIONS}"""
+        else:
+            prompt = f"""Please provide a summary and action items for the first part of a meeting that is still in progress:
+
+{window}
+
+{SUMMARY_INSTRUCTIONS}"""
+        return self._complete(operation='rolling', messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ])
+
+    def _window_folded(self, rolling):
+        if self._pending_compaction:
+            self._window_compactions.append(self._pending_compaction)
+            self._pending_compaction = None
+        self._emit_progress(rolling)
+
+    def _emit_progress(self, rolling):
+        if self.socketio:
+            self.socketio.emit('summary_progress', {
+                'meeting_id': self.meeting_id,
+                'summary': rolling.summary,
+                'windows': rolling.windows
+            }, to=meeting_room(self.meeting_id))
+
+    def _finish_rolling_summary(self, summary, tail):
+        """Fold the part of the meeting after the last window into the running summary."""
+        compactions = list(self._window_compactions)
+        if tail.strip() and self.settings.summary_compaction_enabled:
+            compactions.append(compact_transcript(tail, settings=self.settings))
+            tail = compactions[-1].text
+        if compactions:
+            self.compaction = combine_compactions(compactions)
+            print(f"Compacted rolling transcript from {self.compaction.tokens_before} to "
+                  f"{self.compaction.tokens_after} tokens ({self.compaction.tokens_saved} saved)")
+        if not tail.strip():
+            return summary
+        if estimate_tokens(tail) > self.settings.summary_chunk_tokens:
+            chunks = chunk_transcript(tail, self.settings.summary_chunk_tokens)
+            print(f"Summarizing rolling tail in {len(chunks)} chunks")
+            return self._map_reduce_summary(chunks, summary_so_far=summary)
+        return self._stream_complete(operation='rolling_final', messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"""The following is the summary of a meeting up to its last few minutes:
+
+{summary}
+
+Update it with the end of the meeting, keeping each action item with the speaker it belongs to:
+
+{tail}
+
+{SUMMARY_INSTRUCTIONS}"""}
+        ])
+
     def generate_summary(self, transcript=None):
-        """Generate a summary of the transcript using Azure OpenAI with speaker-specific action items."""
+        """Generate a summary of the transcript using Azure OpenAI with speaker-specific action items.
+
+        Transcripts longer than settings.summary_chunk_tokens are split on speaker turns,
+        summarized in parallel and merged in a final reduce pass. The final
+        completion is streamed to clients as 'summary_delta' events, followed by
+        a 'summary' event with the full text. A cached summary for the same
+        transcript and generation settings is returned without calling the model.
+        Failures are reported to clients as a 'summary' event with status
+        'error' and then raised. Unless settings.summary_compaction_enabled is off, the
+        transcript is compacted first and the tokens saved are kept in
+        self.compaction. When a running summary was kept while recording, only
+        the transcript after its last window is summarized and merged into it,
+        and self.compaction adds up the windows and that tail.
+        """
         try:
             if not transcript:
                 # Format the transcript with speaker information for better context
-                formatted_transcript = []
-                for entry in self.speaker_transcript:
-                    formatted_transcript.append(
-                        f"[{entry['timestamp']}] {entry['speaker']}: {entry['text']}"
-                    )
-                transcript = "\n".join(formatted_transcript)
+                transcript = self.format_transcript()
             
             if not transcript:
                 return "No transcript available to summarize."
             
-            print("Generating summary using Azure OpenAI...")
-            print(f"Using deployment: {AZURE_OPENAI_DEPLOYMENT}")
-            print(f"Using endpoint: {AZURE_OPENAI_ENDPOINT}")
-            print(f"Transcript length: {len(transcript)} characters")
-            
-            response = client.chat.completions.create(
-                model=AZURE_OPENAI_DEPLOYMENT,
-                messages=[
-                    {"role": "system", "content": """You are a helpful assistant that summarizes meeting transcripts. 
-                    Your response should be structured in three parts:
-                    1. A concise summary of the main points discussed
-                    2. A list of action items, organized by speaker
-                    3. A general list of action items that aren't speaker-specific
-                    
-                    For speaker-specific action items, use the format:
-                    [Speaker Name]'s Action Items:
-                    - Item 1
-                    - Item 2
-                    
-                    For general action items, use the format:
-                    General Action Items:
-                    - Item 1
-                    - Item 2"""},
-                    {"role": "user", "content": f"""Please provide a summary and action items for this meeting transcript:
-
-{transcript}
-
-Please structure your response as follows:
-1. First, provide a concise summary of the main points discussed
-2. Then, list all action items organized by speaker (if any speaker-specific items are identified)
-3. Finally, list any general action items that aren't specific to a particular speaker
-4. Format all action items as bulleted lists"""}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
+            rolling_summary, tail = self.rolling.finish(self.settings.rolling_summary_wait_seconds) if self.rolling else (None, "")
+            if rolling_summary:
+                print(f"Finishing running summary of {self.rolling.windows} windows with a "
+                      f"{len(tail)} character tail")
+                summary = self._finish_rolling_summary(rolling_summary, tail)
+            else:
+                if self.settings.summary_compaction_enabled:
+                    self.compaction = compact_transcript(transcript, self.settings.summary_max_transcript_tokens or None, self.settings)
+                    print(f"Compacted transcript from {self.compaction.tokens_before} to "
+                          f"{self.compaction.tokens_after} tokens ({self.compaction.tokens_saved} saved)")
+                    transcript = self.compaction.text
+                
+                print("Generating summary using Azure OpenAI...")
+                print(f"Using deployment: {self.settings.azure_openai_deployment}")
+                print(f"Using endpoint: {self.settings.azure_openai_endpoint}")
+                print(f"Transcript length: {len(transcript)} characters")
+                
+                summary = self._cached(transcript, lambda: self._summarize(transcript), operation='summary')
             
-            summary = response.choices[0].message.content
             print(f"Generated summary: {summary[:200]}...")
+            if self.socketio:
+                self.socketio.emit('summary', {
+                    'status': 'success',
+                    'meeting_id': self.meeting_id,
+                    'summary': summary
+                }, to=meeting_room(self.meeting_id))
             return summary
         except Exception as e:
             print(f"Error generating summary: {str(e)}")
             import traceback
             traceback.print_exc()
-            return f"Error generating summary: {str(e)}" 
\ No newline at end of file
+            if self.socketio:
+                self.socketio.emit('summary', {
+                    'status': 'error',
+                    'meeting_id': self.meeting_id,
+                    'message': str(e)
+                }, to=meeting_room(self.meeting_id))
+            raise 
\ No newline at end of file
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+import logging
+import config
+from metrics import TRANSCRIPT_EMIT_LATENCY, TRANSCRIPT_ENTRIES
+from rooms import meeting_room
+
+logger = logging.getLogger(__name__)
+
+FINAL = 'final'
+PARTIAL = 'partial'
+FORGET = 'forget'
+
+
+class TranscriptEmitter:
+    """Delivers live transcript updates to Socket.IO clients from a background thread.
+
+    Speech SDK callbacks only enqueue. The emitter thread collects entries for
+    window seconds and sends each meeting's final entries as one
+    'transcript_batch' event. Interim 'recognizing' text is sent as
+    'transcript_partial', at most once per partial_interval per meeting, and
+    dropped once a final result for the meeting supersedes it. Events go to the
+    meeting's room only. window and partial_interval default to those of
+    config.settings.
+    """
+
+    def __init__(self, socketio, window=None, partial_interval=None):
+        settings = config.settings
+        self.socketio = socketio
+        self.window = settings.transcript_emit_window_seconds if window is None else window
+        self.partial_interval = settings.transcript_partial_interval_seconds if partial_interval is None \
+            else partial_interval
+        self._queue = queue.Queue()
+        self._last_partial_emit = {}
+        self._pending_partials = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the emitter thread if it is not already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='transcript-emitter', daemon=True)
+            self._thread.start()
+
+    def publish(self, meeting_id, entry, event_time=None):
+        """Queue a final transcript entry; never blocks.
+
+        event_time is the time.monotonic() at which the recognizer callback
+        received the entry, now by default; emit latency is measured from it.
+        """
+        self._queue.put_nowait((FINAL, meeting_id, entry, time.monotonic() if event_time is None else event_time))
+
+    def publish_partial(self, meeting_id, partial):
+        """Queue interim recognition text; never blocks."""
+        self._queue.put_nowait((PARTIAL, meeting_id, partial, time.monotonic()))
+
+    def _run(self):
+        while True:
+            # Wait for the first item, then gather everything that arrives within the window.
+            # A throttled partial is still pending, so wake up in time to send it.
+            try:
+                items = [self._queue.get(timeout=self.partial_interval if self._pending_partials else None)]
+            except queue.Empty:
+                items = []
+            deadline = time.monotonic() + self.window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._emit(items)
+            except Exception as e:
+                logger.error(f"Error emitting transcript updates: {str(e)}")
+
+    def _emit(self, items):
+        batches = {}
+        event_times = []
+        for kind, meeting_id, payload, event_time in items:
+            if kind == FINAL:
+                batches.setdefault(meeting_id, []).append(payload)
+                event_times.append(event_time)
+                self._pending_partials.pop(meeting_id, None)
+            elif kind == PARTIAL:
+                self._pending_partials[meeting_id] = payload
+            else:
+                self._last_partial_emit.pop(meeting_id, None)
+                self._pending_partials.pop(meeting_id, None)
+
+        for meeting_id, entries in batches.items():
+            self.socketio.emit(
+                'transcript_batch', {'meeting_id': meeting_id, 'entries': entries}, to=meeting_room(meeting_id)
+            )
+
+        now = time.monotonic()
+        for event_time in event_times:
+            TRANSCRIPT_EMIT_LATENCY.observe(now - event_time)
+        TRANSCRIPT_ENTRIES.inc(len(event_times))
+        for meeting_id, partial in list(self._pending_partials.items()):
+            if now - self._last_partial_emit.get(meeting_id, 0) < self.partial_interval:
+                continue
+            self.socketio.emit('transcript_partial', dict(partial, meeting_id=meeting_id), to=meeting_room(meeting_id))
+            self._last_partial_emit[meeting_id] = now
+            del self._pending_partials[meeting_id]
+
+    def forget(self, meeting_id):
+        """Drop throttling state for a meeting that has ended."""
+        self._queue.put_nowait((FORGET, meeting_id, None, time.monotonic()))